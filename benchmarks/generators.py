@@ -0,0 +1,235 @@
+import csv
+import random
+
+CROATIAN_FIRST_NAMES = [
+    'Ivan', 'Marko', 'Luka', 'Josip', 'Tomislav', 'Ante', 'Stjepan', 'Dario', 'Nikola', 'Mario',
+    'Hrvoje', 'Krešimir', 'Željko', 'Davor', 'Zoran', 'Goran', 'Đuro', 'Matej', 'Filip', 'Domagoj',
+    'Ana', 'Marija', 'Ivana', 'Petra', 'Maja', 'Katarina', 'Lucija', 'Nikolina', 'Martina', 'Andreja',
+    'Snježana', 'Vesna', 'Željka', 'Đurđica', 'Mirjana', 'Ljiljana', 'Gordana', 'Sanja', 'Jelena', 'Dora',
+]
+
+CROATIAN_SURNAMES = [
+    'Horvat', 'Kovačević', 'Babić', 'Marić', 'Jurić', 'Novak', 'Kovačić', 'Knežević', 'Vuković', 'Marković',
+    'Petrović', 'Matić', 'Tomić', 'Pavlović', 'Kovač', 'Božić', 'Blažević', 'Grgić', 'Pavić', 'Radić',
+    'Perić', 'Filipović', 'Šarić', 'Lovrić', 'Vidović', 'Perković', 'Popović', 'Bošnjak', 'Jukić', 'Barišić',
+    'Đurić', 'Čović', 'Šimić', 'Galić', 'Župan', 'Mikulić', 'Lukić', 'Vrdoljak', 'Zorić', 'Šestan',
+]
+
+CROATIAN_STREETS = [
+    'Ilica', 'Vukovarska', 'Savska cesta', 'Radnička cesta', 'Osječka ulica', 'Držićeva',
+    'Ulica grada Vukovara', 'Zagrebačka', 'Splitska', 'Frankopanska', 'Trg bana Jelačića', 'Domovinskog rata',
+]
+
+CROATIAN_CITIES = ['Zagreb', 'Split', 'Rijeka', 'Osijek', 'Zadar', 'Pula', 'Slavonski Brod', 'Karlovac', 'Varaždin', 'Šibenik']
+
+SANCTIONED_FIRST_NAMES = [
+    'Mohammad', 'Mohammed', 'Ali', 'Ahmad', 'Hassan', 'Hussein', 'Abdul', 'Omar', 'Youssef', 'Ibrahim',
+    'Dmitrij', 'Aleksandr', 'Sergei', 'Vladimir', 'Igor', 'Nikolai', 'Yevgeny', 'Oleg', 'Viktor', 'Mikhail',
+    'Aleksandar', 'Dragan', 'Milorad', 'Ratko', 'Slobodan', 'Radovan', 'Zeljko', 'Kim', 'Min', 'Elena',
+]
+
+SANCTIONED_SURNAMES = [
+    'Al-Assad', 'Makhlouf', 'Al Hassan', 'Shaaban', 'Abbas', 'Al-Masri', 'Haddad', 'Kassem', 'Nasrallah', 'Al Ali',
+    'Petrov', 'Ivanov', 'Sidorov', 'Volkov', 'Sokolov', 'Kuznetsov', 'Popov', 'Lebedev', 'Kozlov', 'Novikov',
+    'Jankovic', 'Mladic', 'Karadzic', 'Dodik', 'Stankovic', 'Jong Un', 'Yong Chol', 'Petrova', 'Smirnova', 'Orlova',
+]
+
+CYRILLIC_TRANSLITERATION = {
+    'a': 'а', 'b': 'б', 'v': 'в', 'g': 'г', 'd': 'д', 'e': 'е', 'z': 'з', 'i': 'и', 'j': 'й', 'k': 'к',
+    'l': 'л', 'm': 'м', 'n': 'н', 'o': 'о', 'p': 'п', 'r': 'р', 's': 'с', 't': 'т', 'u': 'у', 'f': 'ф',
+    'h': 'х', 'c': 'ц', 'y': 'ы',
+}
+
+SANCTIONS_COLUMNS = [
+    'fileGenerationDate', 'Entity_LogicalId', 'Entity_EU_ReferenceNumber', 'Entity_SubjectType',
+    'NameAlias_LastName', 'NameAlias_FirstName', 'NameAlias_MiddleName', 'NameAlias_WholeName',
+]
+
+
+def generate_oib(rng):
+    """
+    Generate a valid OIB (ISO 7064 MOD 11,10 control digit).
+
+    Parameters:
+    rng - random.Random instance
+
+    Returns:
+    str - 11 digit OIB
+    """
+    digits = [rng.randint(0, 9) for _ in range(10)]
+    remainder = 10
+    for digit in digits:
+        remainder = (remainder + digit) % 10
+        if remainder == 0:
+            remainder = 10
+        remainder = (remainder * 2) % 11
+    control = 11 - remainder
+    if control == 10:
+        control = 0
+    return "".join(str(d) for d in digits) + str(control)
+
+
+def to_cyrillic(text):
+    """Naive Latin to Cyrillic spelling, used for non-Latin aliases"""
+    return "".join(CYRILLIC_TRANSLITERATION.get(ch.lower(), ch) for ch in text)
+
+
+def mutate_name(rng, name):
+    """
+    Produce a spelling variant of a name the way it appears in client files.
+
+    Parameters:
+    rng - random.Random instance
+    name - Original name
+
+    Returns:
+    str - Upper-cased, typo'd or unchanged variant
+    """
+    choice = rng.random()
+    if choice < 0.3:
+        return name.upper()
+    if choice < 0.5 and len(name) > 4:
+        position = rng.randint(1, len(name) - 2)
+        return name[:position] + name[position + 1:]
+    if choice < 0.6:
+        return name.replace('c', 'ć').replace('z', 'ž')
+    return name
+
+
+def generate_sanctions_entities(entity_count, seed=42):
+    """
+    Generate sanctioned person entities with their aliases.
+
+    Parameters:
+    entity_count - Number of sanctioned persons
+    seed - Random seed
+
+    Returns:
+    list of (entity_id, first_name, last_name, aliases) where aliases are
+    (last_name, first_name, middle_name, whole_name) tuples
+    """
+    rng = random.Random(seed)
+    entities = []
+
+    for index in range(entity_count):
+        entity_id = 10000 + index
+        first_name = rng.choice(SANCTIONED_FIRST_NAMES)
+        last_name = rng.choice(SANCTIONED_SURNAMES)
+        middle_name = rng.choice(SANCTIONED_FIRST_NAMES) if rng.random() < 0.2 else ''
+
+        whole_name = " ".join(part for part in (first_name, middle_name, last_name) if part)
+        aliases = [(last_name, first_name, middle_name, whole_name)]
+
+        # whole name only alias, reversed order
+        if rng.random() < 0.5:
+            aliases.append(('', '', '', f"{last_name} {first_name}"))
+        # spelling variant
+        if rng.random() < 0.3:
+            variant = mutate_name(rng, last_name)
+            aliases.append((variant, first_name, '', f"{first_name} {variant}"))
+        # non-Latin alias
+        if rng.random() < 0.3:
+            aliases.append(('', '', '', to_cyrillic(f"{first_name} {last_name}")))
+
+        entities.append((entity_id, first_name, last_name, aliases))
+
+    return entities
+
+
+def write_sanctions_csv(file_path, entity_count, seed=42, organisation_ratio=0.1):
+    """
+    Write an EU consolidated list style CSV (';' separated).
+
+    Parameters:
+    file_path - Output path
+    entity_count - Number of sanctioned persons
+    seed - Random seed
+    organisation_ratio - Share of extra non-person rows
+
+    Returns:
+    list - Generated entities, see generate_sanctions_entities
+    """
+    rng = random.Random(seed + 1)
+    entities = generate_sanctions_entities(entity_count, seed)
+
+    with open(file_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(SANCTIONS_COLUMNS)
+
+        for entity_id, _, _, aliases in entities:
+            for last_name, first_name, middle_name, whole_name in aliases:
+                writer.writerow([
+                    '2026-10-01', entity_id, f"EU.{entity_id}.01", 'P',
+                    last_name, first_name, middle_name, whole_name
+                ])
+
+        for index in range(int(entity_count * organisation_ratio)):
+            entity_id = 900000 + index
+            writer.writerow([
+                '2026-10-01', entity_id, f"EU.{entity_id}.02", 'E',
+                '', '', '', f"{rng.choice(CROATIAN_SURNAMES)} Trading LLC"
+            ])
+
+    return entities
+
+
+def write_clients_csv(file_path, client_count, entities=None, planted_ratio=0.01, seed=7):
+    """
+    Write a client file in the format FileRepository expects (IME, OIB, ADRESA).
+
+    Parameters:
+    file_path - Output path
+    client_count - Number of clients
+    entities - Sanctions entities to plant as true matches
+    planted_ratio - Share of clients taken from sanctions entities
+    seed - Random seed
+
+    Returns:
+    dict - OIB -> entity_id for every planted client
+    """
+    rng = random.Random(seed)
+    planted = {}
+
+    with open(file_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['IME', 'OIB', 'ADRESA'])
+
+        for _ in range(client_count):
+            oib = generate_oib(rng)
+            address = f"{rng.choice(CROATIAN_STREETS)} {rng.randint(1, 200)}, {rng.choice(CROATIAN_CITIES)}"
+
+            if entities and rng.random() < planted_ratio:
+                entity_id, first_name, last_name, _ = rng.choice(entities)
+                full_name = f"{mutate_name(rng, last_name)} {mutate_name(rng, first_name)}"
+                planted[oib] = entity_id
+            else:
+                surname = rng.choice(CROATIAN_SURNAMES)
+                if rng.random() < 0.1:
+                    surname += " " + rng.choice(CROATIAN_SURNAMES)
+                full_name = f"{surname} {rng.choice(CROATIAN_FIRST_NAMES)}"
+                if rng.random() < 0.3:
+                    full_name = full_name.upper()
+
+            writer.writerow([full_name, oib, address])
+
+    return planted
+
+
+def write_clients_xlsx(file_path, clients_csv, sheets=2):
+    """
+    Write the clients of a CSV written by write_clients_csv as an Excel file,
+    split over several sheets like branch exports. Requires openpyxl.
+
+    Parameters:
+    file_path - Output .xlsx path
+    clients_csv - Client CSV with the same rows
+    sheets - Number of sheets the rows are split over
+    """
+    import pandas as pd
+
+    df = pd.read_csv(clients_csv, dtype=str)
+    rows_per_sheet = -(-len(df) // sheets) if len(df) else 1
+    with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
+        for sheet in range(sheets):
+            part = df.iloc[sheet * rows_per_sheet:(sheet + 1) * rows_per_sheet]
+            part.to_excel(writer, sheet_name=f"Klijenti {sheet + 1}", index=False)
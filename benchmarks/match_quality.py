@@ -0,0 +1,273 @@
+"""
+Match-quality regression harness.
+
+Runs the reference matcher (SanctionsRepository.find_person_by_name) and an
+alternative engine on the same generated corpus and reports precision/recall
+against the planted matches, plus every (client, entity) pair on which the
+two engines disagree.
+
+An engine is any callable (snapshot, name, surname) -> set of entity ids,
+where snapshot is the SanctionsSnapshot of the generated list, or the name
+of a services.matcher_engines engine ('index', 'ngram').
+
+With --workers the candidate also runs on a thread pool and its results must
+be identical to the sequential run (concurrency check).
+
+Matcher engines run with AppConfig.TOP_K_CANDIDATES and
+AppConfig.EXACT_MATCH_FAST_PATH unless --top-k / --exact-fast-path say
+otherwise. Both shorten the list of matched entities on purpose, so a k or
+the fast path shows up as only_reference pairs.
+
+Usage (from the repository root):
+    python -m benchmarks.match_quality --engine benchmarks.match_quality:positions_engine
+    python -m benchmarks.match_quality --engine ngram
+    python -m benchmarks.match_quality --engine index --top-k 0 --exact-fast-path off
+    python -m benchmarks.match_quality --engine mymodule:my_engine --workers 8
+    python -m benchmarks.match_quality --golden golden.json --save-golden
+"""
+import os
+import sys
+import json
+import argparse
+import importlib
+import tempfile
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generators import write_sanctions_csv, write_clients_csv
+from repositories.file_repository import FileRepository
+from repositories.sanctions_repository import SanctionsRepository
+from models import Person
+from config import AppConfig
+from services.matcher_engines import create_matcher_engine
+
+
+def reference_engine(snapshot, name, surname):
+    """Today's matching rules, the verdicts every other engine is checked against"""
+    repository = SanctionsRepository()
+    matches = repository.find_person_by_name(snapshot.aliases, name, surname)
+    return set(matches['Entity_LogicalId'].tolist())
+
+
+def positions_engine(snapshot, name, surname):
+    """Index based matcher used by ProcessingService"""
+    positions = SanctionsRepository().match_positions(snapshot, name, surname)
+    return {snapshot.entity_ids[position] for position in positions}
+
+
+def ranked_engine(snapshot, name, surname):
+    """Ranked matcher without a top-k limit, must agree with the reference"""
+    ranked = SanctionsRepository().rank_matches(snapshot, name, surname)
+    return {snapshot.entity_ids[position] for position, _, _, _ in ranked}
+
+
+_ngram_repository = SanctionsRepository()
+
+
+def ngram_engine(snapshot, name, surname):
+    """Sparse n-gram candidates checked with the rules, approximate"""
+    person = Person(name, surname, None, None)
+    ranked = _ngram_repository.rank_ngram_matches(snapshot, [person])[0]
+    return {snapshot.entity_ids[position] for position, _, _, _ in ranked}
+
+
+@contextmanager
+def engine_settings(top_k, exact_fast_path):
+    """Run with the given top-k and exact fast path, the global config is restored afterwards"""
+    saved = AppConfig.TOP_K_CANDIDATES, AppConfig.EXACT_MATCH_FAST_PATH
+    AppConfig.TOP_K_CANDIDATES, AppConfig.EXACT_MATCH_FAST_PATH = top_k, exact_fast_path
+    try:
+        yield
+    finally:
+        AppConfig.TOP_K_CANDIDATES, AppConfig.EXACT_MATCH_FAST_PATH = saved
+
+
+def matcher_engine(name):
+    """Wrap a services.matcher_engines engine as an engine callable"""
+    engine = create_matcher_engine(name, SanctionsRepository())
+
+    def match(snapshot, name, surname):
+        if engine.snapshot is not snapshot:
+            engine.prepare(snapshot)
+        ranked = engine.match_batch([Person(name, surname, None, None)])[0]
+        return {snapshot.entity_ids[position] for position, _, _, _ in ranked}
+    return match
+
+
+def load_engine(spec):
+    """
+    Import an engine from a 'module:function' spec or wrap a matcher engine by name.
+
+    Parameters:
+    spec - e.g. 'benchmarks.match_quality:reference_engine' or 'ngram'
+
+    Returns:
+    callable engine
+    """
+    if ':' not in spec:
+        # raises ValueError for an unknown engine name
+        return matcher_engine(spec)
+    module_name, _, attribute = spec.partition(':')
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute)
+
+
+def run_engine(engine, snapshot, people, workers=1):
+    """
+    Run an engine over all clients.
+
+    Parameters:
+    engine - Engine callable
+    snapshot - SanctionsSnapshot
+    people - Clients
+    workers - Threads calling the engine concurrently
+
+    Returns:
+    set of (oib, entity_id) pairs
+    """
+    def match(person):
+        return person.oib, engine(snapshot, person.name, person.surname)
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(match, people))
+    else:
+        results = [match(person) for person in people]
+
+    return {(oib, entity_id) for oib, entity_ids in results for entity_id in entity_ids}
+
+
+def precision_recall(found, expected):
+    """Precision and recall of found pairs against expected pairs"""
+    true_positives = len(found & expected)
+    precision = true_positives / len(found) if found else 1.0
+    recall = true_positives / len(expected) if expected else 1.0
+    return precision, recall
+
+
+def compare_engines(reference_pairs, candidate_pairs, planted_pairs):
+    """
+    Build the quality report for a candidate engine.
+
+    Parameters:
+    reference_pairs - Pairs found by the reference engine
+    candidate_pairs - Pairs found by the candidate engine
+    planted_pairs - Pairs planted by the generator (known true matches)
+
+    Returns:
+    dict with precision/recall values and disagreeing pairs
+    """
+    reference_precision, reference_recall = precision_recall(reference_pairs, planted_pairs)
+    candidate_precision, candidate_recall = precision_recall(candidate_pairs, planted_pairs)
+    agreement_precision, agreement_recall = precision_recall(candidate_pairs, reference_pairs)
+
+    return {
+        'reference': {'pairs': len(reference_pairs), 'precision': reference_precision, 'recall': reference_recall},
+        'candidate': {'pairs': len(candidate_pairs), 'precision': candidate_precision, 'recall': candidate_recall},
+        'agreement': {'precision': agreement_precision, 'recall': agreement_recall},
+        'only_reference': sorted(reference_pairs - candidate_pairs),
+        'only_candidate': sorted(candidate_pairs - reference_pairs),
+    }
+
+
+def print_report(report, people_by_oib, aliases_by_entity):
+    for engine in ('reference', 'candidate'):
+        values = report[engine]
+        print(f"{engine:<10} pairs={values['pairs']:<6} "
+              f"precision={values['precision']:.3f} recall={values['recall']:.3f}")
+    print(f"agreement  precision={report['agreement']['precision']:.3f} "
+          f"recall={report['agreement']['recall']:.3f}")
+
+    for label in ('only_reference', 'only_candidate'):
+        if report[label]:
+            print(f"\n{label} ({len(report[label])}):")
+        for oib, entity_id in report[label]:
+            person = people_by_oib.get(oib)
+            client = f"{person.surname} {person.name}" if person else oib
+            aliases = ", ".join(aliases_by_entity.get(entity_id, [])[:3])
+            print(f"  {oib} {client!r} <-> {entity_id} [{aliases}]")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare matcher engines against the reference rules")
+    parser.add_argument('--engine', default='benchmarks.match_quality:reference_engine',
+                        help="candidate engine as module:function or a matcher engine name")
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--sanctions', type=int, default=500)
+    parser.add_argument('--planted-ratio', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--golden', default=None,
+                        help="JSON file with stored reference pairs, reused instead of rerunning the reference")
+    parser.add_argument('--save-golden', action='store_true', help="write the reference pairs to --golden")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="also run the candidate on this many threads and compare with the sequential run")
+    parser.add_argument('--strict', action='store_true', help="exit with 1 on any disagreement")
+    parser.add_argument('--top-k', type=int, default=AppConfig.TOP_K_CANDIDATES,
+                        help="aliases kept per client by matcher engines, 0 keeps all "
+                             "(AppConfig.TOP_K_CANDIDATES by default)")
+    parser.add_argument('--exact-fast-path', choices=('on', 'off'),
+                        default='on' if AppConfig.EXACT_MATCH_FAST_PATH else 'off',
+                        help="exact match fast path of the index engine (AppConfig.EXACT_MATCH_FAST_PATH by default)")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix='sanctions_quality_')
+    sanctions_file = os.path.join(work_dir, 'sanctions.csv')
+    clients_file = os.path.join(work_dir, 'clients.csv')
+    entities = write_sanctions_csv(sanctions_file, args.sanctions, seed=args.seed)
+    planted = write_clients_csv(clients_file, args.clients, entities=entities,
+                                planted_ratio=args.planted_ratio, seed=args.seed)
+    planted_pairs = set(planted.items())
+
+    people, _ = FileRepository().load_people_from_file(clients_file)
+    snapshot = SanctionsRepository().load_snapshot(sanctions_file)
+    person_names = snapshot.aliases
+
+    corpus = {'clients': args.clients, 'sanctions': args.sanctions, 'seed': args.seed,
+              'planted_ratio': args.planted_ratio}
+    golden = None
+    if args.golden and os.path.exists(args.golden) and not args.save_golden:
+        with open(args.golden, encoding='utf-8') as f:
+            golden = json.load(f)
+        if golden.get('corpus') != corpus:
+            print(f"Golden file {args.golden} was made for a different corpus, rerunning the reference")
+            golden = None
+
+    if golden is not None:
+        reference_pairs = {tuple(pair) for pair in golden['pairs']}
+    else:
+        reference_pairs = run_engine(reference_engine, snapshot, people)
+        if args.golden and args.save_golden:
+            with open(args.golden, 'w', encoding='utf-8') as f:
+                json.dump({'corpus': corpus, 'pairs': sorted(reference_pairs)}, f, indent=1)
+
+    try:
+        candidate = load_engine(args.engine)
+    except ValueError as e:
+        print(e)
+        return 1
+    with engine_settings(args.top_k or None, args.exact_fast_path == 'on'):
+        candidate_pairs = run_engine(candidate, snapshot, people)
+
+        concurrency_errors = 0
+        if args.workers > 1:
+            threaded_pairs = run_engine(candidate, snapshot, people, workers=args.workers)
+            concurrency_errors = len(threaded_pairs ^ candidate_pairs)
+            print(f"concurrent run with {args.workers} workers: "
+                  f"{'identical' if not concurrency_errors else f'{concurrency_errors} differing pairs'}")
+
+    report = compare_engines(reference_pairs, candidate_pairs, planted_pairs)
+    people_by_oib = {person.oib: person for person in people}
+    aliases_by_entity = person_names.groupby('Entity_LogicalId')['NameAlias_WholeName'].apply(list).to_dict()
+    print_report(report, people_by_oib, aliases_by_entity)
+
+    if concurrency_errors:
+        return 1
+    if args.strict and (report['only_reference'] or report['only_candidate']):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
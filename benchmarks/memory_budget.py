@@ -0,0 +1,120 @@
+"""
+Memory budget check.
+
+Screens one generated client file in a fresh process without a budget and
+with AppConfig.MEMORY_BUDGET_MB, and checks that the budgeted run stays
+under its budget (peak RSS) and exports the same results as the unbudgeted
+run. Exits with status 1 when a check fails.
+
+Usage (from the repository root):
+    python -m benchmarks.memory_budget --clients 300000 --budget 200
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generators import write_sanctions_csv, write_clients_csv
+from config import AppConfig
+
+
+def screen(clients_file, sanctions_file, results_file, budget_mb):
+    """
+    Screen a client file in this process.
+
+    Returns:
+    dict - peak RSS, match and spill counters of the run
+    """
+    from repositories.file_repository import FileRepository
+    from repositories.sanctions_repository import SanctionsRepository
+    from services.processing_service import ProcessingService
+    from services.result_exporter import CSVResultWriter
+    from utils import RunReport
+    from utils.memory import peak_rss_mb
+
+    AppConfig.MEMORY_BUDGET_MB = budget_mb
+    AppConfig.CHECKPOINTS = False
+    AppConfig.HISTORY_DB_PATH = ''
+    report = RunReport()
+    file_repository = FileRepository()
+    people, message = file_repository.load_people_from_file(clients_file, report=report)
+    results = []
+    ProcessingService(file_repository, SanctionsRepository()).process_data(
+        sanctions_filename=sanctions_file,
+        people_data=people,
+        on_complete=lambda matches, total: results.append((matches, total)),
+        result_writer=CSVResultWriter(results_file),
+        report=report
+    ).join()
+
+    counters = report.counters
+    return {
+        'budget_mb': budget_mb,
+        'peak_rss_mb': peak_rss_mb(),
+        'clients': results[0][1] if results else 0,
+        'matches': results[0][0] if results else 0,
+        'spilled_clients': counters.get('spilled_clients', 0),
+        'spill_reads': counters.get('spill_reads', 0),
+        'chunk_size_reductions': counters.get('chunk_size_reductions', 0),
+        'chunk_size_increases': counters.get('chunk_size_increases', 0),
+    }
+
+
+def run_child(clients_file, sanctions_file, results_file, budget_mb, env=None):
+    """screen() in a fresh interpreter, so the peak RSS is the run's own"""
+    command = [sys.executable, '-m', 'benchmarks.memory_budget', '--child',
+               clients_file, sanctions_file, results_file, str(budget_mb or 0)]
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(command, cwd=root, check=True, capture_output=True, text=True, env=env).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check peak memory of a budgeted screening run")
+    parser.add_argument('--clients', type=int, default=300000, help="generated clients")
+    parser.add_argument('--sanctions', type=int, default=5000, help="generated sanctioned persons")
+    parser.add_argument('--budget', type=int, default=200, help="memory budget in MB")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--work-dir', default=None, help="directory for generated files (temp dir by default)")
+    parser.add_argument('--child', nargs=4, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        clients_file, sanctions_file, results_file, budget = args.child
+        print(json.dumps(screen(clients_file, sanctions_file, results_file, int(budget) or None)))
+        return 0
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='sanctions_memory_')
+    os.makedirs(work_dir, exist_ok=True)
+    sanctions_file = os.path.join(work_dir, f'sanctions_{args.sanctions}.csv')
+    clients_file = os.path.join(work_dir, f'clients_{args.clients}.csv')
+    entities = write_sanctions_csv(sanctions_file, args.sanctions, seed=args.seed)
+    write_clients_csv(clients_file, args.clients, entities=entities, seed=args.seed)
+
+    unbudgeted_file = os.path.join(work_dir, 'results_unbudgeted.csv')
+    budgeted_file = os.path.join(work_dir, 'results_budgeted.csv')
+    unbudgeted = run_child(clients_file, sanctions_file, unbudgeted_file, None)
+    budgeted = run_child(clients_file, sanctions_file, budgeted_file, args.budget)
+
+    print(f"{'run':<12} {'peak MB':>9} {'matches':>8} {'spilled':>9} {'reads':>7} {'halved':>7} {'grown':>6}")
+    for name, run in (('unbudgeted', unbudgeted), ('budgeted', budgeted)):
+        print(f"{name:<12} {run['peak_rss_mb']:>9.1f} {run['matches']:>8} {run['spilled_clients']:>9} "
+              f"{run['spill_reads']:>7} {run['chunk_size_reductions']:>7} {run['chunk_size_increases']:>6}")
+
+    failures = []
+    if budgeted['peak_rss_mb'] > args.budget:
+        failures.append(f"peak RSS {budgeted['peak_rss_mb']:.1f} MB is over the budget of {args.budget} MB")
+    with open(unbudgeted_file, 'rb') as a, open(budgeted_file, 'rb') as b:
+        if a.read() != b.read():
+            failures.append("budgeted run exported different results")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
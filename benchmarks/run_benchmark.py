@@ -0,0 +1,301 @@
+"""
+Screening benchmark.
+
+Generates synthetic client and sanctions files, runs the loading, sanctions
+preparation and matching stages end to end and reports throughput, latency
+percentiles and peak memory. Results can be stored as a baseline and later
+runs compared against it.
+
+Usage (from the repository root):
+    python -m benchmarks.run_benchmark --sizes 1000 10000
+    python -m benchmarks.run_benchmark --sizes 1000 --save-baseline
+    python -m benchmarks.run_benchmark --sizes 1000 --compare
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generators import write_sanctions_csv, write_clients_csv, write_clients_xlsx
+from repositories.file_repository import FileRepository
+from repositories.sanctions_repository import SanctionsRepository
+from services.processing_service import ProcessingService
+from services.matcher_engines import MATCHER_ENGINES
+from utils.memory import peak_rss_mb
+from config import AppConfig
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# metrics where a higher value is better, every other metric is "lower is better"
+HIGHER_IS_BETTER = ('_per_s',)
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+class Stage:
+    """
+    Context manager measuring wall time and memory of a stage.
+
+    Peak RSS is always recorded. tracemalloc gives the peak Python allocation
+    of the stage itself but slows matching down several times, so it is only
+    used when trace_memory is set.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.seconds = 0.0
+        self.peak_mb = None
+        self.rss_mb = None
+
+    def __enter__(self):
+        if self.trace_memory:
+            tracemalloc.start()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._start
+        if self.trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.peak_mb = peak / (1024 * 1024)
+        self.rss_mb = peak_rss_mb()
+        return False
+
+
+def run_size(work_dir, client_count, sanctions_count, match_sample, seed, trace_memory=False, engine=None):
+    """
+    Run all benchmark stages for one size.
+
+    Parameters:
+    work_dir - Directory for generated files
+    client_count - Number of generated clients
+    sanctions_count - Number of generated sanctioned persons
+    match_sample - Number of clients to run through the matcher
+    seed - Random seed
+    trace_memory - Also measure peak traced allocations per stage
+    engine - Matcher engine name of the end to end run, AppConfig.MATCH_ENGINE by default
+
+    Returns:
+    dict - metric name -> value
+    """
+    sanctions_file = os.path.join(work_dir, f'sanctions_{sanctions_count}.csv')
+    clients_file = os.path.join(work_dir, f'clients_{client_count}.csv')
+    entities = write_sanctions_csv(sanctions_file, sanctions_count, seed=seed)
+    write_clients_csv(clients_file, client_count, entities=entities, seed=seed)
+
+    # fresh snapshot store, prepare always builds and stores the indexes
+    AppConfig.SNAPSHOT_STORE_DIR = os.path.join(work_dir, f'store_{sanctions_count}')
+
+    file_repository = FileRepository()
+    sanctions_repository = SanctionsRepository()
+    # separate repository so the end to end run does not reuse the prepared snapshot
+    processing_service = ProcessingService(file_repository, SanctionsRepository())
+    metrics = {}
+
+    with Stage(trace_memory) as stage:
+        people, _ = file_repository.load_people_from_file(clients_file)
+    metrics['load_seconds'] = stage.seconds
+    metrics['load_clients_per_s'] = client_count / stage.seconds if stage.seconds else 0.0
+    metrics['load_peak_rss_mb'] = stage.rss_mb
+    if trace_memory:
+        metrics['load_traced_peak_mb'] = stage.peak_mb
+
+    # the same clients as an Excel file, skipped when openpyxl is missing
+    excel_file = os.path.join(work_dir, f'clients_{client_count}.xlsx')
+    try:
+        if not os.path.exists(excel_file):
+            write_clients_xlsx(excel_file, clients_file)
+    except ImportError:
+        print("Excel load benchmark skipped, writing .xlsx requires openpyxl")
+    else:
+        with Stage(trace_memory) as stage:
+            excel_people, _ = file_repository.load_people_from_file(excel_file)
+        metrics['excel_load_seconds'] = stage.seconds
+        metrics['excel_load_clients_per_s'] = client_count / stage.seconds if stage.seconds else 0.0
+        metrics['excel_load_peak_rss_mb'] = stage.rss_mb
+        # how many times slower than the CSV load
+        metrics['excel_load_csv_ratio'] = stage.seconds / metrics['load_seconds'] if metrics['load_seconds'] else 0.0
+        metrics['excel_load_matches'] = sum(
+            (a.oib, a.name, a.surname, a.address) == (b.oib, b.name, b.surname, b.address)
+            for a, b in zip(people, excel_people or [])
+        )
+
+    with Stage(trace_memory) as stage:
+        person_names = sanctions_repository.process_sanctions_data(sanctions_file)
+    metrics['prepare_seconds'] = stage.seconds
+    metrics['prepare_aliases_per_s'] = len(person_names) / stage.seconds if stage.seconds else 0.0
+    metrics['prepare_peak_rss_mb'] = stage.rss_mb
+    if trace_memory:
+        metrics['prepare_traced_peak_mb'] = stage.peak_mb
+
+    # what a second process pays for the same lists: mapping the stored snapshot
+    with Stage(trace_memory) as stage:
+        SanctionsRepository().load_snapshot(sanctions_file)
+    metrics['mapped_load_seconds'] = stage.seconds
+    metrics['mapped_load_peak_rss_mb'] = stage.rss_mb
+
+    sample = people[:match_sample]
+    latencies = []
+    with Stage(trace_memory) as stage:
+        for person in sample:
+            start = time.perf_counter()
+            sanctions_repository.find_person_by_name(person_names, person.name, person.surname)
+            latencies.append((time.perf_counter() - start) * 1000)
+    metrics['match_clients_per_s'] = len(sample) / stage.seconds if stage.seconds else 0.0
+    metrics['match_p50_ms'] = percentile(latencies, 50)
+    metrics['match_p95_ms'] = percentile(latencies, 95)
+    metrics['match_p99_ms'] = percentile(latencies, 99)
+    metrics['match_max_ms'] = max(latencies) if latencies else 0.0
+    metrics['match_peak_rss_mb'] = stage.rss_mb
+    if trace_memory:
+        metrics['match_traced_peak_mb'] = stage.peak_mb
+
+    snapshot = sanctions_repository.load_snapshot(sanctions_file)
+    latencies = []
+    with Stage(trace_memory) as stage:
+        for person in sample:
+            start = time.perf_counter()
+            sanctions_repository.match_positions(snapshot, person.name, person.surname)
+            latencies.append((time.perf_counter() - start) * 1000)
+    metrics['indexed_match_clients_per_s'] = len(sample) / stage.seconds if stage.seconds else 0.0
+    metrics['indexed_match_p50_ms'] = percentile(latencies, 50)
+    metrics['indexed_match_p95_ms'] = percentile(latencies, 95)
+    metrics['indexed_match_p99_ms'] = percentile(latencies, 99)
+    metrics['indexed_match_max_ms'] = max(latencies) if latencies else 0.0
+
+    # one batch, like a chunk of ProcessingService with the 'ngram' engine
+    sanctions_repository.ngram_index(snapshot)
+    with Stage(trace_memory) as stage:
+        sanctions_repository.rank_ngram_matches(snapshot, sample)
+    metrics['ngram_match_clients_per_s'] = len(sample) / stage.seconds if stage.seconds else 0.0
+    metrics['ngram_match_peak_rss_mb'] = stage.rss_mb
+
+    results = []
+    with Stage(trace_memory) as stage:
+        thread = processing_service.process_data(
+            sanctions_filename=sanctions_file,
+            people_data=sample,
+            on_complete=lambda match_count, total: results.append(match_count),
+            engine=engine
+        )
+        thread.join()
+    metrics['end_to_end_seconds'] = stage.seconds
+    metrics['end_to_end_clients_per_s'] = len(sample) / stage.seconds if stage.seconds else 0.0
+    metrics['end_to_end_peak_rss_mb'] = stage.rss_mb
+    if trace_memory:
+        metrics['end_to_end_traced_peak_mb'] = stage.peak_mb
+    metrics['end_to_end_matches'] = results[0] if results else 0
+    return metrics
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """
+    Compare results with the stored baseline.
+
+    Parameters:
+    results - size -> metrics of this run
+    baseline - size -> metrics of the baseline
+    tolerance - Allowed relative change before a metric counts as regression
+
+    Returns:
+    list of regression descriptions
+    """
+    regressions = []
+    for size, metrics in results.items():
+        if size not in baseline:
+            continue
+        for name, value in metrics.items():
+            base = baseline[size].get(name)
+            if not base or value is None or name.endswith('_matches'):
+                continue
+            if name.endswith(HIGHER_IS_BETTER):
+                change = (base - value) / base
+            else:
+                change = (value - base) / base
+            if change > tolerance:
+                regressions.append(f"{size}: {name} {base:.3f} -> {value:.3f} ({change:+.0%})")
+    return regressions
+
+
+def print_report(size, metrics):
+    print(f"\n=== {size} ===")
+    for name, value in metrics.items():
+        if isinstance(value, float):
+            print(f"  {name:<28} {value:12.3f}")
+        else:
+            print(f"  {name:<28} {value:>12}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sanctions screening benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000],
+                        help="client file sizes to generate (1000 to 1000000)")
+    parser.add_argument('--sanctions-size', type=int, default=None,
+                        help="sanctioned persons to generate, defaults to the client size")
+    parser.add_argument('--match-sample', type=int, default=200,
+                        help="clients run through the matcher for each size")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="measure per-stage allocations with tracemalloc (slows the run down)")
+    parser.add_argument('--engine', choices=sorted(MATCHER_ENGINES), default=None,
+                        help="matcher engine of the end to end stage")
+    parser.add_argument('--work-dir', default=None, help="keep generated files in this directory")
+    parser.add_argument('--save-baseline', action='store_true', help="store results as the new baseline")
+    parser.add_argument('--compare', action='store_true', help="fail on regressions against the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    args = parser.parse_args(argv)
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='sanctions_bench_')
+    os.makedirs(work_dir, exist_ok=True)
+
+    results = {}
+    for size in args.sizes:
+        sanctions_count = args.sanctions_size or size
+        metrics = run_size(work_dir, size, sanctions_count, min(args.match_sample, size),
+                           args.seed, args.trace_memory, args.engine)
+        results[str(size)] = metrics
+        print_report(size, metrics)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved: {args.baseline}")
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"\nNo baseline found: {args.baseline}")
+            return 1
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("\nNo regressions against baseline.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,6 +10,118 @@ class AppConfig:
     # API
     SANCTIONS_API_URL = "https://webgate.ec.europa.eu/fsd/fsf/public/files/csvFullSanctionsList_1_1/content?token=dG9rZW4tMjAxNw"
     
+    # Sanctions lists screened in one run (see repositories.sanctions_sources)
+    SANCTIONS_SOURCES = ('eu', 'un', 'uk', 'ofac')
+    SANCTIONS_SOURCE_URLS = {
+        'eu': SANCTIONS_API_URL,
+        'un': "https://scsanctions.un.org/resources/xml/en/consolidated.xml",
+        'uk': "https://ofsistorage.blob.core.windows.net/publishlive/2022format/ConList.csv",
+        'ofac': "https://www.treasury.gov/ofac/downloads/sdn.csv",
+    }
+    
+    # Screening needs every list of SANCTIONS_SOURCES; False screens with the lists that could
+    # be downloaded and parsed, with a warning naming the missing ones
+    REQUIRE_ALL_SANCTIONS_SOURCES = True
+    
+    # Sanctions names written only in these scripts are kept (see utils.helpers.SCRIPT_RANGES)
+    RETAINED_SCRIPTS = ('basic_latin', 'latin_1_supplement', 'latin_extended')
+    # Names in these scripts are kept with a Latin transliteration (see utils.transliteration)
+    TRANSLITERATED_SCRIPTS = ('cyrillic', 'greek', 'arabic')
+    
+    # Matching rules
+    SURNAME_THRESHOLD = 0.8     # 80% required for surnames
+    NAME_THRESHOLD = 0.7        # 70% required for names
+    TOKEN_SIMILARITY = 0.85     # 85% for token-level matching (WholeName fallback)
+    MIN_TOKEN_LENGTH = 3        # Minimum characters for a token to be considered
+    
+    # Clients with an exact (normalized) name hit skip fuzzy matching. Faster, but only
+    # the exactly named entities are reported, fuzzy matches of other entities are dropped
+    EXACT_MATCH_FAST_PATH = False
+    
+    # Candidate control for very common name tokens (Mohammad, Ali, Horvat...).
+    # A name whose tokens all occur in at least COMMON_TOKEN_MIN_ALIASES aliases is common;
+    # COMMON_TOKEN_CANDIDATE_CAP limits how many candidates it may produce per client.
+    # None keeps every candidate, so verdicts match the reference rules.
+    COMMON_TOKEN_MIN_ALIASES = 200
+    COMMON_TOKEN_CANDIDATE_CAP = None
+    
+    # Best scored aliases kept per client (None keeps every matching alias).
+    # A k also drops the matched entities ranked below it from the results and
+    # the report, the verdict itself does not change; k prunes scoring work
+    TOP_K_CANDIDATES = None
+    
+    # Matching engine (services.matcher_engines.MATCHER_ENGINES, python main.py --engine NAME):
+    # 'reference' (find_person_by_name, slow), 'index' (same rules on the name indexes)
+    # or 'ngram' (TF-IDF character n-gram candidates checked with the same rules, approximate)
+    MATCH_ENGINE = 'index'
+    NGRAM_SIZE = 3
+    NGRAM_TOP_N = 50
+    NGRAM_MIN_SIMILARITY = 0.3
+    
+    # Matching threads per run (rapidfuzz releases the GIL while scoring)
+    MATCH_WORKERS = 1
+    MATCH_CHUNK_SIZE = 1000
+    
+    # Cache of screening verdicts by normalized name and surname in front of the matcher
+    # (utils.verdict_cache), emptied when a new sanctions snapshot is prepared
+    VERDICT_CACHE_SIZE = 100000     # verdicts kept (least recently used are evicted), 0 disables
+    VERDICT_CACHE_TTL = 3600        # seconds a verdict is reused, None for no limit
+    
+    # Live metrics of a run (utils.run_metrics): shown on the sanctions screen and written
+    # in the Prometheus text format to METRICS_FILE_PATH (python main.py --metrics-file PATH)
+    METRICS_UI_INTERVAL = 0.5       # seconds between updates of the screen
+    METRICS_RATE_WINDOW = 30        # seconds of progress the throughput and ETA are computed from
+    METRICS_FILE_PATH = None        # e.g. the textfile collector dir of the node exporter, None disables
+    METRICS_FILE_INTERVAL = 10      # seconds between writes of the metrics file
+    
+    # Memory budget of a screening run in MB of resident memory, None for no limit
+    # (python main.py --memory-budget MB). Over the budget client chunks and screened
+    # chunks with their matches are spilled to SPILL_DIR and match chunks are halved,
+    # they double again up to MATCH_CHUNK_SIZE once memory is under MEMORY_GROW_RATIO
+    MEMORY_BUDGET_MB = None
+    MEMORY_SPILL_RATIO = 0.8        # spilling starts at this share of the budget, the rest is
+                                    # room for the chunk being read or screened
+    MEMORY_GROW_RATIO = 0.5         # halved match chunks grow back below this share of the budget
+    MEMORY_MIN_CHUNK_SIZE = 100
+    SPILL_DIR = None                # temp dir when None
+    CLIENT_READ_CHUNK_SIZE = 10000  # csv rows parsed at a time under a budget
+    
+    # Prepared snapshots (aliases and indexes) are stored as memory-mapped files,
+    # processes screening the same lists map one read-only copy instead of rebuilding it
+    SNAPSHOT_STORE_DIR = None   # temp dir when None, '' disables the store
+    SNAPSHOT_STORE_KEEP = 3     # newest stored snapshots kept
+    
+    # Batch screening of many client files against one prepared snapshot (services.batch_service)
+    BATCH_WORKERS = 1           # files screened at the same time
+    BATCH_EXPORT_FORMAT = '.csv'
+    MSG_BATCH_PROGRESS = "Skupna provjera: {} / {} datoteka, {} podudaranja"
+    MSG_BATCH_COMPLETE = "Skupna provjera završena: {} datoteka, {} klijenata, {} podudaranja. Sažetak: {}"
+    
+    # Sharded screening through a shared job directory (services.shard_service)
+    SHARD_COUNT = 8
+    SHARD_LOCK_TIMEOUT = 15 * 60   # seconds without a heartbeat after which a shard of a lost worker is taken over
+    SHARD_LOCK_HEARTBEAT = 60      # seconds between lock renewals of a worker screening a shard
+    
+    # Sanctions lists are downloaded again every SANCTIONS_REFRESH_INTERVAL seconds and a new
+    # version is swapped in for the next run (services.refresh_service), None downloads only at start
+    SANCTIONS_REFRESH_INTERVAL = 4 * 3600
+    
+    # Append-only checkpoints of running screenings (repositories.checkpoint_repository),
+    # an interrupted run can be resumed without screening finished clients again
+    CHECKPOINTS = True
+    CHECKPOINT_DIR = None           # ~/.sanctions_check/checkpoints when None
+    CHECKPOINT_SYNC_SECONDS = 5     # checkpoint lines are fsynced at most this often
+    
+    # Screening history (repositories.history_repository), every run and client verdict
+    HISTORY_DB_PATH = None      # ~/.sanctions_check/history.sqlite3 when None, '' disables the history
+    HISTORY_BATCH_SIZE = 5000   # clients per insert transaction
+    
+    # Excel client files: engine 'calamine' (python-calamine), 'openpyxl' (read-only streaming),
+    # 'pandas' (pd.read_excel) or None for the fastest installed one; sheets None reads every
+    # sheet with the client columns
+    EXCEL_ENGINE = None
+    EXCEL_SHEETS = None
+    
     # File columns
     REQUIRED_COLUMNS = ['IME','OIB', 'ADRESA']
     
@@ -19,6 +131,13 @@ class AppConfig:
     MSG_PROCESSING = "Obrada podataka o sankcijama..."
     MSG_NO_CLIENT_DATA = "Morate najprije učitati datoteku s klijentima."
     MSG_COMPLETE = "Provjera završena. Pronađeno {} podudaranja."
+    MSG_SCREENING_ERROR = "Provjera nije završena: {}"
+    MSG_SANCTIONS_LOAD_ERROR = "Podaci o sankcijama nisu učitani."
+    MSG_SOURCES_FAILED = "Popisi sankcija nisu dostupni: {}. Provjera nije moguća."
+    MSG_SOURCES_MISSING = "Upozorenje: provjera bez popisa: {}"
+    MSG_REFRESH_FAILED = "Osvježavanje nije uspjelo ({}), koristi se prethodna verzija popisa sankcija."
+    MSG_METRICS = "{} / {} klijenata  ·  {:.0f} klijenata/s  ·  preostalo {}  ·  {} podudaranja  ·  faza: {}  ·  memorija {}"
+    MSG_RESUME_CHECKPOINT = "Pronađena je prekinuta provjera ovih klijenata. Želite li nastaviti gdje je stala?"
     
     # File format messages
     MSG_UNSUPPORTED_FORMAT = "Nepodržani format datoteke: {}. Koristite CSV ili Excel."
@@ -26,3 +145,16 @@ class AppConfig:
     MSG_LOAD_SUCCESS = "Učitano {} osoba"
     MSG_SKIPPED_RECORDS = "Preskočeno {} nevažećih zapisa."
     MSG_LOAD_ERROR = "Greška pri učitavanju datoteke: {}"
+
+    # Result export
+    RESULT_EXPORT_FIELDS = ['OIB', 'IME', 'PREZIME', 'ADRESA',
+                            'Entity_LogicalId', 'NameAlias_WholeName',
+                            'surname_score', 'name_score', 'match_score', 'snapshot_version']
+    RESULT_EXPORT_BATCH_SIZE = 10000
+    MSG_EXPORT_SUCCESS = "Rezultati izvezeni: {} ({} redaka)"
+    MSG_EXPORT_ERROR = "Greška pri izvozu rezultata: {}"
+
+    # Run instrumentation
+    PROFILER = None             # None, 'cprofile' or 'pyinstrument'
+    PROFILE_OUTPUT_DIR = None   # temp dir when None
+    RUN_REPORT_PATH = None      # JSON run report is written here when set
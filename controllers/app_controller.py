@@ -1,9 +1,12 @@
+import threading
 import tkinter.messagebox as messagebox
 import pandas as pd
 from config import AppConfig
+from utils import RunReport
 
 class AppController:
-    def __init__(self, ui_manager, download_service, processing_service):
+    def __init__(self, ui_manager, download_service, processing_service, refresh_service=None,
+                 batch_service=None):
         """
         Initialize the controller with dependencies.
         
@@ -11,10 +14,14 @@ class AppController:
         ui_manager - Manager for UI components
         download_service - Service for downloading data
         processing_service - Service for processing data
+        refresh_service - Optional RefreshService, keeps the sanctions snapshot current
+        batch_service - Optional BatchService for screening many client files
         """
         self.ui_manager = ui_manager
         self.download_service = download_service
         self.processing_service = processing_service
+        self.refresh_service = refresh_service
+        self.batch_service = batch_service
  
         self.sanctions_filename = None
         self.people_data = None
@@ -25,11 +32,16 @@ class AppController:
         self.ui_manager.set_handlers(
             on_file_selected=self.handle_selected_file,
             on_start_processing=self.start_processing,
-            on_return_to_welcome=self.show_welcome
+            on_return_to_welcome=self.show_welcome,
+            on_batch_selected=self.start_batch if self.batch_service else None
         )
 
         self.ui_manager.show_welcome_screen()
-        self.start_download_in_background()
+        if self.refresh_service:
+            self.ui_manager.update_welcome_status(AppConfig.MSG_DOWNLOADING)
+            self.refresh_service.start(on_refresh=self.on_sanctions_refreshed)
+        else:
+            self.start_download_in_background()
     
     def handle_selected_file(self, file_path):
         """
@@ -61,29 +73,121 @@ class AppController:
         def on_download_complete(filename):
             """Callback when download is complete"""
             self.sanctions_filename = filename
-            
-            if filename:
-                # get dataset date
-                try:
-                    df = pd.read_csv(filename, sep=";", low_memory=False) 
-                    file_generation_date = df['fileGenerationDate'].iloc[0] if not df.empty else None 
-                    
-                    self.ui_manager.update_welcome_status(
-                        f"Sanctions data loaded: {filename} as of {file_generation_date}."
-                    )
-                except Exception as e:
-                    self.ui_manager.update_welcome_status(
-                        f"Sanctions data loaded: {filename}"
-                    )
-            else:
-                # update if error
-                self.ui_manager.update_welcome_status(
-                    AppConfig.MSG_DOWNLOAD_ERROR
-                )
+            self._show_sanctions_status(filename)
 
         # start download
         self.download_service.download_async(on_download_complete)
     
+    def _download_error(self):
+        """Download error message, naming the lists that could not be downloaded"""
+        failed_sources = self.download_service.failed_sources
+        if failed_sources:
+            return AppConfig.MSG_SOURCES_FAILED.format(", ".join(failed_sources))
+        return AppConfig.MSG_DOWNLOAD_ERROR
+    
+    def on_sanctions_refreshed(self, changed, filename, snapshot):
+        """
+        Callback of the refresh scheduler.
+        
+        Parameters:
+        changed - Whether a new list version was swapped in
+        filename - dict source name -> path of the current lists
+        snapshot - Current SanctionsSnapshot
+        """
+        if filename:
+            self.sanctions_filename = filename
+        if changed or not filename:
+            self._show_sanctions_status(filename, snapshot)
+        elif self.refresh_service.failed_sources:
+            self.ui_manager.update_welcome_status(AppConfig.MSG_REFRESH_FAILED.format(
+                ", ".join(self.refresh_service.failed_sources)
+            ))
+    
+    def _show_sanctions_status(self, filename, snapshot=None):
+        """Show the downloaded lists, with the date of the EU list"""
+        if not filename:
+            # update if error
+            self.ui_manager.update_welcome_status(self._download_error())
+            return
+        
+        lists = ", ".join(filename)
+        if snapshot is not None:
+            lists += f" (version {snapshot.version})"
+        missing = [name for name in AppConfig.SANCTIONS_SOURCES if name not in filename]
+        if snapshot is not None:
+            missing = sorted(set(missing) | set(snapshot.missing_sources))
+        if missing:
+            lists += ". " + AppConfig.MSG_SOURCES_MISSING.format(", ".join(missing))
+        try:
+            df = pd.read_csv(filename['eu'], sep=";", nrows=1)
+            file_generation_date = df['fileGenerationDate'].iloc[0] if not df.empty else None 
+            
+            self.ui_manager.update_welcome_status(
+                f"Sanctions data loaded: {lists} as of {file_generation_date}."
+            )
+        except Exception as e:
+            self.ui_manager.update_welcome_status(
+                f"Sanctions data loaded: {lists}"
+            )
+    
+    def start_batch(self, client_files, output_dir):
+        """
+        Screen several client files against one prepared snapshot in background.
+        
+        Parameters:
+        client_files - Selected client files
+        output_dir - Directory for the per-file results and the summary, None for no export
+        """
+        match_count = [0]
+        
+        def on_file_complete(file_summary, done, total):
+            """Show batch progress"""
+            match_count[0] += file_summary['matches']
+            self.ui_manager.update_welcome_status(
+                AppConfig.MSG_BATCH_PROGRESS.format(done, total, match_count[0])
+            )
+        
+        def batch_thread():
+            snapshot = None
+            sanctions_filename = self.sanctions_filename
+            if self.refresh_service:
+                current_files, snapshot = self.refresh_service.current()
+                sanctions_filename = current_files or sanctions_filename
+            if snapshot is None and not sanctions_filename:
+                self.ui_manager.update_welcome_status(AppConfig.MSG_DOWNLOADING)
+                sanctions_filename = self.download_service.download()
+                if not sanctions_filename:
+                    self.ui_manager.update_welcome_status(self._download_error())
+                    return
+                self.sanctions_filename = sanctions_filename
+            
+            self.ui_manager.update_welcome_status(AppConfig.MSG_PROCESSING)
+            summary = self.batch_service.screen_files(
+                client_files,
+                sanctions_filename=sanctions_filename,
+                snapshot=snapshot,
+                output_dir=output_dir,
+                on_file_complete=on_file_complete
+            )
+            if summary is None:
+                failed_sources = self.batch_service.sanctions_repository.failed_sources
+                self.ui_manager.update_welcome_status(
+                    AppConfig.MSG_SOURCES_FAILED.format(", ".join(failed_sources)) if failed_sources
+                    else AppConfig.MSG_SANCTIONS_LOAD_ERROR
+                )
+                return
+            message = AppConfig.MSG_BATCH_COMPLETE.format(
+                summary['file_count'], summary['clients'], summary['matches'],
+                summary.get('summary_file', '-')
+            )
+            if summary['missing_lists']:
+                message += " " + AppConfig.MSG_SOURCES_MISSING.format(", ".join(summary['missing_lists']))
+            self.ui_manager.update_welcome_status(message)
+        
+        thread = threading.Thread(target=batch_thread)
+        thread.daemon = True
+        thread.start()
+    
     def show_welcome(self):
         """Show welcome screen"""
         self.ui_manager.show_welcome_screen()
@@ -115,14 +219,21 @@ class AppController:
         Continue processing with downloaded sanctions data.
         
         Parameters:
-        sanctions_filename - Path to the sanctions data file
+        sanctions_filename - dict source name -> path of the downloaded list
         """
         if not sanctions_filename:
-            self.ui_manager.update_sanctions_status(AppConfig.MSG_DOWNLOAD_ERROR)
+            self.ui_manager.update_sanctions_status(self._download_error())
             return
             
         self.sanctions_filename = sanctions_filename
         self.ui_manager.update_sanctions_status(AppConfig.MSG_PROCESSING)
+        
+        # the run keeps the snapshot it starts with, a refresh only affects the next run
+        snapshot = None
+        if self.refresh_service:
+            current_files, snapshot = self.refresh_service.current()
+            if snapshot is not None:
+                self.sanctions_filename = current_files
  
         # define callbacks for processing
         def on_progress(current, total):
@@ -135,9 +246,33 @@ class AppController:
             
         def on_complete(match_count, total_count):
             """Update status when processing is complete"""
-            self.ui_manager.update_sanctions_status(
-                AppConfig.MSG_COMPLETE.format(match_count)
-            )
+            message = AppConfig.MSG_COMPLETE.format(match_count)
+            missing = self.processing_service.last_metrics.labels.get('missing_lists')
+            if missing:
+                message += " " + AppConfig.MSG_SOURCES_MISSING.format(missing.replace(",", ", "))
+            self.ui_manager.update_sanctions_status(message)
+
+        def on_error(message):
+            """The run failed, its results are incomplete"""
+            self.ui_manager.update_sanctions_status(AppConfig.MSG_SCREENING_ERROR.format(message))
+
+        def on_metrics(metrics):
+            """Show throughput, ETA, stage and memory of the run"""
+            self.ui_manager.update_sanctions_metrics(metrics)
+
+        def on_report(report):
+            """Print stage timings and counters of the run"""
+            print(report.format())
+
+        # the run report starts with the download timing
+        report = RunReport()
+        report.merge(self.download_service.last_report)
+        
+        # an interrupted run of the same clients can continue where it stopped
+        checkpoints = self.processing_service.checkpoint_repository
+        resume = bool(checkpoints and checkpoints.exists(self.people_data) and messagebox.askyesno(
+            "Nastavak provjere", AppConfig.MSG_RESUME_CHECKPOINT
+        ))
 
         # start processing
         self.processing_service.process_data(
@@ -145,5 +280,11 @@ class AppController:
             people_data=self.people_data,
             on_progress=on_progress,
             on_match_found=on_match_found,
-            on_complete=on_complete
+            on_complete=on_complete,
+            on_report=on_report,
+            report=report,
+            snapshot=snapshot,
+            resume=resume,
+            on_metrics=on_metrics,
+            on_error=on_error
         )
\ No newline at end of file
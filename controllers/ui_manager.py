@@ -15,7 +15,8 @@ class UIManager:
         self.event_handlers = {
             'on_file_selected': None,
             'on_start_processing': None,
-            'on_return_to_welcome': None
+            'on_return_to_welcome': None,
+            'on_batch_selected': None
         }
         
         self.welcome_screen = None
@@ -23,22 +24,26 @@ class UIManager:
     
     def set_handlers(self, on_file_selected, 
                     on_start_processing, 
-                    on_return_to_welcome):
+                    on_return_to_welcome,
+                    on_batch_selected=None):
         """
         Parameters:
 
         on_file_selected - Called when a file is selected
         on_start_processing - Called when processing is started
         on_return_to_welcome - Called when returning to welcome screen
+        on_batch_selected - Called with (files, output directory) for a batch screening
         """
         self.event_handlers['on_file_selected'] = on_file_selected
         self.event_handlers['on_start_processing'] = on_start_processing
         self.event_handlers['on_return_to_welcome'] = on_return_to_welcome
+        self.event_handlers['on_batch_selected'] = on_batch_selected
         
         self.welcome_screen = WelcomeScreen(
             self.root,
             on_start_callback=on_start_processing,
-            on_file_drop_callback=on_file_selected
+            on_file_drop_callback=on_file_selected,
+            on_batch_callback=on_batch_selected
         )
         
         self.sanctions_screen = SanctionsScreen(
@@ -82,6 +87,11 @@ class UIManager:
         if self.sanctions_screen:
             self.sanctions_screen.update_progress(current, total)
     
+    def update_sanctions_metrics(self, metrics: dict):
+        
+        if self.sanctions_screen:
+            self.sanctions_screen.update_metrics(metrics)
+    
     def add_person_to_results(self, person: Person):
     
         if self.sanctions_screen:
@@ -1,10 +1,22 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog
 from tkinter import font as tkfont
 import webbrowser
 from services.pdf_exporter import PDFExporter
+from services.result_exporter import create_result_writer, available_export_formats
 from config import AppConfig
 
+def format_score(score):
+    """Score as a percentage, blank when the alias has no score of its own"""
+    return f"{score:.0%}" if score is not None else ""
+
+
+def format_duration(seconds):
+    """Seconds as H:MM:SS"""
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
 class SanctionsScreen:
     def __init__(self, root, on_back_callback):
         """
@@ -44,6 +56,13 @@ class SanctionsScreen:
             command=self._export_to_pdf
         )
         self.export_pdf_button.pack(side="left", padx=10)
+
+        self.export_data_button = ttk.Button(
+            self.nav_frame,
+            text="💾 Izvoz podataka",
+            command=self._export_results
+        )
+        self.export_data_button.pack(side="left")
         
         # MVEP link 
         self.link_label = ttk.Label(
@@ -96,6 +115,10 @@ class SanctionsScreen:
         self.status_label = ttk.Label(self.progress_frame, text="Ready")
         self.status_label.pack(side="top", anchor="w")
         
+        # throughput, ETA, matches, stage and memory of the running check
+        self.metrics_label = ttk.Label(self.progress_frame, text="", font=("", 9))
+        self.metrics_label.pack(side="top", anchor="w")
+        
         self.progress_bar = ttk.Progressbar(
             self.progress_frame,
             orient="horizontal",
@@ -120,9 +143,19 @@ class SanctionsScreen:
         # frame for 2nd table
         self.details_frame = ttk.LabelFrame(self.frame, text="Podudarajuća imena")
 
-        self.details_table = ttk.Treeview(self.details_frame, columns=("matching_name"), show="headings")
+        self.details_table = ttk.Treeview(
+            self.details_frame,
+            columns=("matching_name", "surname_score", "name_score", "score"),
+            show="headings"
+        )
         self.details_table.heading("matching_name", text="Ime na listi sankcija")
+        self.details_table.heading("surname_score", text="Prezime")
+        self.details_table.heading("name_score", text="Ime")
+        self.details_table.heading("score", text="Ukupno")
         self.details_table.column("matching_name", width=300)
+        self.details_table.column("surname_score", width=70, anchor="e")
+        self.details_table.column("name_score", width=70, anchor="e")
+        self.details_table.column("score", width=70, anchor="e")
 
         # scrollbar for 2nd table
         self.details_scrollbar = ttk.Scrollbar(self.details_frame, orient=tk.VERTICAL, command=self.details_table.yview)
@@ -150,8 +183,14 @@ class SanctionsScreen:
         
         if person_obj and hasattr(person_obj, "matching_names") and person_obj.matching_names:
           
-            for name in person_obj.matching_names:
-                self.details_table.insert("", "end", values=(name,))
+            # matches are ranked best first, aliases without own score stay blank
+            for _, name, surname_score, name_score, score in person_obj.matches:
+                self.details_table.insert("", "end", values=(
+                    name,
+                    format_score(surname_score),
+                    format_score(name_score),
+                    format_score(score) if surname_score is not None else ""
+                ))
         
             self.details_frame.pack(padx=10, pady=(5, 10), fill="both", expand=True)
         else:
@@ -183,6 +222,35 @@ class SanctionsScreen:
             status_update_callback=self.update_status
         )
     
+    def _export_results(self):
+        """Export the results to CSV, JSON Lines or Parquet (when pyarrow is installed)"""
+        if not self.person_objects:
+            return
+
+        labels = {
+            '.csv': "CSV datoteke",
+            '.jsonl': "JSON Lines datoteke",
+            '.parquet': "Parquet datoteke"
+        }
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[(labels[ext], f"*{ext}") for ext in available_export_formats()],
+            title="Spremi rezultate"
+        )
+        if not file_path:
+            return
+
+        try:
+            writer = create_result_writer(file_path)
+            if writer is None:
+                self.update_status(AppConfig.MSG_EXPORT_ERROR.format(file_path))
+                return
+            with writer:
+                writer.write_people(self.person_objects.values())
+            self.update_status(AppConfig.MSG_EXPORT_SUCCESS.format(file_path, writer.rows_written))
+        except Exception as e:
+            self.update_status(AppConfig.MSG_EXPORT_ERROR.format(e))
+
     def add_person_object(self, person):
         """
         Add a person to the results table
@@ -208,6 +276,22 @@ class SanctionsScreen:
             self.progress_bar["value"] = percentage
             self.root.update_idletasks()  
     
+    def update_metrics(self, metrics):
+        """
+        Show the live metrics of the run.
+        
+        Parameters:
+        metrics - dict from RunMetrics.values()
+        """
+        eta = metrics['eta_seconds']
+        memory = metrics['rss_bytes']
+        self.metrics_label.config(text=AppConfig.MSG_METRICS.format(
+            metrics['clients_done'], metrics['clients_total'], metrics['clients_per_second'],
+            format_duration(eta) if eta is not None else "-", metrics['matches'], metrics['stage'],
+            f"{memory / (1024 * 1024):.0f} MB" if memory is not None else "-"
+        ))
+        self.root.update_idletasks()
+    
     def update_status(self, message):
      
         self.status_label.config(text=message)
@@ -217,6 +301,7 @@ class SanctionsScreen:
        
         self.progress_bar["value"] = 0
         self.status_label.config(text="Ready")
+        self.metrics_label.config(text="")
         self.root.update_idletasks()
     
     def clear_table(self):
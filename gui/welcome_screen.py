@@ -5,10 +5,12 @@ from typing import Callable
 from config import AppConfig
 
 class WelcomeScreen: 
-    def __init__(self, root: tk.Tk, on_start_callback: Callable, on_file_drop_callback: Callable):
+    def __init__(self, root: tk.Tk, on_start_callback: Callable, on_file_drop_callback: Callable,
+                 on_batch_callback: Callable = None):
         self.root = root
         self.on_start_callback = on_start_callback
         self.on_file_drop_callback = on_file_drop_callback
+        self.on_batch_callback = on_batch_callback
         self.frame = ttk.Frame(root)
         # UI
         self._setup_ui()
@@ -36,7 +38,16 @@ class WelcomeScreen:
             command=self._open_file_dialog,
             width=25
         )
-        self.file_button.pack(pady=20)
+        self.file_button.pack(pady=(20, 5))
+        
+        self.batch_button = ttk.Button(
+            self.file_frame,
+            text="Skupna provjera više datoteka",
+            command=self._open_batch_dialog,
+            width=25
+        )
+        if self.on_batch_callback:
+            self.batch_button.pack(pady=5)
         
         self.file_path_label = ttk.Label(
             self.file_frame,
@@ -95,6 +106,25 @@ class WelcomeScreen:
             )
             self.on_file_drop_callback(file_path)
     
+    def _open_batch_dialog(self):
+        file_paths = filedialog.askopenfilenames(
+            title="Odaberi datoteke s klijentima",
+            filetypes=[
+                ("CSV i Excel datoteke", "*.csv *.xlsx *.xls"),
+                ("Sve datoteke", "*.*")
+            ]
+        )
+        if not file_paths:
+            return
+        
+        # results of every file and the batch summary go to one directory
+        output_dir = filedialog.askdirectory(title="Odaberi mapu za rezultate")
+        self.file_path_label.config(
+            text=f"Odabrano datoteka: {len(file_paths)}",
+            foreground="blue"
+        )
+        self.on_batch_callback(list(file_paths), output_dir or None)
+    
     def update_file_status(self, message: str, is_success: bool = True):
         self.file_status_label.config(
             text=message,
@@ -1,13 +1,19 @@
 import sys
 sys.dont_write_bytecode = True
+import argparse
 import tkinter as tk
 from config import AppConfig
 from controllers.app_controller import AppController
 from controllers.ui_manager import UIManager
 from services.download_service import DownloadService
 from services.processing_service import ProcessingService
-from repositories.file_repository import FileRepository
+from services.refresh_service import RefreshService
+from services.batch_service import BatchService, collect_client_files, format_batch_summary
+from services.shard_service import ShardService, run_local_workers
+from services.matcher_engines import MATCHER_ENGINES
+from repositories.file_repository import FileRepository, split_name_column
 from repositories.sanctions_repository import SanctionsRepository
+from repositories.history_repository import create_history_repository
 
 class SanctionsApp:
     def __init__(self):
@@ -19,12 +25,28 @@ class SanctionsApp:
         # respoitories
         self.file_repository = FileRepository()
         self.sanctions_repository = SanctionsRepository()
+        self.history_repository = create_history_repository()
         
         # services with dependencies
         self.download_service = DownloadService(self.sanctions_repository)
         self.processing_service = ProcessingService(
             self.file_repository, 
-            self.sanctions_repository
+            self.sanctions_repository,
+            self.history_repository
+        )
+        
+        self.refresh_service = None
+        if AppConfig.SANCTIONS_REFRESH_INTERVAL:
+            self.refresh_service = RefreshService(
+                self.download_service,
+                self.sanctions_repository,
+                AppConfig.SANCTIONS_REFRESH_INTERVAL
+            )
+        
+        self.batch_service = BatchService(
+            self.file_repository,
+            self.sanctions_repository,
+            self.history_repository
         )
         
         # UI manager
@@ -34,7 +56,9 @@ class SanctionsApp:
         self.controller = AppController(
             self.ui_manager,
             self.download_service,
-            self.processing_service
+            self.processing_service,
+            self.refresh_service,
+            self.batch_service
         )
         
         self.controller.initialize()
@@ -42,9 +66,177 @@ class SanctionsApp:
     def run(self):
         self.root.mainloop()
 
+def print_client_history(oib):
+    """Print every recorded verdict of a client"""
+    history_repository = create_history_repository()
+    if history_repository is None:
+        return
+    verdicts = history_repository.client_history(oib)
+    if not verdicts:
+        print(f"No screening history for OIB {oib}")
+    for verdict in verdicts:
+        status = "MATCH" if verdict['matched'] else "no match"
+        print(f"{verdict['started_at']}  run {verdict['run_id']}  list {verdict['snapshot_version']} "
+              f"({verdict['generation_date']})  {status}")
+        for match in verdict['matches']:
+            print(f"    {match['entity_id']}  {match['whole_name']}  {match['score']}")
+
+def run_lookup(args):
+    """Screen single names ('SURNAME NAME', '-' reads one per line from stdin) and print the verdicts"""
+    names = args.lookup
+    if names == ['-']:
+        names = (line.strip() for line in sys.stdin if line.strip())
+
+    sanctions_repository = SanctionsRepository()
+    sanctions_filename = sanctions_for_cli(args, sanctions_repository)
+    if not sanctions_filename:
+        return 1
+    snapshot = sanctions_repository.load_snapshot(sanctions_filename)
+    if snapshot is None:
+        return 1
+
+    processing_service = ProcessingService(FileRepository(), sanctions_repository)
+    for full_name in names:
+        surname, name = split_name_column(full_name)
+        person = processing_service.screen_person(name, surname, snapshot=snapshot)
+        if not person.matches:
+            print(f"{full_name}: no match")
+            continue
+        print(f"{full_name}: MATCH")
+        for entity_id, whole_name, _, _, score in person.matches:
+            print(f"    {entity_id}  {whole_name}  {score}")
+
+    if processing_service.verdict_cache is not None:
+        stats = processing_service.verdict_cache.stats()
+        print(f"Verdict cache: {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions")
+    return 0
+
+def run_batch(args):
+    """Screen client files without the GUI and print the batch summary"""
+    client_files = collect_client_files(args.batch)
+    if not client_files:
+        print("No client files found")
+        return 1
+
+    sanctions_repository = SanctionsRepository()
+    sanctions_filename = sanctions_for_cli(args, sanctions_repository)
+    if not sanctions_filename:
+        return 1
+
+    def on_file_complete(file_summary, done, total):
+        print(f"[{done}/{total}] {file_summary['file']}: {file_summary['matches']} matches")
+
+    batch_service = BatchService(FileRepository(), sanctions_repository, create_history_repository())
+    summary = batch_service.screen_files(
+        client_files,
+        sanctions_filename=sanctions_filename,
+        output_dir=args.output,
+        workers=args.workers,
+        on_file_complete=on_file_complete,
+        resume=args.resume
+    )
+    if summary is None:
+        return 1
+    print(format_batch_summary(summary))
+    if summary.get('summary_file'):
+        print(f"Summary: {summary['summary_file']}")
+    return 1 if summary['failed_files'] else 0
+
+def sanctions_for_cli(args, sanctions_repository):
+    """--sanctions file, or the downloaded lists"""
+    if args.sanctions:
+        return args.sanctions
+    print(AppConfig.MSG_DOWNLOADING)
+    download_service = DownloadService(sanctions_repository)
+    sanctions_filename = download_service.download()
+    if not sanctions_filename:
+        print(AppConfig.MSG_SOURCES_FAILED.format(", ".join(download_service.failed_sources))
+              if download_service.failed_sources else AppConfig.MSG_DOWNLOAD_ERROR)
+    return sanctions_filename
+
+def run_shards(args):
+    """Plan, work on or merge a sharded screening job"""
+    if not args.job_dir:
+        print("--job-dir is required for sharded screening")
+        return 1
+    shard_service = ShardService(args.job_dir)
+
+    if args.shard_plan:
+        sanctions_filename = sanctions_for_cli(args, SanctionsRepository())
+        if not sanctions_filename:
+            return 1
+        manifest = shard_service.plan(args.shard_plan, sanctions_filename, args.shards)
+        if manifest is None:
+            return 1
+        print(f"Planned {manifest['clients']} clients in {manifest['shard_count']} shards: "
+              f"{shard_service.manifest_path}")
+
+    if args.shard_work:
+        if args.processes > 1:
+            screened = [index for indexes in run_local_workers(args.job_dir, args.processes) for index in indexes]
+        else:
+            screened = shard_service.work()
+        print(f"Screened shards: {', '.join(str(index) for index in sorted(screened)) or 'none'}")
+
+    if args.shard_merge:
+        summary = shard_service.merge(args.shard_merge)
+        if summary is None:
+            return 1
+        print(f"Merged {summary['clients']} clients, {summary['matches']} matches into {summary['output']}")
+    return 0
+
 def main():
+    parser = argparse.ArgumentParser(description=AppConfig.APP_NAME)
+    parser.add_argument('--engine', choices=sorted(MATCHER_ENGINES), default=AppConfig.MATCH_ENGINE,
+                        help="matching engine")
+    parser.add_argument('--history', metavar='OIB', default=None,
+                        help="print the screening history of a client and exit")
+    parser.add_argument('--lookup', nargs='+', metavar='NAME', default=None,
+                        help="screen single names given as 'SURNAME NAME', '-' reads them from stdin")
+    parser.add_argument('--batch', nargs='+', metavar='PATH', default=None,
+                        help="screen client files or directories without the GUI")
+    parser.add_argument('--sanctions', default=None,
+                        help="EU sanctions CSV for --batch, the lists are downloaded when omitted")
+    parser.add_argument('--output', default=None, help="directory for --batch results and summary")
+    parser.add_argument('--workers', type=int, default=AppConfig.BATCH_WORKERS,
+                        help="client files screened at the same time in --batch")
+    parser.add_argument('--memory-budget', type=int, metavar='MB', default=None,
+                        help="spill clients and results to disk above this resident memory")
+    parser.add_argument('--metrics-file', metavar='PATH', default=None,
+                        help="write live run metrics in the Prometheus text format to PATH")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue interrupted --batch files from their checkpoints")
+    parser.add_argument('--job-dir', default=None, help="shared job directory of a sharded screening")
+    parser.add_argument('--shard-plan', metavar='CLIENT_FILE', default=None,
+                        help="split a client file into shards in --job-dir")
+    parser.add_argument('--shards', type=int, default=AppConfig.SHARD_COUNT, help="number of shards")
+    parser.add_argument('--shard-work', action='store_true',
+                        help="screen unclaimed shards of --job-dir until none are left")
+    parser.add_argument('--processes', type=int, default=1, help="local worker processes for --shard-work")
+    parser.add_argument('--shard-merge', metavar='OUTPUT', default=None,
+                        help="check every shard of --job-dir and merge the results into OUTPUT")
+    args = parser.parse_args()
+    AppConfig.MATCH_ENGINE = args.engine
+    if args.memory_budget:
+        AppConfig.MEMORY_BUDGET_MB = args.memory_budget
+    if args.metrics_file:
+        AppConfig.METRICS_FILE_PATH = args.metrics_file
+
+    if args.shard_plan or args.shard_work or args.shard_merge:
+        return run_shards(args)
+
+    if args.batch:
+        return run_batch(args)
+
+    if args.lookup:
+        return run_lookup(args)
+
+    if args.history:
+        print_client_history(args.history)
+        return
+
     app = SanctionsApp()
     app.run()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -1,3 +1,4 @@
 from .person import Person
+from .sanctions_snapshot import SanctionsSnapshot
 
-__all__ = ['Person']
\ No newline at end of file
+__all__ = ['Person', 'SanctionsSnapshot']
\ No newline at end of file
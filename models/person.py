@@ -1,12 +1,18 @@
 class Person:
-    def __init__(self, name, surname, oib, address, count=0, matching_names=None):
+    def __init__(self, name, surname, oib, address, count=0, matching_names=None, matches=None,
+                 snapshot_version=None):
         self.name = name
         self.surname = surname
         self.oib = oib
         self.address = address
         self.count = count
         self.matching_names = matching_names if matching_names is not None else []
+        # (entity_id, whole_name, surname_score, name_score, score) for every alias of every
+        # matched entity, best first; aliases that did not match themselves have None, None, 0.0
+        self.matches = matches if matches is not None else []
+        # version of the sanctions snapshot the matches come from
+        self.snapshot_version = snapshot_version
 
     
     def __str__(self):
-        return f"Person(ime='{self.name}', prezime='{self.surname}' oib='{self.oib}', address='{self.address}', count='{self.count}')"
\ No newline at end of file
+        return f"Person(ime='{self.name}', prezime='{self.surname}' oib='{self.oib}', address='{self.address}', count='{self.count}')"
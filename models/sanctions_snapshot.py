@@ -0,0 +1,79 @@
+class SanctionsSnapshot:
+    def __init__(self, aliases, version, generation_date=None, source_file=None, exact_index=None,
+                 token_index=None, prefix_index=None, component_index=None, token_stats=None,
+                 sources=None, alias_columns=None, entity_positions=None, missing_sources=None):
+        """
+        Prepared sanctions data of the downloaded lists, with their lookup indexes.
+        Read-only once built, so one snapshot can be shared by concurrent matchers.
+
+        Parameters:
+        aliases - DataFrame of person aliases with a 0..n-1 index (see SanctionsRepository.load_snapshot),
+                  None when alias_columns are given
+        version - Content hash of the source file (combined hash for several lists)
+        generation_date - Generation date of the EU list (or the only list), if present
+        source_file - Path of the source file, or dict source name -> path
+        exact_index - ExactNameIndex over the aliases
+        token_index - WholeNameTokenIndex over the aliases
+        prefix_index - FirstNamePrefixIndex over the aliases
+        component_index - ComponentNameIndex over the aliases
+        token_stats - TokenFrequencyStats of the alias tokens
+        sources - dict source name -> {'file', 'version', 'generation_date', 'aliases'}
+        alias_columns - dict column -> StringTable of a stored snapshot, aliases is built from it on first use
+        entity_positions - Stored KeyedPostings of str(entity id) -> alias positions
+        missing_sources - Lists that were given but could not be parsed, left out of the snapshot
+        """
+        self._aliases = aliases
+        self.alias_columns = alias_columns
+        self.version = version
+        self.generation_date = generation_date
+        self.source_file = source_file
+        self.exact_index = exact_index
+        self.token_index = token_index
+        self.prefix_index = prefix_index
+        self.component_index = component_index
+        self.token_stats = token_stats
+        self.sources = sources if sources is not None else {}
+        self.missing_sources = list(missing_sources or [])
+        # stored snapshot file the snapshot was mapped from or saved to, None when not stored
+        self.store_file = None
+
+        # plain sequences for alias expansion without DataFrame filtering
+        if alias_columns is not None:
+            self.entity_ids = alias_columns['Entity_LogicalId']
+            self.whole_names = alias_columns['NameAlias_WholeName']
+        else:
+            self.entity_ids = aliases['Entity_LogicalId'].tolist()
+            self.whole_names = aliases['NameAlias_WholeName'].tolist()
+
+        # keyed by str(entity id), the same keys as a stored KeyedPostings
+        self.entity_positions = entity_positions
+        if entity_positions is None:
+            self.entity_positions = {}
+            for position, entity_id in enumerate(self.entity_ids):
+                self.entity_positions.setdefault(str(entity_id), []).append(position)
+
+    @property
+    def aliases(self):
+        """DataFrame of the aliases, built from the stored columns on first use"""
+        if self._aliases is None:
+            import pandas as pd
+            self._aliases = pd.DataFrame({column: table.tolist() for column, table in self.alias_columns.items()})
+        return self._aliases
+
+    def alias_positions(self, entity_ids):
+        """
+        Positions of all aliases of the given entities.
+
+        Parameters:
+        entity_ids - Iterable of Entity_LogicalId values
+
+        Returns:
+        list of alias positions, in alias order
+        """
+        positions = []
+        for entity_id in dict.fromkeys(entity_ids):
+            positions.extend(self.entity_positions.get(str(entity_id), ()))
+        return sorted(positions)
+
+    def __str__(self):
+        return f"SanctionsSnapshot(version='{self.version}', generation_date='{self.generation_date}', aliases={len(self.entity_ids)})"
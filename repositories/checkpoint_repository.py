@@ -0,0 +1,211 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+from datetime import datetime
+from config import AppConfig
+from repositories.snapshot_store import save_snapshot_file, load_snapshot_file
+
+
+def checkpoint_directory():
+    """AppConfig.CHECKPOINT_DIR, or the checkpoints next to the history in the user's home directory"""
+    if AppConfig.CHECKPOINT_DIR is not None:
+        return AppConfig.CHECKPOINT_DIR
+    return os.path.join(os.path.expanduser('~'), '.sanctions_check', 'checkpoints')
+
+
+def clients_key(people):
+    """Identity of a client list, the same list gets the same checkpoint"""
+    digest = hashlib.sha1()
+    for person in people:
+        digest.update(f"{person.oib}\x1f{person.surname}\x1f{person.name}\x1e".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class CheckpointWriter:
+    """
+    Appends the screened chunks of a run to its checkpoint file, one JSON
+    line per chunk. Lines are flushed at once and synced to disk at most
+    every AppConfig.CHECKPOINT_SYNC_SECONDS.
+    """
+
+    def __init__(self, file_path, header=None):
+        """
+        Parameters:
+        file_path - Checkpoint file, appended to
+        header - Run identity, written as the first line of a new file
+        """
+        self.file_path = file_path
+        self._file = open(file_path, 'a', encoding='utf-8')
+        self._synced = time.monotonic()
+        if header is not None:
+            self._append(header)
+
+    def _append(self, record):
+        self._file.write(json.dumps(record, separators=(',', ':'), default=str))
+        self._file.write('\n')
+        self._file.flush()
+        if time.monotonic() - self._synced >= AppConfig.CHECKPOINT_SYNC_SECONDS:
+            os.fsync(self._file.fileno())
+            self._synced = time.monotonic()
+
+    def write_chunk(self, done, matches):
+        """
+        Record a screened chunk.
+
+        Parameters:
+        done - Number of clients screened so far (end offset of the chunk)
+        matches - (client index, ranked list) of the matched clients of the chunk
+        """
+        self._append({'done': done, 'matches': matches})
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class CheckpointRepository:
+    """
+    Append-only checkpoints of screening runs, one file per client list in
+    checkpoint_directory(). A checkpoint holds the run identity (snapshot
+    version and fingerprint, engine, sanctions files) and the ranked matches
+    of every screened chunk, enough to resume without rescreening. The
+    stored snapshot of the run is kept next to it until the checkpoint is
+    removed, so a resumed run does not depend on the downloaded lists, which
+    may be deleted by then.
+    """
+
+    def __init__(self, directory=None):
+        """
+        Parameters:
+        directory - Checkpoint directory, checkpoint_directory() when None
+        """
+        self.directory = directory or checkpoint_directory()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"checkpoint_{key}.jsonl")
+
+    def snapshot_path(self, key):
+        return os.path.join(self.directory, f"checkpoint_{key}.idx")
+
+    def exists(self, people):
+        """Whether an unfinished run of this client list has a checkpoint"""
+        return os.path.exists(self.path(clients_key(people)))
+
+    def load(self, key):
+        """
+        Read a checkpoint. A line cut off by a crash ends the checkpoint.
+
+        Parameters:
+        key - clients_key of the client list
+
+        Returns:
+        (header, clients done, dict client index -> ranked list), None without checkpoint
+        """
+        file_path = self.path(key)
+        if not os.path.exists(file_path):
+            return None
+
+        header = None
+        done = 0
+        matches = {}
+        with open(file_path, encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if header is None:
+                    header = record
+                    continue
+                done = record['done']
+                for index, ranked in record['matches']:
+                    matches[index] = [tuple(item) for item in ranked]
+
+        if header is None:
+            return None
+        return header, done, matches
+
+    def start(self, key, header, snapshot=None, params=None):
+        """
+        Start a new checkpoint, replacing an old one of the same client list.
+
+        Parameters:
+        key - clients_key of the client list
+        header - Run identity
+        snapshot - Optional SanctionsSnapshot of the run, kept with the checkpoint
+        params - snapshot_params() the snapshot was built with, used when it has no store file
+
+        Returns:
+        CheckpointWriter, None if the checkpoint cannot be written
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self.remove(key)
+            if snapshot is not None:
+                self.keep_snapshot(key, snapshot, params)
+            header = dict(header, key=key, created_at=datetime.now().isoformat(timespec='seconds'))
+            return CheckpointWriter(self.path(key), header)
+        except OSError as e:
+            print(f"Error writing checkpoint: {e}")
+            return None
+
+    def keep_snapshot(self, key, snapshot, params):
+        """
+        Keep the snapshot of a run next to its checkpoint: a hard link to its
+        store file (a copy where links are not possible), or a new stored
+        snapshot file when it was not stored.
+        """
+        snapshot_path = self.snapshot_path(key)
+        try:
+            if snapshot.store_file and os.path.exists(snapshot.store_file):
+                try:
+                    os.link(snapshot.store_file, snapshot_path)
+                except OSError:
+                    shutil.copyfile(snapshot.store_file, snapshot_path)
+            else:
+                save_snapshot_file(snapshot, snapshot_path, params)
+        except Exception as e:
+            print(f"Error keeping the sanctions snapshot of the checkpoint: {e}")
+
+    def load_snapshot(self, key, source_file=None):
+        """
+        Snapshot kept with a checkpoint.
+
+        Returns:
+        SanctionsSnapshot, None when none was kept or it cannot be read
+        """
+        snapshot_path = self.snapshot_path(key)
+        if not os.path.exists(snapshot_path):
+            return None
+        try:
+            snapshot = load_snapshot_file(snapshot_path, source_file=source_file)
+        except Exception as e:
+            print(f"Error reading the sanctions snapshot of the checkpoint: {e}")
+            return None
+        snapshot.store_file = snapshot_path
+        return snapshot
+
+    def resume(self, key):
+        """Writer that appends to an existing checkpoint, None on error"""
+        try:
+            # drop a line cut off by a crash, new chunks start on a fresh line
+            file_path = self.path(key)
+            with open(file_path, 'rb+') as f:
+                data = f.read()
+                f.truncate(data.rfind(b'\n') + 1)
+            return CheckpointWriter(file_path)
+        except OSError as e:
+            print(f"Error writing checkpoint: {e}")
+            return None
+
+    def remove(self, key):
+        """Remove a checkpoint with its kept snapshot"""
+        for file_path in (self.path(key), self.snapshot_path(key)):
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
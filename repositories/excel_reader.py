@@ -0,0 +1,139 @@
+from operator import itemgetter
+import numpy as np
+import pandas as pd
+from config import AppConfig
+
+
+def available_excel_engine(file_path):
+    """
+    Fastest installed reader for an Excel file.
+
+    Parameters:
+    file_path - .xlsx or .xls file
+
+    Returns:
+    'calamine', 'openpyxl' or 'pandas' (pd.read_excel, e.g. for .xls)
+    """
+    if AppConfig.EXCEL_ENGINE:
+        return AppConfig.EXCEL_ENGINE
+    try:
+        import python_calamine  # noqa: F401
+        return 'calamine'
+    except ImportError:
+        pass
+    if file_path.lower().endswith('.xlsx'):
+        try:
+            import openpyxl  # noqa: F401
+            return 'openpyxl'
+        except ImportError:
+            pass
+    return 'pandas'
+
+
+def calamine_sheets(file_path):
+    """(sheet name, rows) of every sheet, parsed by the Rust calamine reader"""
+    from python_calamine import CalamineWorkbook
+
+    workbook = CalamineWorkbook.from_path(file_path)
+    for sheet_name in workbook.sheet_names:
+        yield sheet_name, iter(workbook.get_sheet_by_name(sheet_name).to_python())
+
+
+def openpyxl_sheets(file_path):
+    """(sheet name, rows) of every sheet, streamed by openpyxl in read-only mode"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for worksheet in workbook.worksheets:
+            yield worksheet.title, worksheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def pandas_sheets(file_path):
+    """(sheet name, rows) of every sheet read with pd.read_excel"""
+    for sheet_name, df in pd.read_excel(file_path, sheet_name=None, header=None, dtype=object).items():
+        yield sheet_name, df.itertuples(index=False, name=None)
+
+
+EXCEL_ENGINES = {
+    'calamine': calamine_sheets,
+    'openpyxl': openpyxl_sheets,
+    'pandas': pandas_sheets,
+}
+
+
+def is_empty(value):
+    """None, '' or NaN"""
+    return value is None or value == '' or (isinstance(value, float) and value != value)
+
+
+def whole_number(value):
+    """Whole float cells as int (Excel stores every number as float), as with pd.read_excel"""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def read_excel_columns(file_path, columns, sheets=None, report=None):
+    """
+    Read only the given columns of an Excel file. Rows of every sheet that has
+    all columns in its header row are concatenated, other sheets are skipped.
+
+    Parameters:
+    file_path - .xlsx or .xls file
+    columns - Column names to read
+    sheets - Sheet names to read, None for every sheet
+    report - Optional RunReport for counters
+
+    Returns:
+    (DataFrame with the columns, list of missing columns) - the columns missing
+    in every sheet when no sheet could be read
+    """
+    engine = available_excel_engine(file_path)
+    if report is not None:
+        report.increment(f'excel_engine_{engine}')
+
+    frames = []
+    missing_columns = None
+    for sheet_name, rows in EXCEL_ENGINES[engine](file_path):
+        if sheets is not None and sheet_name not in sheets:
+            continue
+
+        # header is the first non-empty row
+        header = next((row for row in rows if not all(is_empty(cell) for cell in row)), None)
+        if header is None:
+            continue
+        positions = {str(cell).strip(): position for position, cell in enumerate(header) if not is_empty(cell)}
+        missing = [column for column in columns if column not in positions]
+        if missing:
+            if report is not None:
+                report.increment('excel_sheets_skipped')
+            if missing_columns is None or len(missing) < len(missing_columns):
+                missing_columns = missing
+            continue
+
+        # only the wanted cells of each row are kept
+        indexes = [positions[column] for column in columns]
+        getter = itemgetter(*indexes) if len(indexes) > 1 else lambda row: (row[indexes[0]],)
+        selected = []
+        for row in rows:
+            try:
+                selected.append(getter(row))
+            except IndexError:
+                selected.append(tuple(row[index] if index < len(row) else None for index in indexes))
+        frames.append(pd.DataFrame(selected, columns=columns, dtype=object))
+        missing_columns = []
+        if report is not None:
+            report.increment('excel_sheets_read')
+
+    if not frames:
+        return pd.DataFrame(columns=columns), missing_columns or []
+
+    df = pd.concat(frames, ignore_index=True).replace('', np.nan)
+    df = df[df.notna().any(axis=1)].reset_index(drop=True)
+    for column in columns:
+        if any(isinstance(value, float) for value in df[column].tolist()):
+            df[column] = df[column].map(whole_number)
+    return df, []
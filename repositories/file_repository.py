@@ -1,6 +1,24 @@
 import os
+import itertools
 import pandas as pd
 from models.person import Person
+from utils import RunReport
+from utils.memory import MemoryBudget
+from config import AppConfig
+from repositories.excel_reader import read_excel_columns
+from repositories.spill_store import SpilledPeople
+
+# digits of an OIB
+OIB_LENGTH = 11
+
+def oib_text(value):
+    """
+    OIB as text. A numeric Excel cell has lost its leading zeros, they are
+    restored by padding to OIB_LENGTH digits.
+    """
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+        return str(value).zfill(OIB_LENGTH)
+    return value
 
 def split_name_column(full_name):
     """
@@ -14,47 +32,124 @@ def split_name_column(full_name):
 
 class FileRepository:
 
-    def load_people_from_file(self, file_path):
+    REQUIRED_COLUMNS = ['IME', 'OIB', 'ADRESA']
+
+    def load_client_table(self, file_path, report=None):
         """
-        Load people from a csv or excel file.
+        Read the client columns of a csv or excel file.
         
         Parameters:
         file_path - Path to the file
+        report - Optional RunReport for timings and counters
         
         Returns:
-        (people, message) - List of Person objects and status message
+        (DataFrame with IME, OIB, ADRESA, None) or (None, error message)
         """
-        try:
-            file_ext = os.path.splitext(file_path)[1].lower()
+        report = report if report is not None else RunReport()
+        file_ext = os.path.splitext(file_path)[1].lower()
+        required_columns = self.REQUIRED_COLUMNS
 
+        # only the client columns are read
+        with report.stage('client_file_parse'):
             if file_ext == '.csv':
-                df = pd.read_csv(file_path, delimiter=',')
+                # OIB is text, numeric parsing would drop leading zeros
+                df = pd.read_csv(file_path, delimiter=',', usecols=lambda column: column in required_columns,
+                                 dtype={'OIB': str})
+                missing_columns = [col for col in required_columns if col not in df.columns]
             elif file_ext in ['.xlsx', '.xls']:
-                df = pd.read_excel(file_path)
+                df, missing_columns = read_excel_columns(
+                    file_path, required_columns, AppConfig.EXCEL_SHEETS, report=report
+                )
+                if 'OIB' in df.columns:
+                    df['OIB'] = df['OIB'].map(oib_text)
             else:
                 return None, f"Unsupported file format: {file_ext}. Use CSV or Excel."
 
-            required_columns = ['IME', 'OIB', 'ADRESA']
-            missing_columns = [col for col in required_columns if col not in df.columns]
-
-            if missing_columns:
-                return None, f"Missing columns: {', '.join(missing_columns)}"
+        if missing_columns:
+            return None, f"Missing columns: {', '.join(missing_columns)}"
+        return df, None
 
-            people = []
-            skipped_records = 0
+    def load_client_tables(self, file_path, report=None):
+        """
+        Read the client columns in DataFrames of AppConfig.CLIENT_READ_CHUNK_SIZE
+        rows, a csv file is never held in memory as a whole.
+        
+        Parameters:
+        file_path - Path to the file
+        report - Optional RunReport for timings and counters
+        
+        Returns:
+        (iterator of DataFrames, None) or (None, error message)
+        """
+        report = report if report is not None else RunReport()
+        if os.path.splitext(file_path)[1].lower() != '.csv':
+            # Excel readers load the whole sheet anyway
+            df, error = self.load_client_table(file_path, report)
+            return (iter([df]), None) if df is not None else (None, error)
+        
+        required_columns = self.REQUIRED_COLUMNS
+        with report.stage('client_file_parse'):
+            reader = pd.read_csv(file_path, delimiter=',', usecols=lambda column: column in required_columns,
+                                 dtype={'OIB': str}, chunksize=AppConfig.CLIENT_READ_CHUNK_SIZE)
+            first = next(reader, None)
+        if first is None:
+            return iter([]), None
+        missing_columns = [col for col in required_columns if col not in first.columns]
+        if missing_columns:
+            return None, f"Missing columns: {', '.join(missing_columns)}"
+        return itertools.chain([first], reader), None
+    
+    def people_from_table(self, df):
+        """
+        Person objects of the rows of a client table.
+        
+        Returns:
+        (list of Person, number of skipped records)
+        """
+        people = []
+        skipped_records = 0
+        for full_name, oib, address in zip(df['IME'].tolist(), df['OIB'].tolist(), df['ADRESA'].tolist()):
+            try:
+                raw_full_name = str(full_name).strip()
+                surname, name = split_name_column(raw_full_name)
+                oib = str(oib).strip()
+                address = str(address).strip()
+                
+                person = Person(name=name, surname=surname, oib=oib, address=address)
+                people.append(person)
+            except Exception as e:
+                skipped_records += 1
+                print(f"Skipping invalid record {(full_name, oib, address)}. Error: {e}")
+        return people, skipped_records
+    
+    def load_people_from_file(self, file_path, report=None):
+        """
+        Load people from a csv or excel file.
+        
+        Parameters:
+        file_path - Path to the file
+        report - Optional RunReport for timings and counters
+        
+        Returns:
+        (people, message) - List of Person objects and status message; a SpilledPeople
+        when AppConfig.MEMORY_BUDGET_MB is set
+        """
+        report = report if report is not None else RunReport()
+        try:
+            budget = MemoryBudget.from_config()
+            if budget is not None:
+                return self.load_people_spilled(file_path, budget, report)
+            
+            df, error = self.load_client_table(file_path, report)
+            if df is None:
+                return None, error
 
-            for _, row in df.iterrows():
-                try:
-                    raw_full_name = str(row['IME']).strip()
-                    surname, name = split_name_column(raw_full_name)
-                    oib = str(row['OIB']).strip()
-                    address = str(row['ADRESA']).strip()
+            with report.stage('client_build'):
+                people, skipped_records = self.people_from_table(df)
 
-                    person = Person(name=name, surname=surname, oib=oib, address=address)
-                    people.append(person)
-                except Exception as e:
-                    skipped_records += 1
-                    print(f"Skipping invalid record {row.to_dict()}. Error: {e}")
+            report.increment('client_rows_scanned', len(df))
+            report.increment('clients_loaded', len(people))
+            report.increment('clients_skipped', skipped_records)
 
             message = f"Loaded {len(people)} people."
             if skipped_records > 0:
@@ -63,4 +158,35 @@ class FileRepository:
             return people, message
 
         except Exception as e:
-            return None, f"Error loading file: {str(e)}"
\ No newline at end of file
+            return None, f"Error loading file: {str(e)}"
+
+    def load_people_spilled(self, file_path, budget, report):
+        """
+        Load people chunk by chunk into a SpilledPeople, chunks go to disk once
+        the process is over the memory budget.
+        
+        Returns:
+        (people, message) as load_people_from_file
+        """
+        tables, error = self.load_client_tables(file_path, report)
+        if tables is None:
+            return None, error
+        
+        people = SpilledPeople(budget, report=report)
+        rows = 0
+        skipped_records = 0
+        for df in tables:
+            with report.stage('client_build'):
+                chunk, skipped = self.people_from_table(df)
+                people.extend(chunk)
+            rows += len(df)
+            skipped_records += skipped
+        
+        report.increment('client_rows_scanned', rows)
+        report.increment('clients_loaded', len(people))
+        report.increment('clients_skipped', skipped_records)
+        
+        message = f"Loaded {len(people)} people."
+        if skipped_records > 0:
+            message += f" Skipped {skipped_records} invalid records."
+        return people, message
@@ -0,0 +1,326 @@
+import os
+import json
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from config import AppConfig
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    snapshot_version TEXT,
+    generation_date TEXT,
+    sources TEXT,
+    engine TEXT,
+    clients INTEGER,
+    clients_screened INTEGER NOT NULL DEFAULT 0,
+    matches INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS verdicts (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    oib TEXT,
+    name TEXT,
+    surname TEXT,
+    matched INTEGER NOT NULL,
+    best_score REAL
+);
+CREATE TABLE IF NOT EXISTS matches (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    oib TEXT,
+    entity_id TEXT,
+    whole_name TEXT,
+    surname_score REAL,
+    name_score REAL,
+    score REAL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started_at ON runs(started_at);
+CREATE INDEX IF NOT EXISTS idx_verdicts_oib ON verdicts(oib, run_id);
+CREATE INDEX IF NOT EXISTS idx_verdicts_run_id ON verdicts(run_id, matched);
+CREATE INDEX IF NOT EXISTS idx_matches_oib ON matches(oib, run_id);
+CREATE INDEX IF NOT EXISTS idx_matches_entity_id ON matches(entity_id, run_id);
+"""
+
+
+def default_history_path():
+    """AppConfig.HISTORY_DB_PATH, or the history file in the user's home directory"""
+    if AppConfig.HISTORY_DB_PATH is not None:
+        return AppConfig.HISTORY_DB_PATH
+    return os.path.join(os.path.expanduser('~'), '.sanctions_check', 'history.sqlite3')
+
+
+def text(value):
+    """Column value as text, None stays None"""
+    return None if value is None else str(value)
+
+
+class HistoryRecorder:
+    """
+    Records the verdicts of one screening run. Rows are buffered and
+    inserted with executemany, one transaction per AppConfig.HISTORY_BATCH_SIZE
+    clients. A database error never stops the screening: it is printed and
+    the history is disabled for the rest of the run. The recorder must be
+    used from the thread that created it.
+    """
+
+    def __init__(self, connection, run_id):
+        """
+        Parameters:
+        connection - Open sqlite3 connection, owned by the recorder
+        run_id - Row id of the run in the runs table
+        """
+        self.connection = connection
+        self.run_id = run_id
+        self.clients_screened = 0
+        # set after a database error, nothing more is recorded for the run
+        self.disabled = False
+        self._verdicts = []
+        self._matches = []
+
+    def record_person(self, person, matched):
+        """
+        Buffer the verdict of one client.
+
+        Parameters:
+        person - Screened client (Person), person.matches is stored when matched
+        matched - Whether the client matched in this run
+        """
+        if self.disabled:
+            return
+        oib = text(person.oib)
+        matches = person.matches if matched else []
+        best_score = max((score for _, _, _, _, score in matches), default=None)
+        self._verdicts.append((self.run_id, oib, person.name, person.surname, int(matched), best_score))
+        self._matches.extend(
+            (self.run_id, oib, text(entity_id), whole_name, surname_score, name_score, score)
+            for entity_id, whole_name, surname_score, name_score, score in matches
+        )
+        self.clients_screened += 1
+
+        if len(self._verdicts) >= AppConfig.HISTORY_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Insert the buffered rows in one transaction"""
+        if self.disabled or not self._verdicts:
+            return
+        try:
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT INTO verdicts (run_id, oib, name, surname, matched, best_score) VALUES (?, ?, ?, ?, ?, ?)",
+                    self._verdicts
+                )
+                self.connection.executemany(
+                    "INSERT INTO matches (run_id, oib, entity_id, whole_name, surname_score, name_score, score) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    self._matches
+                )
+        except sqlite3.Error as e:
+            self._disable(e)
+        self._verdicts = []
+        self._matches = []
+
+    def _disable(self, error):
+        print(f"Error recording screening history: {error}")
+        print("Screening history is disabled for the rest of this run")
+        self.disabled = True
+
+    def finish(self, match_count):
+        """
+        Write the remaining rows and close the run.
+
+        Parameters:
+        match_count - Number of matched clients
+        """
+        self.flush()
+        if not self.disabled:
+            try:
+                with self.connection:
+                    self.connection.execute(
+                        "UPDATE runs SET finished_at = ?, clients_screened = ?, matches = ? WHERE run_id = ?",
+                        (datetime.now().isoformat(timespec='seconds'), self.clients_screened, match_count,
+                         self.run_id)
+                    )
+            except sqlite3.Error as e:
+                self._disable(e)
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+
+class ScreeningHistoryRepository:
+    """
+    Screening history in an embedded SQLite database: every run with the
+    sanctions snapshot version it used, the verdict of every screened client
+    and the aliases of every match. Lookups by OIB, entity id and run date
+    go through indexes.
+    """
+
+    def __init__(self, db_path=None):
+        """
+        Parameters:
+        db_path - SQLite file, default_history_path() when None
+        """
+        self.db_path = db_path or default_history_path()
+        directory = os.path.dirname(os.path.abspath(self.db_path))
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        # readers do not block the writer of a running screening
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def start_run(self, snapshot, engine=None, clients=None):
+        """
+        Register a new run.
+
+        Parameters:
+        snapshot - SanctionsSnapshot the clients are screened against
+        engine - Name of the matching engine
+        clients - Number of clients in the run
+
+        Returns:
+        HistoryRecorder for the run, None if the database could not be written
+        """
+        try:
+            connection = self._connect()
+            with connection:
+                cursor = connection.execute(
+                    "INSERT INTO runs (started_at, snapshot_version, generation_date, sources, engine, clients) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (datetime.now().isoformat(timespec='seconds'), snapshot.version,
+                     text(snapshot.generation_date), json.dumps(snapshot.sources, default=str), engine, clients)
+                )
+            return HistoryRecorder(connection, cursor.lastrowid)
+        except sqlite3.Error as e:
+            print(f"Error recording screening history: {e}")
+            return None
+
+    def _query(self, sql, parameters=()):
+        with closing(self._connect()) as connection:
+            return [dict(row) for row in connection.execute(sql, parameters)]
+
+    def runs(self, since=None, until=None, limit=100):
+        """
+        Runs, newest first.
+
+        Parameters:
+        since - Optional ISO date/time, runs started at or after it
+        until - Optional ISO date/time, runs started before it
+        limit - Maximum number of runs, None for all
+
+        Returns:
+        list of run dicts
+        """
+        conditions = []
+        parameters = []
+        if since:
+            conditions.append("started_at >= ?")
+            parameters.append(since)
+        if until:
+            conditions.append("started_at < ?")
+            parameters.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        parameters.append(-1 if limit is None else limit)
+        runs = self._query(f"SELECT * FROM runs {where} ORDER BY started_at DESC, run_id DESC LIMIT ?", parameters)
+        for run in runs:
+            run['sources'] = json.loads(run['sources']) if run['sources'] else {}
+        return runs
+
+    def client_history(self, oib, matched_only=False):
+        """
+        Every verdict of a client, newest run first, with the snapshot version
+        and the matched aliases.
+
+        Parameters:
+        oib - Client OIB
+        matched_only - Only runs in which the client matched
+
+        Returns:
+        list of dicts (run_id, started_at, snapshot_version, generation_date, matched, best_score, matches)
+        """
+        oib = text(oib)
+        verdicts = self._query(
+            "SELECT v.run_id, r.started_at, r.snapshot_version, r.generation_date, v.name, v.surname, "
+            "v.matched, v.best_score FROM verdicts v JOIN runs r ON r.run_id = v.run_id "
+            f"WHERE v.oib = ? {'AND v.matched = 1' if matched_only else ''} "
+            "ORDER BY r.started_at DESC, v.run_id DESC",
+            (oib,)
+        )
+        matches = {}
+        for row in self._query(
+            "SELECT run_id, entity_id, whole_name, surname_score, name_score, score FROM matches WHERE oib = ?",
+            (oib,)
+        ):
+            matches.setdefault(row.pop('run_id'), []).append(row)
+        for verdict in verdicts:
+            verdict['matched'] = bool(verdict['matched'])
+            verdict['matches'] = matches.get(verdict['run_id'], [])
+        return verdicts
+
+    def was_flagged(self, oib):
+        """Whether the client matched in any recorded run"""
+        rows = self._query("SELECT 1 FROM verdicts WHERE oib = ? AND matched = 1 LIMIT 1", (text(oib),))
+        return bool(rows)
+
+    def entity_history(self, entity_id):
+        """
+        Clients matched against a sanctioned entity, newest run first.
+
+        Parameters:
+        entity_id - Entity id (e.g. an EU logical id or 'OFAC-1234')
+
+        Returns:
+        list of dicts (run_id, started_at, snapshot_version, oib, whole_name, score)
+        """
+        return self._query(
+            "SELECT m.run_id, r.started_at, r.snapshot_version, m.oib, m.whole_name, m.surname_score, "
+            "m.name_score, m.score FROM matches m JOIN runs r ON r.run_id = m.run_id "
+            "WHERE m.entity_id = ? ORDER BY r.started_at DESC, m.run_id DESC",
+            (text(entity_id),)
+        )
+
+    def run_verdicts(self, run_id, matched_only=True):
+        """
+        Verdicts of one run.
+
+        Parameters:
+        run_id - Run id
+        matched_only - Only matched clients
+
+        Returns:
+        list of verdict dicts
+        """
+        return self._query(
+            "SELECT oib, name, surname, matched, best_score FROM verdicts "
+            f"WHERE run_id = ? {'AND matched = 1' if matched_only else ''}",
+            (run_id,)
+        )
+
+
+def create_history_repository(db_path=None):
+    """
+    Open the screening history.
+
+    Parameters:
+    db_path - SQLite file, default_history_path() when None
+
+    Returns:
+    ScreeningHistoryRepository, None when the history is disabled
+    (AppConfig.HISTORY_DB_PATH = '') or the database cannot be opened
+    """
+    db_path = db_path or default_history_path()
+    if not db_path:
+        return None
+    try:
+        return ScreeningHistoryRepository(db_path)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Error opening screening history {db_path}: {e}")
+        return None
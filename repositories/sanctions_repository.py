@@ -1,93 +1,314 @@
+import os
+import time
+import hashlib
+import numpy as np
 import pandas as pd
 import requests
 from typing import Any
 import tempfile
-import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from rapidfuzz import fuzz
-from utils import is_latin
+from utils import script_mask, normalize_name, transliterate_series, RunReport
+from utils.name_indexes import (ExactNameIndex, WholeNameTokenIndex, FirstNamePrefixIndex,
+                                ComponentNameIndex, TokenFrequencyStats, TopCandidates, long_tokens)
+from utils.ngram_index import NgramVectorIndex
+from repositories.sanctions_sources import ALIAS_COLUMNS, create_sanctions_source
+from repositories.snapshot_store import (snapshot_file_path, save_snapshot_file, load_snapshot_file,
+                                         prune_snapshot_files)
+from models.sanctions_snapshot import SanctionsSnapshot
 from config import AppConfig
 
+
+def file_version(filename):
+    """Short content hash of a sanctions file, identifies the list version"""
+    digest = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
 class SanctionsRepository:
     """Repository for data operations"""
     
     def __init__(self):
         
-        self.sanctions_url = AppConfig.SANCTIONS_API_URL
+        # snapshot of the last processed file: (cache key, SanctionsSnapshot)
+        self._snapshot = None
+        # n-gram vector index of the last snapshot it was asked for: (snapshot, NgramVectorIndex)
+        self._ngram_index = None
+        # lists whose file could not be parsed by the last load_snapshot
+        self.failed_sources = []
     
-    def download_sanctions_data(self):
+    def download_sanctions_data(self, report=None):
         """
-        Download sanctions data with API.
+        Download the configured sanctions lists (AppConfig.SANCTIONS_SOURCES) in parallel.
+        
+        Parameters:
+        report - Optional RunReport for timings
         
         Returns:
-        str - Path to the downloaded file, or None if download failed
+        (dict source name -> path of the downloaded file or None if every download failed,
+         list of the sources that could not be downloaded)
         """
+        report = report if report is not None else RunReport()
+        sources = [
+            source for source in (
+                create_sanctions_source(name, AppConfig.SANCTIONS_SOURCE_URLS.get(name))
+                for name in AppConfig.SANCTIONS_SOURCES
+            ) if source is not None
+        ]
+        failed = [name for name in AppConfig.SANCTIONS_SOURCES if name not in {source.name for source in sources}]
+        if not sources:
+            return None, failed
+
+        with report.stage('download'):
+            with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+                paths = list(executor.map(lambda source: self._download_source(source, report), sources))
+
+        downloaded = {source.name: path for source, path in zip(sources, paths) if path}
+        failed += [source.name for source, path in zip(sources, paths) if not path]
+        return downloaded or None, failed
+
+    def _download_source(self, source, report):
+        """Download one list into a temp file, None on failure"""
         try:
-            response = requests.get(self.sanctions_url)
+            response = requests.get(source.url)
+            report.increment('download_bytes', len(response.content))
             
             if response.status_code == 200:
-                temp_file = tempfile.NamedTemporaryFile(suffix='.csv', delete=False)
+                temp_file = tempfile.NamedTemporaryFile(suffix=source.file_suffix, delete=False)
                 temp_file.write(response.content)
                 temp_file_path = temp_file.name
                 temp_file.close()
-                print(f"Downloaded and saved to temp file: {temp_file_path}")
+                print(f"Downloaded {source.name} list and saved to temp file: {temp_file_path}")
                 return temp_file_path
             else:
-                print(f"Error downloading CSV: HTTP {response.status_code}")
+                print(f"Error downloading {source.name} list: HTTP {response.status_code}")
                 return None
         except Exception as e:
-            print(f"Error during download: {e}")
+            print(f"Error during download of {source.name} list: {e}")
             return None
     
-    def process_sanctions_data(self, filename: str) -> pd.DataFrame:
+    def process_sanctions_data(self, filename: Any, report: Any = None) -> pd.DataFrame:
         """
         Save downloaded file
 
         Parameters:
-        filename - Path to the sanctions data file
+        filename - Path to the EU sanctions file, or dict source name -> path
+        report - Optional RunReport for timings and counters
         
         Returns:
         DataFrame with processed name data
         """
+        snapshot = self.load_snapshot(filename, report)
+        if snapshot is None:
+            return None
+        return snapshot.aliases
 
-        try:
-            # read the file
-            df = pd.read_csv(filename, sep=";", low_memory=False)
+    def load_snapshot(self, filename: Any, report: Any = None) -> SanctionsSnapshot:
+        """
+        Prepare sanctions data of one or more lists and their lookup indexes.
 
-            # filtering by PEOPLE
-            persons_df = df[df['Entity_SubjectType'] == 'P']
+        Every list is parsed by its source adapter (in parallel) into one
+        alias table tagged with the source, so one index covers all lists.
+        The snapshot of the last files is kept and reused while the files, the
+        retained and transliterated scripts and the thresholds are unchanged.
+        Prepared snapshots are also stored in AppConfig.SNAPSHOT_STORE_DIR and
+        memory-mapped by later runs and other processes with the same lists.
 
-            name_columns = ['Entity_LogicalId', 'NameAlias_LastName', 'NameAlias_FirstName', 
-                            'NameAlias_MiddleName', 'NameAlias_WholeName']
-            
-            existing_columns = [col for col in name_columns if col in persons_df.columns]
-            
-            # check for WholeName column
-            if 'NameAlias_WholeName' not in existing_columns:
-                print("Error: NameAlias_WholeName column not found in the data")
+        Parameters:
+        filename - Path to the EU sanctions file, or dict source name -> path
+        report - Optional RunReport for timings and counters
+        
+        Returns:
+        SanctionsSnapshot, or None if the files could not be processed; a list that
+        cannot be parsed is left out (snapshot.missing_sources) only when
+        AppConfig.REQUIRE_ALL_SANCTIONS_SOURCES is off, failed_sources names it
+        """
+
+        report = report if report is not None else RunReport()
+        self.failed_sources = []
+        try:
+            files = filename if isinstance(filename, dict) else {'eu': filename}
+            file_keys = []
+            for name, path in sorted(files.items()):
+                file_stat = os.stat(path)
+                file_keys.append((name, os.path.abspath(path), file_stat.st_mtime_ns, file_stat.st_size))
+            cache_key = (tuple(file_keys),
+                         tuple(AppConfig.RETAINED_SCRIPTS), tuple(AppConfig.TRANSLITERATED_SCRIPTS),
+                         AppConfig.SURNAME_THRESHOLD,
+                         AppConfig.NAME_THRESHOLD, AppConfig.TOKEN_SIMILARITY, AppConfig.MIN_TOKEN_LENGTH)
+            if self._snapshot is not None and self._snapshot[0] == cache_key:
+                report.increment('snapshot_cache_hits')
+                return self._snapshot[1]
+            report.increment('snapshot_cache_misses')
+
+            sources = {name: create_sanctions_source(name, AppConfig.SANCTIONS_SOURCE_URLS.get(name))
+                       for name in files}
+            if None in sources.values():
                 return None
-                
-            selected_df = persons_df[existing_columns]
+
+            with report.stage('file_version'):
+                versions = {name: file_version(path) for name, path in files.items()}
+
+            # a stored snapshot of the same list versions and settings is mapped instead of rebuilt
+            store_path = self.snapshot_store_path(versions)
+            if store_path and os.path.exists(store_path):
+                try:
+                    with report.stage('snapshot_map'):
+                        snapshot = load_snapshot_file(store_path, source_file=filename)
+                    snapshot.store_file = store_path
+                    report.increment('snapshot_store_hits')
+                    self._snapshot = (cache_key, snapshot)
+                    return snapshot
+                except Exception as e:
+                    print(f"Error reading stored sanctions index {store_path}: {e}")
+
+            def parse(name):
+                try:
+                    return (versions[name],) + sources[name].parse(files[name])
+                except Exception as e:
+                    print(f"Error parsing {name} sanctions list {files[name]}: {e}")
+                    return None
+
+            # read the files, one thread per list
+            with report.stage('sanctions_parse'):
+                with ThreadPoolExecutor(max_workers=len(files)) as executor:
+                    parsed = dict(zip(files, executor.map(parse, files)))
+
+            # one broken list must neither cancel the others nor be skipped silently
+            failed_sources = sorted(name for name, result in parsed.items() if result is None)
+            if failed_sources:
+                self.failed_sources = failed_sources
+                report.increment('sanctions_sources_failed', len(failed_sources))
+                if AppConfig.REQUIRE_ALL_SANCTIONS_SOURCES or len(failed_sources) == len(parsed):
+                    return None
+                print(f"Warning: screening without the {', '.join(failed_sources)} sanctions lists")
+                parsed = {name: result for name, result in parsed.items() if result is not None}
+
+            source_info = {}
+            for name, (version, aliases, generation_date, scanned) in parsed.items():
+                report.increment('sanctions_rows_scanned', scanned)
+                report.increment(f'aliases_{name}', len(aliases))
+                source_info[name] = {'file': files[name], 'version': version,
+                                     'generation_date': generation_date, 'aliases': len(aliases)}
+
+            # a single list keeps its own file version, several lists get a combined one
+            if len(parsed) == 1:
+                version = next(iter(source_info.values()))['version']
+            else:
+                version = hashlib.sha1(",".join(
+                    f"{name}:{info['version']}" for name, info in sorted(source_info.items())
+                ).encode()).hexdigest()[:12]
+            generation_date = (source_info.get('eu') or next(iter(source_info.values())))['generation_date']
+
+            persons_df = pd.concat([aliases for _, aliases, _, _ in parsed.values()], ignore_index=True)
+            existing_columns = [column for column in ALIAS_COLUMNS if column != 'Source']
+            selected_df = persons_df
             
-            # filter out rows where WholeName is not valid
-            selected_df = selected_df[ 
-                selected_df['NameAlias_WholeName'].apply(is_latin)
-            ]
-            # remove duplicates
-            selected_df = selected_df.drop_duplicates()
+            # filter out rows where WholeName is not written in a retained script,
+            # names in a transliterated script get their Latin spelling once here
+            with report.stage('latin_filter'):
+                retained = script_mask(selected_df['NameAlias_WholeName'], AppConfig.RETAINED_SCRIPTS)
+                transliterated = ~retained & script_mask(
+                    selected_df['NameAlias_WholeName'],
+                    tuple(AppConfig.RETAINED_SCRIPTS) + tuple(AppConfig.TRANSLITERATED_SCRIPTS)
+                )
+            with report.stage('transliteration'):
+                transliterated_df = selected_df[transliterated].copy()
+                for column in existing_columns[1:]:
+                    transliterated_df[column] = transliterate_series(
+                        transliterated_df[column], AppConfig.TRANSLITERATED_SCRIPTS
+                    )
+                selected_df = pd.concat([selected_df[retained], transliterated_df])
+            report.increment('aliases_transliterated', len(transliterated_df))
+            report.increment('aliases_dropped_non_latin', len(persons_df) - len(selected_df))
+            # remove duplicates (also transliterations equal to a Latin alias),
+            # positions double as labels for the indexes
+            selected_df = selected_df.drop_duplicates().reset_index(drop=True)
+            report.increment('aliases_kept', len(selected_df))
             
             # check if there are any results
             if selected_df.empty:
                 print("No valid names found in the data set")
                 return None
 
-            return selected_df
+            with report.stage('index_build'):
+                exact_index = ExactNameIndex.build(selected_df, AppConfig.MIN_TOKEN_LENGTH)
+                token_index = WholeNameTokenIndex.build(
+                    selected_df, AppConfig.TOKEN_SIMILARITY, AppConfig.MIN_TOKEN_LENGTH
+                )
+                prefix_index = FirstNamePrefixIndex.build(selected_df, AppConfig.MIN_TOKEN_LENGTH)
+                component_index = ComponentNameIndex.build(
+                    selected_df, AppConfig.SURNAME_THRESHOLD, AppConfig.NAME_THRESHOLD
+                )
+                token_stats = TokenFrequencyStats.build(selected_df)
+
+            snapshot = SanctionsSnapshot(
+                aliases=selected_df,
+                version=version,
+                generation_date=generation_date,
+                source_file=filename,
+                exact_index=exact_index,
+                token_index=token_index,
+                prefix_index=prefix_index,
+                component_index=component_index,
+                token_stats=token_stats,
+                sources=source_info,
+                missing_sources=failed_sources
+            )
+            self._snapshot = (cache_key, snapshot)
+
+            # an incomplete snapshot is not stored, later runs parse the lists again
+            if store_path and not failed_sources:
+                try:
+                    with report.stage('snapshot_store'):
+                        save_snapshot_file(snapshot, store_path, self.snapshot_params())
+                        snapshot.store_file = store_path
+                        prune_snapshot_files(os.path.dirname(store_path), AppConfig.SNAPSHOT_STORE_KEEP)
+                except Exception as e:
+                    print(f"Error storing sanctions index {store_path}: {e}")
+            return snapshot
             
         except Exception as e:
             print(f"Error processing sanctions data: {e}")
              
             return None
     
-    def find_person_by_name(self, person_names_df: Any, person_name: str, person_surname: str) -> Any:
+    @staticmethod
+    def snapshot_params():
+        """Index parameters a stored snapshot is built with"""
+        return {
+            'min_token_length': AppConfig.MIN_TOKEN_LENGTH,
+            'token_similarity': AppConfig.TOKEN_SIMILARITY,
+            'surname_threshold': AppConfig.SURNAME_THRESHOLD,
+            'name_threshold': AppConfig.NAME_THRESHOLD,
+        }
+
+    def snapshot_store_path(self, versions):
+        """
+        Stored snapshot file for the given list versions and the current settings.
+
+        Parameters:
+        versions - dict source name -> file version
+
+        Returns:
+        str path, None when the store is disabled
+        """
+        directory = AppConfig.SNAPSHOT_STORE_DIR
+        if directory is None:
+            directory = os.path.join(tempfile.gettempdir(), 'sanctions_index')
+        if not directory:
+            return None
+
+        key = repr((sorted(versions.items()), tuple(AppConfig.RETAINED_SCRIPTS),
+                    tuple(AppConfig.TRANSLITERATED_SCRIPTS), sorted(self.snapshot_params().items())))
+        return snapshot_file_path(directory, hashlib.sha1(key.encode()).hexdigest()[:16])
+
+    def find_person_by_name(self, person_names_df: Any, person_name: str, person_surname: str,
+                            report: Any = None, token_index: Any = None,
+                            prefix_index: Any = None) -> Any:
         """
         This functionsearches for matches in the sanctions data using the following approach:
         1. First tries to match individual name components (first name, surname)
@@ -97,23 +318,35 @@ class SanctionsRepository:
         person_names_df - DataFrame containing sanctions data with name components
         person_name - First name of the person to search for
         person_surname - Surname of the person to search for
+        report - Optional RunReport, receives normalization time and scoring counters
+        token_index - Optional WholeNameTokenIndex built from person_names_df, replaces
+                      the per-row WholeName token loop with index lookups
+        prefix_index - Optional FirstNamePrefixIndex built from person_names_df, replaces
+                       the per-row first name prefix checks with one lookup per client
         
         Returns:
         DataFrame containing matching records
         """
+        scoring_start = time.perf_counter()
+        # local counters, added to the report once per call
+        stats = {'normalize_seconds': 0.0, 'rapidfuzz_calls': 0, 'prefix_hits': 0}
+        timed = report is not None
 
-        SURNAME_THRESHOLD = 0.8   # 80% required for surnames
-        NAME_THRESHOLD = 0.7      # 70% required for names
-        TOKEN_SIMILARITY = 0.85   # 85% for token-level matching
-        MIN_TOKEN_LENGTH = 3      # Minimum characters for a token to be considered
+        SURNAME_THRESHOLD = AppConfig.SURNAME_THRESHOLD
+        NAME_THRESHOLD = AppConfig.NAME_THRESHOLD
+        TOKEN_SIMILARITY = AppConfig.TOKEN_SIMILARITY
+        MIN_TOKEN_LENGTH = AppConfig.MIN_TOKEN_LENGTH
         
         def normalize(text: str) -> str:
             """Normalizes strings"""
             if not isinstance(text, str) or pd.isna(text):
                 return ""
-            text = unicodedata.normalize('NFKD', text)
-            text = text.encode('ascii', 'ignore').decode('utf-8')
-            return text.lower().replace('-', ' ').strip()
+            if timed:
+                start = time.perf_counter()
+            text = normalize_name(text)
+            if timed:
+                stats['normalize_seconds'] += time.perf_counter() - start
+            return text
         
         # normalize input
         normalized_name = normalize(person_name)
@@ -122,6 +355,9 @@ class SanctionsRepository:
         # get name tokens for prefix checking
         name_tokens = normalized_name.split() if normalized_name else []
         
+        # aliases passing the prefix rule, resolved once for all rows
+        prefix_labels = prefix_index.match(name_tokens) if prefix_index is not None else None
+        
         # check which columns are available
         has_first_name = 'NameAlias_FirstName' in person_names_df.columns
         has_middle_name = 'NameAlias_MiddleName' in person_names_df.columns
@@ -148,6 +384,7 @@ class SanctionsRepository:
                 last_name = normalize(row['NameAlias_LastName'])
                 if last_name:
                     surname_score = fuzz.token_set_ratio(normalized_surname, last_name) / 100.0
+                    stats['rapidfuzz_calls'] += 1
                     if surname_score < SURNAME_THRESHOLD:
                         surname_score = 0
             
@@ -156,9 +393,15 @@ class SanctionsRepository:
                 first_name = normalize(row['NameAlias_FirstName'])
                 
                 # check for prefix matches (faster than fuzzy matching)
-                if any(check_prefix_match(token, first_name) for token in name_tokens) or \
-                any(check_prefix_match(first_name, token) for token in name_tokens):
+                if prefix_labels is not None:
+                    prefix_match = row.name in prefix_labels
+                else:
+                    prefix_match = any(check_prefix_match(token, first_name) for token in name_tokens) or \
+                        any(check_prefix_match(first_name, token) for token in name_tokens)
+                
+                if prefix_match:
                     name_score = 1
+                    stats['prefix_hits'] += 1
                 
                 # if no prefix match, try fuzzy matching
                 elif normalized_name:
@@ -172,6 +415,7 @@ class SanctionsRepository:
                     
                     if alias_full_name:
                         name_score = fuzz.token_set_ratio(normalized_name, alias_full_name) / 100.0
+                        stats['rapidfuzz_calls'] += 1
                         if name_score < NAME_THRESHOLD:
                             name_score = 0
 
@@ -200,6 +444,8 @@ class SanctionsRepository:
                                     continue
                                     
                                 # check for exact match or high similarity
+                                if input_token != whole_token:
+                                    stats['rapidfuzz_calls'] += 1
                                 if input_token == whole_token or fuzz.ratio(input_token, whole_token) / 100.0 > TOKEN_SIMILARITY:
                                     matching_token_count += 1
                                     break 
@@ -214,10 +460,253 @@ class SanctionsRepository:
                 return 1  
             return 0
         
-        # apply scoring
-        person_names_df['match_score'] = person_names_df.apply(calculate_match_score, axis=1)
+        if token_index is not None:
+            # WholeName fallback rows are decided by the token index alone,
+            # only rows with first and last name go through the per-row rules
+            token_stats = {}
+            matched_labels = token_index.match(normalized_name, normalized_surname, token_stats)
+            
+            component_rows = person_names_df[token_index.component_mask]
+            if not component_rows.empty:
+                scores = component_rows.apply(calculate_match_score, axis=1)
+                matched_labels.update(scores.index[scores > 0])
+            
+            result = person_names_df[person_names_df.index.isin(matched_labels)]
+            scored_count = len(component_rows)
+            
+            if report is not None:
+                report.increment('token_cache_hits', token_stats.get('token_cache_hits', 0))
+                report.increment('token_cache_misses', token_stats.get('token_cache_misses', 0))
+        else:
+            # apply scoring, the shared DataFrame is never modified
+            scores = person_names_df.apply(calculate_match_score, axis=1) if not person_names_df.empty else []
+            
+            # filter matches
+            result = person_names_df[np.asarray(scores) > 0] if len(scores) else person_names_df.iloc[0:0]
+            scored_count = len(person_names_df)
+        
+        if report is not None:
+            report.add_time('normalization', stats['normalize_seconds'])
+            report.add_time('fuzzy_scoring', time.perf_counter() - scoring_start - stats['normalize_seconds'])
+            report.increment('candidates_scored', scored_count)
+            report.increment('rapidfuzz_calls', stats['rapidfuzz_calls'])
+            report.increment('prefix_hits', stats['prefix_hits'])
         
-        # filter matches
-        result = person_names_df[person_names_df['match_score'] > 0]
+        return result
+
+    def match_positions(self, snapshot: Any, person_name: str, person_surname: str,
+                        report: Any = None) -> np.ndarray:
+        """
+        Same rules as find_person_by_name, evaluated on the snapshot indexes.
+
+        Thread-safe: the only shared state it touches is the token memo of
+        snapshot.token_index, which is guarded by a lock; counters are kept
+        per call. No per-alias DataFrame or Series is allocated, so it can be
+        called from a thread pool.
+
+        Parameters:
+        snapshot - SanctionsSnapshot from load_snapshot
+        person_name - First name of the person to search for
+        person_surname - Surname of the person to search for
+        report - Optional RunReport for counters
         
-        return result.drop(columns=['match_score'])
\ No newline at end of file
+        Returns:
+        sorted array of matching alias positions in snapshot.aliases
+        """
+        start = time.perf_counter()
+        normalized_name = normalize_name(person_name)
+        normalized_surname = normalize_name(person_surname)
+        name_tokens = normalized_name.split()
+        stats = {}
+
+        # aliases without first or last name are decided by their WholeName tokens
+        token_index = snapshot.token_index
+        positions = token_index.match(
+            normalized_name, normalized_surname, stats,
+            common_min_aliases=AppConfig.COMMON_TOKEN_MIN_ALIASES,
+            common_cap=AppConfig.COMMON_TOKEN_CANDIDATE_CAP
+        )
+
+        # aliases with both parts need a surname and a name match,
+        # very common surnames may be capped to their best scoring candidates
+        if normalized_surname and name_tokens:
+            common_surname = snapshot.token_stats.is_common(normalized_surname, AppConfig.COMMON_TOKEN_MIN_ALIASES)
+            prefix_positions = snapshot.prefix_index.match(name_tokens)
+            positions.update(snapshot.component_index.match(
+                normalized_name, normalized_surname, prefix_positions, stats,
+                max_candidates=AppConfig.COMMON_TOKEN_CANDIDATE_CAP if common_surname else None
+            ))
+            if common_surname:
+                stats['common_surname_clients'] = 1
+
+        if report is not None:
+            report.add_time('fuzzy_scoring', time.perf_counter() - start)
+            report.increment('candidates_scored', stats.get('candidates', 0))
+            report.increment('candidates_capped', stats.get('candidates_capped', 0))
+            report.increment('common_surname_clients', stats.get('common_surname_clients', 0))
+            report.increment('rapidfuzz_calls', stats.get('rapidfuzz_calls', 0))
+            report.increment('token_cache_hits', stats.get('token_cache_hits', 0))
+            report.increment('token_cache_misses', stats.get('token_cache_misses', 0))
+            report.observe('client_candidates', stats.get('candidates', 0))
+
+        return np.array(sorted(positions), dtype=np.int64)
+
+    def rank_matches(self, snapshot: Any, person_name: str, person_surname: str,
+                     top_k: Any = None, report: Any = None) -> list:
+        """
+        Matching aliases of one client ranked by score, best first.
+
+        Uses the same rules as match_positions, so a client has a match exactly
+        when the list is not empty. Aliases with first and last name score the
+        mean of their surname and name scores. WholeName aliases score
+        token_set_ratio of the whole client name against the WholeName, and
+        of the surname and the name alone for the two partial scores.
+
+        Parameters:
+        snapshot - SanctionsSnapshot from load_snapshot
+        person_name - First name of the person to search for
+        person_surname - Surname of the person to search for
+        top_k - Keep only the k best aliases, None keeps all
+        report - Optional RunReport for counters
+
+        Returns:
+        list of (position, surname_score, name_score, score)
+        """
+        start = time.perf_counter()
+        normalized_name = normalize_name(person_name)
+        normalized_surname = normalize_name(person_surname)
+        name_tokens = normalized_name.split()
+        stats = {}
+        top = TopCandidates(top_k)
+
+        # WholeName aliases first, there are few and they fill the top
+        token_index = snapshot.token_index
+        whole_positions = token_index.match(
+            normalized_name, normalized_surname, stats,
+            common_min_aliases=AppConfig.COMMON_TOKEN_MIN_ALIASES,
+            common_cap=AppConfig.COMMON_TOKEN_CANDIDATE_CAP
+        )
+        combined_name = f"{normalized_name} {normalized_surname}".strip()
+        for position in whole_positions:
+            whole_name = normalize_name(snapshot.whole_names[position])
+            top.push(
+                position,
+                fuzz.token_set_ratio(normalized_surname, whole_name) / 100.0,
+                fuzz.token_set_ratio(normalized_name, whole_name) / 100.0,
+                fuzz.token_set_ratio(combined_name, whole_name) / 100.0
+            )
+        stats['rapidfuzz_calls'] = stats.get('rapidfuzz_calls', 0) + 3 * len(whole_positions)
+
+        # aliases with both parts, skipped once their surname score cannot reach the top
+        if normalized_surname and name_tokens:
+            common_surname = snapshot.token_stats.is_common(normalized_surname, AppConfig.COMMON_TOKEN_MIN_ALIASES)
+            prefix_positions = snapshot.prefix_index.match(name_tokens)
+            snapshot.component_index.scored_matches(
+                normalized_name, normalized_surname, prefix_positions, stats,
+                max_candidates=AppConfig.COMMON_TOKEN_CANDIDATE_CAP if common_surname else None,
+                top=top
+            )
+            if common_surname:
+                stats['common_surname_clients'] = 1
+
+        if report is not None:
+            report.add_time('fuzzy_scoring', time.perf_counter() - start)
+            report.increment('candidates_scored', stats.get('candidates', 0))
+            report.increment('candidates_capped', stats.get('candidates_capped', 0))
+            report.increment('candidates_pruned', stats.get('candidates_pruned', 0))
+            report.increment('common_surname_clients', stats.get('common_surname_clients', 0))
+            report.increment('rapidfuzz_calls', stats.get('rapidfuzz_calls', 0))
+            report.increment('token_cache_hits', stats.get('token_cache_hits', 0))
+            report.increment('token_cache_misses', stats.get('token_cache_misses', 0))
+            report.observe('client_candidates', stats.get('candidates', 0))
+
+        return top.ranked()
+
+    def ngram_index(self, snapshot: Any, report: Any = None) -> Any:
+        """
+        Character n-gram vector index of a snapshot, built on first use and
+        kept for the cached snapshot.
+
+        Parameters:
+        snapshot - SanctionsSnapshot from load_snapshot
+        report - Optional RunReport, receives the build time
+
+        Returns:
+        NgramVectorIndex
+        """
+        if self._ngram_index is not None and self._ngram_index[0] is snapshot:
+            return self._ngram_index[1]
+
+        with (report or RunReport()).stage('ngram_index_build'):
+            texts = [normalize_name(whole_name) for whole_name in snapshot.whole_names]
+            index = NgramVectorIndex.build(texts, n=AppConfig.NGRAM_SIZE)
+        self._ngram_index = (snapshot, index)
+        return index
+
+    def rank_ngram_matches(self, snapshot: Any, people: list, top_k: Any = None, report: Any = None) -> list:
+        """
+        Alternative to rank_matches for large batches: candidate aliases come
+        from one sparse n-gram similarity product for all clients, and only
+        those candidates are checked with the matching rules.
+
+        Faster on big lists but approximate: an alias the rules would match is
+        missed when its n-gram similarity is below AppConfig.NGRAM_MIN_SIMILARITY
+        or outside the AppConfig.NGRAM_TOP_N most similar aliases.
+
+        Parameters:
+        snapshot - SanctionsSnapshot from load_snapshot
+        people - Clients (objects with name and surname)
+        top_k - Keep only the k best aliases per client, None keeps all
+        report - Optional RunReport for counters
+
+        Returns:
+        list with one ranked (position, surname_score, name_score, score) list per client
+        """
+        index = self.ngram_index(snapshot, report)
+
+        start = time.perf_counter()
+        normalized = [(normalize_name(person.name), normalize_name(person.surname)) for person in people]
+        candidate_lists = index.query(
+            [f"{name} {surname}".strip() for name, surname in normalized],
+            top_n=AppConfig.NGRAM_TOP_N, min_similarity=AppConfig.NGRAM_MIN_SIMILARITY
+        )
+        if report is not None:
+            report.add_time('ngram_candidates', time.perf_counter() - start)
+
+        start = time.perf_counter()
+        results = []
+        candidates_scored = 0
+        for (normalized_name, normalized_surname), candidates in zip(normalized, candidate_lists):
+            top = TopCandidates(top_k)
+            name_tokens = normalized_name.split()
+            prefix_positions = snapshot.prefix_index.match(name_tokens) if normalized_surname else set()
+            combined_name = f"{normalized_name} {normalized_surname}".strip()
+            client_tokens = long_tokens(combined_name, snapshot.token_index.min_token_length)
+
+            for position in candidates.tolist():
+                if snapshot.token_index.component_mask[position]:
+                    scores = snapshot.component_index.alias_scores(
+                        position, normalized_name, normalized_surname, prefix_positions
+                    )
+                    if scores:
+                        top.push(position, scores[0], scores[1], (scores[0] + scores[1]) / 2)
+                    continue
+
+                whole_name = normalize_name(snapshot.whole_names[position])
+                if snapshot.token_index.alias_matches(whole_name, client_tokens):
+                    top.push(
+                        position,
+                        fuzz.token_set_ratio(normalized_surname, whole_name) / 100.0,
+                        fuzz.token_set_ratio(normalized_name, whole_name) / 100.0,
+                        fuzz.token_set_ratio(combined_name, whole_name) / 100.0
+                    )
+
+            candidates_scored += len(candidates)
+            results.append(top.ranked())
+            if report is not None:
+                report.observe('client_candidates', len(candidates))
+
+        if report is not None:
+            report.add_time('fuzzy_scoring', time.perf_counter() - start)
+            report.increment('candidates_scored', candidates_scored)
+        return results
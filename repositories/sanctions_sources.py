@@ -0,0 +1,213 @@
+import re
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+import pandas as pd
+
+# columns of the alias table every source is parsed into
+ALIAS_COLUMNS = ['Entity_LogicalId', 'NameAlias_LastName', 'NameAlias_FirstName',
+                 'NameAlias_MiddleName', 'NameAlias_WholeName', 'Source']
+
+
+def join_names(*parts):
+    """Space separated non-empty name parts, None when there are none"""
+    names = [part.strip() for part in parts if isinstance(part, str) and part.strip()]
+    return " ".join(names) if names else None
+
+
+class SanctionsSource(ABC):
+    """
+    Adapter for one sanctions list format.
+
+    parse turns a downloaded list into person aliases with ALIAS_COLUMNS.
+    Entity ids get the source prefix (except the EU list, whose ids are kept
+    as they are) so entities of different lists never collide.
+    """
+
+    name = None
+    file_suffix = '.csv'
+
+    def __init__(self, url):
+        """
+        Parameters:
+        url - Download URL of the list
+        """
+        self.url = url
+
+    @abstractmethod
+    def parse(self, file_path):
+        """
+        Parse a downloaded list.
+
+        Parameters:
+        file_path - Path to the downloaded file
+
+        Returns:
+        (aliases DataFrame with ALIAS_COLUMNS, generation date or None, rows scanned)
+        """
+
+    def entity_id(self, source_id):
+        return f"{self.name.upper()}-{str(source_id).strip()}"
+
+    def alias_frame(self, rows):
+        """DataFrame from (entity_id, last, first, middle, whole) tuples"""
+        aliases = pd.DataFrame(rows, columns=ALIAS_COLUMNS[:-1])
+        aliases['Source'] = self.name
+        return aliases
+
+
+class EUSanctionsSource(SanctionsSource):
+    """EU consolidated financial sanctions list, ';' separated CSV"""
+
+    name = 'eu'
+
+    def parse(self, file_path):
+        df = pd.read_csv(file_path, sep=";", low_memory=False)
+
+        generation_date = None
+        if 'fileGenerationDate' in df.columns and not df.empty:
+            generation_date = df['fileGenerationDate'].iloc[0]
+
+        # filtering by PEOPLE
+        persons_df = df[df['Entity_SubjectType'] == 'P']
+        if 'NameAlias_WholeName' not in persons_df.columns:
+            raise ValueError("NameAlias_WholeName column not found in the data")
+
+        aliases = persons_df.reindex(columns=ALIAS_COLUMNS[:-1])
+        aliases['Source'] = self.name
+        return aliases, generation_date, len(df)
+
+
+class UNSanctionsSource(SanctionsSource):
+    """
+    UN Security Council consolidated list, XML. The order of the UN name
+    parts differs between entries, so names are kept as whole names only.
+    """
+
+    name = 'un'
+    file_suffix = '.xml'
+
+    def parse(self, file_path):
+        rows = []
+        generation_date = None
+        scanned = 0
+
+        for event, element in ET.iterparse(file_path, events=('start', 'end')):
+            if event == 'start':
+                if element.tag == 'CONSOLIDATED_LIST':
+                    generation_date = element.get('dateGenerated')
+                continue
+            if element.tag == 'ENTITY':
+                scanned += 1
+                element.clear()
+            if element.tag != 'INDIVIDUAL':
+                continue
+
+            scanned += 1
+            entity_id = self.entity_id(element.findtext('DATAID', ''))
+            whole_name = join_names(*(element.findtext(tag) for tag in
+                                      ('FIRST_NAME', 'SECOND_NAME', 'THIRD_NAME', 'FOURTH_NAME')))
+            names = [whole_name, element.findtext('NAME_ORIGINAL_SCRIPT')]
+            names.extend(alias.findtext('ALIAS_NAME') for alias in element.iter('INDIVIDUAL_ALIAS'))
+
+            for name in names:
+                name = join_names(name)
+                if name:
+                    rows.append((entity_id, None, None, None, name))
+            element.clear()
+
+        return self.alias_frame(rows), generation_date, scanned
+
+
+class UKSanctionsSource(SanctionsSource):
+    """
+    UK OFSI consolidated list, CSV with one row per name of a target.
+    The first line holds the date of the last update, the header follows.
+    """
+
+    name = 'uk'
+
+    def parse(self, file_path):
+        with open(file_path, encoding='utf-8-sig', errors='replace') as f:
+            first_line = f.readline().strip().split(',')
+        generation_date = first_line[1] if len(first_line) > 1 and first_line[1] else None
+
+        df = pd.read_csv(file_path, skiprows=1, dtype=str, encoding='utf-8-sig', encoding_errors='replace')
+        persons_df = df[df['Group Type'] == 'Individual']
+
+        rows = []
+        for record in persons_df.to_dict('records'):
+            entity_id = self.entity_id(record.get('Group ID'))
+            last_name = join_names(record.get('Name 6'))
+            first_name = join_names(record.get('Name 1'))
+            middle_name = join_names(*(record.get(f'Name {index}') for index in range(2, 6)))
+            whole_name = join_names(first_name, middle_name, last_name)
+            if whole_name:
+                rows.append((entity_id, last_name, first_name, middle_name, whole_name))
+
+            non_latin = join_names(record.get('Name Non-Latin Script'))
+            if non_latin:
+                rows.append((entity_id, None, None, None, non_latin))
+
+        return self.alias_frame(rows), generation_date, len(df)
+
+
+class OFACSanctionsSource(SanctionsSource):
+    """
+    OFAC SDN list, headerless CSV (sdn.csv). Names are "LAST, First Middle",
+    weak and strong aliases come from the "a.k.a. '...'" remarks.
+    """
+
+    name = 'ofac'
+
+    COLUMNS = ['ent_num', 'SDN_Name', 'SDN_Type', 'Program', 'Title', 'Call_Sign', 'Vess_type',
+               'Tonnage', 'GRT', 'Vess_flag', 'Vess_owner', 'Remarks']
+    AKA = re.compile(r"a\.k\.a\. '([^']+)'")
+
+    def parse(self, file_path):
+        df = pd.read_csv(file_path, header=None, names=self.COLUMNS, dtype=str,
+                         encoding='latin-1', na_values=['-0-', '-0- '])
+        persons_df = df[df['SDN_Type'].str.strip().str.lower() == 'individual']
+
+        rows = []
+        for entity_number, sdn_name, remarks in zip(persons_df['ent_num'], persons_df['SDN_Name'],
+                                                    persons_df['Remarks']):
+            entity_id = self.entity_id(entity_number)
+            if isinstance(sdn_name, str):
+                last_name, _, given_names = sdn_name.partition(',')
+                given = given_names.split()
+                first_name = given[0] if given else None
+                middle_name = join_names(*given[1:])
+                last_name = join_names(last_name)
+                rows.append((entity_id, last_name if first_name else None, first_name, middle_name,
+                             join_names(first_name, middle_name, last_name)))
+            if isinstance(remarks, str):
+                for alias in self.AKA.findall(remarks):
+                    rows.append((entity_id, None, None, None, join_names(alias)))
+
+        return self.alias_frame(rows), None, len(df)
+
+
+SANCTIONS_SOURCES = {
+    EUSanctionsSource.name: EUSanctionsSource,
+    UNSanctionsSource.name: UNSanctionsSource,
+    UKSanctionsSource.name: UKSanctionsSource,
+    OFACSanctionsSource.name: OFACSanctionsSource,
+}
+
+
+def create_sanctions_source(name, url):
+    """
+    Create a source adapter by name.
+
+    Parameters:
+    name - Key of SANCTIONS_SOURCES
+    url - Download URL of the list
+
+    Returns:
+    SanctionsSource, None for an unknown name
+    """
+    source_class = SANCTIONS_SOURCES.get(name)
+    if source_class is None:
+        print(f"Unknown sanctions source: {name} (available: {', '.join(SANCTIONS_SOURCES)})")
+        return None
+    return source_class(url)
@@ -0,0 +1,97 @@
+import os
+import glob
+from utils.mapped_arrays import StringTable, KeyedPostings, write_arrays, read_arrays
+from utils.name_indexes import (ExactNameIndex, WholeNameTokenIndex, FirstNamePrefixIndex,
+                                ComponentNameIndex, TokenFrequencyStats)
+from repositories.sanctions_sources import ALIAS_COLUMNS
+from models.sanctions_snapshot import SanctionsSnapshot
+
+SNAPSHOT_FILE_PREFIX = 'snapshot_'
+SNAPSHOT_FILE_SUFFIX = '.idx'
+
+
+def snapshot_file_path(directory, key):
+    """Path of the stored snapshot with the given key"""
+    return os.path.join(directory, f"{SNAPSHOT_FILE_PREFIX}{key}{SNAPSHOT_FILE_SUFFIX}")
+
+
+def save_snapshot_file(snapshot, file_path, params):
+    """
+    Write a snapshot (alias columns and all lookup indexes) into one
+    memory-mappable file.
+
+    Parameters:
+    snapshot - SanctionsSnapshot
+    file_path - Target file, replaced atomically
+    params - dict with min_token_length, token_similarity, surname_threshold, name_threshold
+    """
+    aliases = snapshot.aliases
+    arrays = {}
+    for column in ALIAS_COLUMNS:
+        arrays.update(StringTable.from_values(aliases[column].tolist()).arrays(f"aliases.{column}"))
+    arrays.update(KeyedPostings.from_dict(snapshot.entity_positions).arrays('entity_positions'))
+    arrays.update(snapshot.exact_index.to_arrays('exact'))
+    arrays.update(snapshot.token_index.to_arrays('token'))
+    arrays.update(snapshot.prefix_index.to_arrays('prefix'))
+    arrays.update(snapshot.component_index.to_arrays('component', len(aliases)))
+    arrays.update(snapshot.token_stats.to_arrays('token_stats'))
+
+    meta = {
+        'version': snapshot.version,
+        'generation_date': snapshot.generation_date,
+        'sources': snapshot.sources,
+        'params': params,
+    }
+    write_arrays(file_path, arrays, meta)
+
+
+def load_snapshot_file(file_path, source_file=None):
+    """
+    Map a stored snapshot read-only. The alias tables and postings stay in
+    the page cache and are shared by every process mapping the same file.
+
+    Parameters:
+    file_path - File written by save_snapshot_file
+    source_file - Sanctions file(s) the snapshot was made from
+
+    Returns:
+    SanctionsSnapshot
+    """
+    arrays, meta = read_arrays(file_path)
+    params = meta['params']
+    return SanctionsSnapshot(
+        aliases=None,
+        version=meta['version'],
+        generation_date=meta['generation_date'],
+        source_file=source_file,
+        exact_index=ExactNameIndex.from_arrays(arrays, 'exact', params['min_token_length']),
+        token_index=WholeNameTokenIndex.from_arrays(
+            arrays, 'token', params['token_similarity'], params['min_token_length']
+        ),
+        prefix_index=FirstNamePrefixIndex.from_arrays(arrays, 'prefix', params['min_token_length']),
+        component_index=ComponentNameIndex.from_arrays(
+            arrays, 'component', params['surname_threshold'], params['name_threshold']
+        ),
+        token_stats=TokenFrequencyStats.from_arrays(arrays, 'token_stats'),
+        sources=meta['sources'],
+        alias_columns={column: StringTable.from_arrays(arrays, f"aliases.{column}") for column in ALIAS_COLUMNS},
+        entity_positions=KeyedPostings.from_arrays(arrays, 'entity_positions'),
+    )
+
+
+def prune_snapshot_files(directory, keep):
+    """
+    Remove all but the newest stored snapshots. Files still mapped by another
+    process may not be removable (Windows), those are left for a later run.
+
+    Parameters:
+    directory - Store directory
+    keep - Number of newest files to keep
+    """
+    files = sorted(glob.glob(os.path.join(directory, f"{SNAPSHOT_FILE_PREFIX}*{SNAPSHOT_FILE_SUFFIX}")),
+                   key=os.path.getmtime, reverse=True)
+    for file_path in files[keep:]:
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
@@ -0,0 +1,127 @@
+import os
+import pickle
+import shutil
+import tempfile
+import weakref
+from config import AppConfig
+
+
+class SpilledPeople:
+    """
+    Client list of a memory-budgeted run. Clients are kept in chunks; once
+    the process is over its MemoryBudget, new chunks and screened chunks with
+    their matches are pickled to a temporary directory and read back only
+    when they are used. Supports len, iteration and slicing like a list.
+    """
+
+    def __init__(self, budget, chunk_size=None, report=None):
+        """
+        Parameters:
+        budget - MemoryBudget deciding when chunks go to disk
+        chunk_size - Clients per chunk, AppConfig.MATCH_CHUNK_SIZE by default
+        report - Optional RunReport for spill counters
+        """
+        self.budget = budget
+        self.chunk_size = chunk_size or AppConfig.MATCH_CHUNK_SIZE
+        self.report = report
+        self.directory = tempfile.mkdtemp(prefix='sanctions_spill_', dir=AppConfig.SPILL_DIR)
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.directory, True)
+        # every chunk is a list of people in memory or the path of its pickle
+        self._chunks = []
+        self._starts = []
+        self._length = 0
+
+    def extend(self, people):
+        """Add clients, filling the last chunk first"""
+        people = list(people)
+        while people:
+            if self._chunks and self._chunk_length(len(self._chunks) - 1) < self.chunk_size:
+                index = len(self._chunks) - 1
+                chunk = self._load(index)
+            else:
+                index = len(self._chunks)
+                chunk = []
+                self._chunks.append(chunk)
+                self._starts.append(self._length)
+            taken = people[:self.chunk_size - len(chunk)]
+            people = people[len(taken):]
+            chunk.extend(taken)
+            self._length += len(taken)
+            self._chunks[index] = chunk
+            if len(chunk) == self.chunk_size and self.budget.exceeded():
+                self._spill(index, chunk)
+
+    def store(self, start, people):
+        """
+        Keep the screened clients starting at position start. Spilled chunks are
+        rewritten with them, chunks in memory are spilled while over the budget.
+        """
+        end = start + len(people)
+        for index in self._overlapping(start, end):
+            chunk_start = self._starts[index]
+            chunk = self._chunks[index]
+            if isinstance(chunk, list):
+                if self.budget.exceeded() and start <= chunk_start and chunk_start + len(chunk) <= end:
+                    self._spill(index, chunk)
+                continue
+            chunk = self._load(index)
+            low, high = max(start, chunk_start), min(end, chunk_start + len(chunk))
+            chunk[low - chunk_start:high - chunk_start] = people[low - start:high - start]
+            self._spill(index, chunk)
+
+    def close(self):
+        """Delete the spill files"""
+        self._finalizer()
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        for index in range(len(self._chunks)):
+            yield from self._load(index)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self._length)
+            people = []
+            for index in self._overlapping(start, stop):
+                chunk_start = self._starts[index]
+                chunk = self._load(index)
+                people.extend(chunk[max(start, chunk_start) - chunk_start:min(stop, chunk_start + len(chunk)) - chunk_start])
+            return people[::step]
+        position = item + self._length if item < 0 else item
+        if not 0 <= position < self._length:
+            raise IndexError('client index out of range')
+        index = next(index for index in self._overlapping(position, position + 1))
+        return self._load(index)[position - self._starts[index]]
+
+    @property
+    def spilled_chunks(self):
+        return sum(1 for chunk in self._chunks if not isinstance(chunk, list))
+
+    def _overlapping(self, start, end):
+        for index, chunk_start in enumerate(self._starts):
+            if chunk_start < end and start < chunk_start + self._chunk_length(index):
+                yield index
+
+    def _chunk_length(self, index):
+        next_start = self._starts[index + 1] if index + 1 < len(self._starts) else self._length
+        return next_start - self._starts[index]
+
+    def _load(self, index):
+        chunk = self._chunks[index]
+        if isinstance(chunk, list):
+            return chunk
+        with open(chunk, 'rb') as f:
+            if self.report is not None:
+                self.report.increment('spill_reads')
+            return pickle.load(f)
+
+    def _spill(self, index, chunk):
+        file_path = os.path.join(self.directory, f"chunk_{index:06d}.pickle")
+        with open(file_path, 'wb') as f:
+            pickle.dump(chunk, f, protocol=pickle.HIGHEST_PROTOCOL)
+        if self.report is not None:
+            self.report.increment('spill_writes')
+            self.report.increment('spilled_clients', len(chunk) if isinstance(self._chunks[index], list) else 0)
+        self._chunks[index] = file_path
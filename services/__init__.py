@@ -1,4 +1,7 @@
 from .download_service import DownloadService
 from .processing_service import ProcessingService
+from .refresh_service import RefreshService
+from .batch_service import BatchService, collect_client_files
+from .matcher_engines import MatcherEngine, MATCHER_ENGINES, create_matcher_engine
 
-__all__ = ['DownloadService', 'ProcessingService']
\ No newline at end of file
+__all__ = ['DownloadService', 'ProcessingService', 'RefreshService', 'BatchService', 'collect_client_files', 'MatcherEngine', 'MATCHER_ENGINES', 'create_matcher_engine']
\ No newline at end of file
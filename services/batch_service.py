@@ -0,0 +1,268 @@
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import AppConfig
+from utils import RunReport
+from services.processing_service import ProcessingService
+from services.result_exporter import create_result_writer
+from utils.verdict_cache import VerdictCache
+
+CLIENT_FILE_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+
+
+def collect_client_files(paths):
+    """
+    Client files of a batch.
+
+    Parameters:
+    paths - Files and directories, directories contribute their CSV and Excel files
+
+    Returns:
+    list of file paths, directory contents sorted by name, duplicates removed
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.lower().endswith(CLIENT_FILE_EXTENSIONS) and not name.startswith('~$')
+            )
+        else:
+            files.append(path)
+
+    unique = []
+    seen = set()
+    for file_path in files:
+        key = os.path.abspath(file_path)
+        if key not in seen:
+            seen.add(key)
+            unique.append(file_path)
+    return unique
+
+
+def run_names(client_files):
+    """
+    Name of every client file's run, unique within the batch; the result file
+    is <run name>_results<ext>. Files sharing a base name (same name in
+    different directories, or a .csv and an .xlsx) get their directory and
+    extension in the name, and a number if that is still not enough.
+
+    Parameters:
+    client_files - Client files of the batch
+
+    Returns:
+    dict client file -> run name
+    """
+    def base_name(file_path):
+        return os.path.splitext(os.path.basename(file_path))[0]
+
+    base_counts = {}
+    for file_path in client_files:
+        base_counts[base_name(file_path)] = base_counts.get(base_name(file_path), 0) + 1
+
+    names = {}
+    used = set()
+    for file_path in client_files:
+        name = base_name(file_path)
+        if base_counts[name] > 1:
+            directory = os.path.basename(os.path.dirname(os.path.abspath(file_path)))
+            extension = os.path.splitext(file_path)[1].lstrip('.').lower()
+            name = "_".join(filter(None, [directory, name, extension]))
+        unique_name, number = name, 2
+        while unique_name.lower() in used:
+            unique_name = f"{name}_{number}"
+            number += 1
+        name = unique_name
+        used.add(name.lower())
+        names[file_path] = name
+    return names
+
+
+class BatchService:
+    """
+    Screens many client files against one prepared sanctions snapshot,
+    one after the other or with several files at a time.
+    """
+
+    def __init__(self, file_repository, sanctions_repository, history_repository=None, verdict_cache=None):
+        """
+        Parameters:
+        file_repository - Repository for file operations
+        sanctions_repository - Repository for sanctions data operations
+        history_repository - Optional ScreeningHistoryRepository, every file is recorded as a run
+        verdict_cache - VerdictCache shared by all files, a new one by default
+        """
+        self.file_repository = file_repository
+        self.sanctions_repository = sanctions_repository
+        self.history_repository = history_repository
+        # clients listed in several files are matched once
+        self.verdict_cache = verdict_cache if verdict_cache is not None else VerdictCache.from_config()
+
+    def screen_files(self, client_files, sanctions_filename=None, snapshot=None, output_dir=None,
+                     workers=None, export_format=None, on_file_complete=None, report=None, resume=False):
+        """
+        Screen every client file.
+
+        Parameters:
+        client_files - Client files (see collect_client_files)
+        sanctions_filename - dict source name -> path of the lists, used when no snapshot is given
+        snapshot - Optional prepared SanctionsSnapshot shared by all files
+        output_dir - Optional directory for the per-file results and batch_summary.json
+        workers - Files screened at the same time, AppConfig.BATCH_WORKERS by default
+        export_format - Extension of the per-file results, AppConfig.BATCH_EXPORT_FORMAT by default
+        on_file_complete - Called with (file summary, files done, file count) after each file
+        report - Optional RunReport, receives the snapshot preparation
+        resume - Continue interrupted files from their checkpoints
+
+        Returns:
+        dict - batch summary with a 'files' list of per-file summaries,
+               None if the sanctions data could not be prepared
+        """
+        report = report if report is not None else RunReport()
+        started = time.perf_counter()
+
+        # one snapshot for the whole batch
+        if snapshot is None:
+            snapshot = self.sanctions_repository.load_snapshot(sanctions_filename, report=report)
+        if snapshot is None:
+            return None
+
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        workers = max(1, workers or AppConfig.BATCH_WORKERS)
+        export_format = export_format or AppConfig.BATCH_EXPORT_FORMAT
+        done = []
+        names = run_names(client_files)
+
+        def screen(file_path):
+            summary = self.screen_file(file_path, snapshot, output_dir, export_format, resume,
+                                       run_name=names[file_path])
+            done.append(summary)
+            if on_file_complete:
+                on_file_complete(summary, len(done), len(client_files))
+            return summary
+
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                file_summaries = list(executor.map(screen, client_files))
+        else:
+            file_summaries = [screen(file_path) for file_path in client_files]
+
+        summary = self.combine(file_summaries, snapshot, time.perf_counter() - started)
+        if output_dir:
+            summary_path = os.path.join(output_dir, 'batch_summary.json')
+            try:
+                with open(summary_path, 'w', encoding='utf-8') as f:
+                    json.dump(summary, f, indent=2, ensure_ascii=False, default=str)
+                summary['summary_file'] = summary_path
+            except OSError as e:
+                print(f"Error writing batch summary: {e}")
+        return summary
+
+    def screen_file(self, file_path, snapshot, output_dir=None, export_format='.csv', resume=False,
+                    run_name=None):
+        """
+        Load and screen one client file.
+
+        Parameters:
+        file_path - Client file
+        snapshot - Prepared SanctionsSnapshot
+        output_dir - Optional directory for the results
+        export_format - Extension of the results
+        resume - Continue from the checkpoint of the file
+        run_name - Name of the run (see run_names), the base name of the file by default
+
+        Returns:
+        dict - per-file summary (file, clients, matches, matched_oibs, seconds, output, error)
+        """
+        started = time.perf_counter()
+        run_name = run_name or os.path.splitext(os.path.basename(file_path))[0]
+        summary = {'file': file_path, 'clients': 0, 'matches': 0, 'matched_oibs': [],
+                   'seconds': 0.0, 'output': None, 'error': None}
+
+        load_report = RunReport()
+        people, message = self.file_repository.load_people_from_file(file_path, report=load_report)
+        summary['message'] = message
+        if not people:
+            summary['error'] = message
+            summary['seconds'] = time.perf_counter() - started
+            return summary
+
+        result_writer = None
+        if output_dir:
+            output_path = os.path.join(output_dir, f"{run_name}_results{export_format}")
+            result_writer = create_result_writer(output_path)
+            summary['output'] = output_path if result_writer else None
+
+        # a service per file, files may run concurrently
+        processing_service = ProcessingService(self.file_repository, self.sanctions_repository,
+                                               self.history_repository, verdict_cache=self.verdict_cache)
+        processing_service.last_load_report = load_report
+        matched = []
+        errors = []
+        processing_service.process_data(
+            sanctions_filename=None,
+            people_data=people,
+            on_match_found=lambda person: matched.append(person.oib),
+            result_writer=result_writer,
+            snapshot=snapshot,
+            resume=resume,
+            on_error=errors.append,
+            run_name=run_name
+        ).join()
+
+        if errors:
+            # partial results of a failed file are not kept
+            summary['error'] = errors[0]
+            if summary['output']:
+                try:
+                    os.remove(summary['output'])
+                except OSError:
+                    pass
+                summary['output'] = None
+            summary['seconds'] = time.perf_counter() - started
+            return summary
+
+        summary['clients'] = len(people)
+        summary['matches'] = len(matched)
+        summary['matched_oibs'] = matched
+        summary['seconds'] = time.perf_counter() - started
+        return summary
+
+    @staticmethod
+    def combine(file_summaries, snapshot, seconds):
+        """Combined summary of all files"""
+        matched_oibs = {oib for summary in file_summaries for oib in summary['matched_oibs']}
+        return {
+            'snapshot_version': snapshot.version,
+            'generation_date': snapshot.generation_date,
+            'sanctions_lists': sorted(snapshot.sources),
+            'missing_lists': list(snapshot.missing_sources),
+            'files': file_summaries,
+            'file_count': len(file_summaries),
+            'failed_files': sum(1 for summary in file_summaries if summary['error']),
+            'clients': sum(summary['clients'] for summary in file_summaries),
+            'matches': sum(summary['matches'] for summary in file_summaries),
+            'unique_matched_oibs': len(matched_oibs),
+            'seconds': seconds,
+        }
+
+
+def format_batch_summary(summary):
+    """Text table of a batch summary"""
+    lines = [f"{'file':<40} {'clients':>9} {'matches':>8} {'seconds':>8}"]
+    for file_summary in summary['files']:
+        name = os.path.basename(file_summary['file'])
+        if file_summary['error']:
+            lines.append(f"{name:<40} {file_summary['error']}")
+        else:
+            lines.append(f"{name:<40} {file_summary['clients']:>9} {file_summary['matches']:>8} "
+                         f"{file_summary['seconds']:>8.2f}")
+    lines.append(f"{'total':<40} {summary['clients']:>9} {summary['matches']:>8} {summary['seconds']:>8.2f}")
+    lines.append(f"{summary['file_count']} files ({summary['failed_files']} failed), "
+                 f"{summary['unique_matched_oibs']} distinct matched OIBs, "
+                 f"sanctions list version {summary['snapshot_version']}")
+    if summary.get('missing_lists'):
+        lines.append(f"WARNING: screened without the {', '.join(summary['missing_lists'])} sanctions lists")
+    return "\n".join(lines)
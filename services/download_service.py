@@ -1,4 +1,7 @@
+import os
 import threading
+from config import AppConfig
+from utils import RunReport
 
 class DownloadService:
     def __init__(self, sanctions_repository):
@@ -10,6 +13,9 @@ class DownloadService:
         """
         self.sanctions_repository = sanctions_repository
         self.cached_filename = None
+        self.last_report = None
+        # lists that could not be downloaded by the last download
+        self.failed_sources = []
     
     def download(self, on_complete=None):
         """
@@ -19,9 +25,22 @@ class DownloadService:
         on_complete - Callback function to call with the filename when complete
         
         Returns:
-        filename - Path to the downloaded file
+        filename - dict source name -> path of the downloaded list, None if every download
+                   failed or, with AppConfig.REQUIRE_ALL_SANCTIONS_SOURCES, any of them failed
+                   (failed_sources names them)
         """
-        filename = self.sanctions_repository.download_sanctions_data()
+        self.last_report = RunReport()
+        filename, self.failed_sources = self.sanctions_repository.download_sanctions_data(report=self.last_report)
+        if self.failed_sources:
+            print(f"Sanctions lists not downloaded: {', '.join(self.failed_sources)}")
+            if filename and AppConfig.REQUIRE_ALL_SANCTIONS_SOURCES:
+                # an incomplete set of lists is not screened against
+                for path in filename.values():
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                filename = None
         
         if filename:
             self.cached_filename = filename
@@ -0,0 +1,230 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from config import AppConfig
+
+
+class MatcherEngine(ABC):
+    """
+    Base class of the matching engines driven by ProcessingService.
+
+    An engine is prepared once per sanctions snapshot and then gets the
+    clients chunk by chunk. For every client it returns the ranked
+    (position, surname_score, name_score, score) of the matching aliases,
+    positions into snapshot.aliases, best first, empty when nothing matches.
+    """
+
+    name = None
+
+    def __init__(self, sanctions_repository):
+        """
+        Parameters:
+        sanctions_repository - SanctionsRepository with the matching rules
+        """
+        self.sanctions_repository = sanctions_repository
+        self.snapshot = None
+        self.report = None
+
+    def prepare(self, snapshot, report=None):
+        """
+        Build what the engine needs for one sanctions snapshot.
+
+        Parameters:
+        snapshot - SanctionsSnapshot from SanctionsRepository.load_snapshot
+        report - Optional RunReport, receives timings and counters of the run
+        """
+        self.snapshot = snapshot
+        self.report = report
+
+    @abstractmethod
+    def match_batch(self, people):
+        """
+        Match a batch of clients.
+
+        Parameters:
+        people - Clients (Person objects)
+
+        Returns:
+        list with one ranked list per client, in client order
+        """
+
+    def close(self):
+        """Release threads or other resources held between batches"""
+
+
+class ReferenceEngine(MatcherEngine):
+    """
+    find_person_by_name on the alias DataFrame, one client at a time.
+    Slow, kept as the definition of the matching rules. Every matching alias
+    scores 1.0, the rules give no finer score.
+    """
+
+    name = 'reference'
+
+    def match_batch(self, people):
+        results = []
+        for person in people:
+            matches = self.sanctions_repository.find_person_by_name(
+                self.snapshot.aliases, person.name, person.surname, report=self.report
+            )
+            # the snapshot aliases have a positional index
+            ranked = [(position, 1.0, 1.0, 1.0) for position in matches.index.tolist()]
+            results.append(ranked[:AppConfig.TOP_K_CANDIDATES])
+        return results
+
+
+class IndexEngine(MatcherEngine):
+    """
+    The matching rules evaluated on the snapshot indexes (rank_matches, or the
+    exact name fast path when AppConfig.EXACT_MATCH_FAST_PATH is on), with
+    AppConfig.MATCH_WORKERS threads.
+    """
+
+    name = 'index'
+
+    def __init__(self, sanctions_repository):
+        super().__init__(sanctions_repository)
+        self._executor = None
+
+    def prepare(self, snapshot, report=None):
+        super().prepare(snapshot, report)
+        workers = max(1, AppConfig.MATCH_WORKERS)
+        if workers > 1 and self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=workers)
+
+    def match_client(self, person):
+        """Ranked aliases of one client, safe to run in worker threads"""
+        # exact hits after normalization skip fuzzy matching, other entities
+        # the rules would match fuzzily are not reported (off by default)
+        if AppConfig.EXACT_MATCH_FAST_PATH:
+            exact_hits = self.snapshot.exact_index.lookup(person.name, person.surname)
+            if self.report is not None:
+                self.report.increment('exact_hits' if exact_hits else 'exact_misses')
+            if exact_hits:
+                return [(position, 1.0, 1.0, 1.0) for position in sorted(set(exact_hits))][:AppConfig.TOP_K_CANDIDATES]
+
+        return self.sanctions_repository.rank_matches(
+            self.snapshot, person.name, person.surname, top_k=AppConfig.TOP_K_CANDIDATES, report=self.report
+        )
+
+    def match_batch(self, people):
+        if self._executor:
+            return list(self._executor.map(self.match_client, people))
+        return [self.match_client(person) for person in people]
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown()
+            self._executor = None
+
+
+class NgramEngine(MatcherEngine):
+    """
+    Sparse TF-IDF character n-gram candidates for the whole batch, checked
+    with the matching rules. Approximate, see rank_ngram_matches.
+    """
+
+    name = 'ngram'
+
+    def prepare(self, snapshot, report=None):
+        super().prepare(snapshot, report)
+        self.sanctions_repository.ngram_index(snapshot, report)
+
+    def match_batch(self, people):
+        return self.sanctions_repository.rank_ngram_matches(
+            self.snapshot, people, top_k=AppConfig.TOP_K_CANDIDATES, report=self.report
+        )
+
+
+class CachedEngine(MatcherEngine):
+    """
+    A VerdictCache in front of another engine. Clients whose normalized
+    name was screened before against the same snapshot get the cached
+    ranked matches, the others go to the wrapped engine as one batch.
+    """
+
+    def __init__(self, engine, cache):
+        """
+        Parameters:
+        engine - Wrapped MatcherEngine
+        cache - VerdictCache, may be shared by several engines and runs
+        """
+        super().__init__(engine.sanctions_repository)
+        self.engine = engine
+        self.cache = cache
+        self.name = engine.name
+        self._settings = ()
+
+    def prepare(self, snapshot, report=None):
+        super().prepare(snapshot, report)
+        self.engine.prepare(snapshot, report)
+        if self.cache.use_version(snapshot.version) and report is not None:
+            report.increment('verdict_cache_invalidations')
+        self._settings = self.settings_key(self.engine.name, self.sanctions_repository)
+
+    @staticmethod
+    def settings_key(engine_name, sanctions_repository):
+        """Every setting a verdict of the engine depends on, part of the cache key"""
+        return (engine_name, AppConfig.TOP_K_CANDIDATES, AppConfig.EXACT_MATCH_FAST_PATH,
+                AppConfig.COMMON_TOKEN_MIN_ALIASES, AppConfig.COMMON_TOKEN_CANDIDATE_CAP,
+                tuple(AppConfig.RETAINED_SCRIPTS), tuple(AppConfig.TRANSLITERATED_SCRIPTS),
+                AppConfig.NGRAM_SIZE, AppConfig.NGRAM_TOP_N, AppConfig.NGRAM_MIN_SIMILARITY,
+                tuple(sorted(sanctions_repository.snapshot_params().items())))
+
+    def match_batch(self, people):
+        results = [None] * len(people)
+        keys = [self.cache.key(person, self.snapshot.version, self._settings) for person in people]
+        # key -> positions of the clients the engine has to match, repeated names once
+        missed = {}
+        for position, key in enumerate(keys):
+            if key in missed:
+                missed[key].append(position)
+                continue
+            cached = self.cache.get(key)
+            if cached is None:
+                missed[key] = [position]
+            else:
+                results[position] = list(cached)
+
+        evicted = 0
+        if missed:
+            matched = self.engine.match_batch([people[positions[0]] for positions in missed.values()])
+            for (key, positions), ranked in zip(missed.items(), matched):
+                for position in positions:
+                    results[position] = list(ranked)
+                evicted += self.cache.put(key, ranked)
+
+        if self.report is not None:
+            self.report.increment('verdict_cache_hits', len(people) - len(missed))
+            self.report.increment('verdict_cache_misses', len(missed))
+            self.report.increment('verdict_cache_evictions', evicted)
+        return results
+
+    def close(self):
+        self.engine.close()
+
+
+MATCHER_ENGINES = {
+    ReferenceEngine.name: ReferenceEngine,
+    IndexEngine.name: IndexEngine,
+    NgramEngine.name: NgramEngine,
+}
+
+
+def create_matcher_engine(name, sanctions_repository):
+    """
+    Create a matching engine by name.
+
+    Parameters:
+    name - Key of MATCHER_ENGINES, e.g. AppConfig.MATCH_ENGINE
+    sanctions_repository - SanctionsRepository with the matching rules
+
+    Returns:
+    MatcherEngine
+
+    Raises:
+    ValueError - for an unknown name
+    """
+    engine_class = MATCHER_ENGINES.get(name)
+    if engine_class is None:
+        raise ValueError(f"Unknown matching engine: {name} (available: {', '.join(MATCHER_ENGINES)})")
+    return engine_class(sanctions_repository)
@@ -167,12 +167,18 @@ class PDFExporter:
             
             for person in matched_persons:
                 story.append(Paragraph(f"Osoba: {person.name} {person.surname}", normal_style))
+                if person.snapshot_version:
+                    story.append(Paragraph(f"Verzija liste sankcija: {person.snapshot_version}", normal_style))
                 
-                match_data = [["Podudarajuća imena na listi sankcija"]]
-                for name in person.matching_names:
-                    match_data.append([name])
+                # ranked best first, aliases without own score have no score
+                match_data = [["Podudarajuća imena na listi sankcija", "Prezime", "Ime", "Ukupno"]]
+                for _, name, surname_score, name_score, score in person.matches:
+                    if surname_score is None:
+                        match_data.append([name, "", "", ""])
+                    else:
+                        match_data.append([name, f"{surname_score:.0%}", f"{name_score:.0%}", f"{score:.0%}"])
                 
-                story.append(create_styled_table(match_data, [17*cm]))
+                story.append(create_styled_table(match_data, [11*cm, 2*cm, 2*cm, 2*cm]))
                 story.append(Spacer(1, 0.5*cm))
         # footer
         story.append(Spacer(1, 0.5*cm))
@@ -1,14 +1,38 @@
+import time
 import threading
+from config import AppConfig
+from utils import RunReport, profile_run
+from services.matcher_engines import MatcherEngine, CachedEngine, create_matcher_engine
+from models.person import Person
+from repositories.checkpoint_repository import CheckpointRepository, clients_key
+from repositories.spill_store import SpilledPeople
+from utils.memory import MemoryBudget, current_rss_mb, peak_rss_mb
+from utils.verdict_cache import VerdictCache
+from utils.run_metrics import RunMetrics, MetricsFileWriter, metrics_file_path
 
 class ProcessingService:
-    def __init__(self, file_repository, sanctions_repository):
+    def __init__(self, file_repository, sanctions_repository, history_repository=None,
+                 checkpoint_repository=None, verdict_cache=None):
         """
         Parameters:
         file_repository - Repository for file operations
         sanctions_repository - Repository for sanctions data operations
+        history_repository - Optional ScreeningHistoryRepository, every run is recorded in it
+        checkpoint_repository - CheckpointRepository for resumable runs, the default one
+                                when AppConfig.CHECKPOINTS is set
+        verdict_cache - VerdictCache in front of the matcher, a new one of
+                        AppConfig.VERDICT_CACHE_SIZE verdicts by default
         """
         self.file_repository = file_repository
         self.sanctions_repository = sanctions_repository
+        self.history_repository = history_repository
+        self.checkpoint_repository = checkpoint_repository
+        if checkpoint_repository is None and AppConfig.CHECKPOINTS:
+            self.checkpoint_repository = CheckpointRepository()
+        self.verdict_cache = verdict_cache if verdict_cache is not None else VerdictCache.from_config()
+        self.last_load_report = None
+        self.last_report = None
+        self.last_metrics = None
         
     def load_file_async(self, file_path, on_complete=None):
         """
@@ -23,7 +47,9 @@ class ProcessingService:
         """
         def load_thread():
             # get people from file
-            people_data, message = self.file_repository.load_people_from_file(file_path)
+            report = RunReport()
+            people_data, message = self.file_repository.load_people_from_file(file_path, report=report)
+            self.last_load_report = report
             
             if on_complete:
                 on_complete(people_data, message)
@@ -35,74 +61,385 @@ class ProcessingService:
         
         return thread
     
+    def create_engine(self, engine=None):
+        """
+        Matcher engine of a run, behind the verdict cache when there is one.
+        
+        Parameters:
+        engine - MatcherEngine or the name of one, AppConfig.MATCH_ENGINE by default
+        
+        Returns:
+        MatcherEngine
+
+        Raises:
+        ValueError - for an unknown engine name
+        """
+        if not isinstance(engine, MatcherEngine):
+            engine = create_matcher_engine(engine or AppConfig.MATCH_ENGINE, self.sanctions_repository)
+        if self.verdict_cache is not None and not isinstance(engine, CachedEngine):
+            engine = CachedEngine(engine, self.verdict_cache)
+        return engine
+    
+    @staticmethod
+    def apply_matches(person, ranked, snapshot):
+        """
+        Store the ranked matches of a client with every alias of the matched entities.
+        
+        Parameters:
+        person - Matched client
+        ranked - (position, surname_score, name_score, score) from the engine, best first
+        snapshot - SanctionsSnapshot the positions refer to
+        """
+        person.count += 1
+        person.snapshot_version = snapshot.version
+        
+        # find ALL aliases of the matching entities
+        matched_positions = {position for position, _, _, _ in ranked}
+        alias_positions = snapshot.alias_positions(
+            snapshot.entity_ids[position] for position in matched_positions
+        )
+        
+        # ranked aliases first, then the other aliases of the matched entities
+        person.matches = [
+            (snapshot.entity_ids[position], snapshot.whole_names[position],
+             surname_score, name_score, score)
+            for position, surname_score, name_score, score in ranked
+        ] + [
+            (snapshot.entity_ids[position], snapshot.whole_names[position], None, None, 0.0)
+            for position in alias_positions if position not in matched_positions
+        ]
+        
+        # store all alias names for matched entities
+        person.matching_names = [whole_name for _, whole_name, _, _, _ in person.matches]
+    
+    def screen_person(self, name, surname, sanctions_filename=None, snapshot=None, engine=None, report=None):
+        """
+        Screen a single name at once, e.g. for onboarding. Repeated names are
+        answered from the verdict cache while the snapshot stays the same.
+        
+        Parameters:
+        name - First name
+        surname - Surname
+        sanctions_filename - Sanctions files, used when no snapshot is given
+        snapshot - Optional prepared SanctionsSnapshot
+        engine - MatcherEngine or the name of one, AppConfig.MATCH_ENGINE by default
+        report - Optional RunReport for timings and cache counters
+        
+        Returns:
+        Person with its matches (empty when the name is clear), None if the
+        sanctions data could not be loaded
+        """
+        report = report if report is not None else RunReport()
+        if snapshot is None:
+            snapshot = self.sanctions_repository.load_snapshot(sanctions_filename, report=report)
+        engine = self.create_engine(engine)
+        if snapshot is None:
+            return None
+        
+        person = Person(name=name, surname=surname, oib='', address='')
+        engine.prepare(snapshot, report)
+        try:
+            with report.stage('matching'):
+                ranked = engine.match_batch([person])[0]
+        finally:
+            engine.close()
+        if ranked:
+            self.apply_matches(person, ranked, snapshot)
+        return person
+    
+    def open_checkpoint(self, people_data, snapshot, sanctions_filename, engine, resume, report):
+        """
+        Resume the checkpoint of the clients or start a new one.
+        
+        Parameters:
+        people_data - Clients of the run
+        snapshot - SanctionsSnapshot the run would use
+        sanctions_filename - Sanctions files of the run
+        engine - MatcherEngine of the run
+        resume - Whether an existing checkpoint may be resumed
+        report - RunReport, receives the checkpoint counters
+        
+        Returns:
+        (snapshot, CheckpointWriter or None, clients done, dict client index -> ranked list);
+        a resumed run gets the snapshot of its checkpoint
+        """
+        key = clients_key(people_data)
+        state = self.checkpoint_repository.load(key) if resume else None
+        if state is not None:
+            header, done, matches = state
+            checkpoint_snapshot = snapshot
+            if header.get('snapshot_version') != snapshot.version:
+                # the lists changed meanwhile, the checkpoint continues on the snapshot kept with it
+                checkpoint_snapshot = self.checkpoint_repository.load_snapshot(key, header.get('sanctions_filename'))
+                report.increment('checkpoint_snapshots_loaded')
+            if (checkpoint_snapshot is not None and header == dict(self.checkpoint_header(
+                    people_data, checkpoint_snapshot, header.get('sanctions_filename'), engine),
+                    key=header.get('key'), created_at=header.get('created_at'))):
+                checkpoint = self.checkpoint_repository.resume(key)
+                if checkpoint is not None:
+                    print(f"Resuming screening at client {done} of {len(people_data)}")
+                    report.increment('checkpoints_resumed')
+                    return checkpoint_snapshot, checkpoint, done, matches
+            print("Checkpoint does not match this run, screening from the start")
+            report.increment('checkpoints_discarded')
+        
+        header = self.checkpoint_header(people_data, snapshot, sanctions_filename, engine)
+        checkpoint = self.checkpoint_repository.start(
+            key, header, snapshot, self.sanctions_repository.snapshot_params()
+        )
+        if checkpoint is not None:
+            report.increment('checkpoints_started')
+        return snapshot, checkpoint, 0, {}
+    
+    def checkpoint_header(self, people_data, snapshot, sanctions_filename, engine):
+        """Everything a resumed run must share with the interrupted one"""
+        return {
+            'clients': len(people_data),
+            'snapshot_version': snapshot.version,
+            'aliases': len(snapshot.entity_ids),
+            'settings': repr((AppConfig.RETAINED_SCRIPTS, AppConfig.TRANSLITERATED_SCRIPTS,
+                              sorted(self.sanctions_repository.snapshot_params().items()))),
+            'engine': engine.name,
+            'top_k': AppConfig.TOP_K_CANDIDATES,
+            'sanctions_filename': sanctions_filename,
+        }
+    
     def process_data(self, sanctions_filename, people_data, 
                     on_progress=None, 
                     on_match_found=None, 
-                    on_complete=None):
+                    on_complete=None,
+                    result_writer=None,
+                    on_report=None,
+                    report=None,
+                    engine=None,
+                    snapshot=None,
+                    resume=False,
+                    on_metrics=None,
+                    on_error=None,
+                    run_name=None):
         """
         Check client list against sanctions list.
         
         Parameters:
-        sanctions_filename - CSV with sanctions data
+        sanctions_filename - EU sanctions CSV, or dict source name -> path of every list
         people_data - Clients
         on_progress - Updates UI progress bar
         on_match_found - Called when a match is found
         on_complete - Called when all checks are done
+        result_writer - Optional ResultWriter, matches are streamed to it as they are found
+        on_report - Called with the RunReport (stage timings and counters) at the end of the run
+        report - Optional RunReport to continue, e.g. one holding the download timing
+        engine - MatcherEngine or the name of one ('reference', 'index', 'ngram'),
+                 AppConfig.MATCH_ENGINE by default
+        snapshot - Optional prepared SanctionsSnapshot (e.g. RefreshService.current()),
+                   the whole run uses it even if a newer one is swapped in meanwhile
+        resume - Continue an interrupted run of the same clients from its checkpoint,
+                 against the sanctions snapshot it started with
+        on_metrics - Called with RunMetrics.values() (throughput, ETA, stage, memory)
+                     at most every AppConfig.METRICS_UI_INTERVAL seconds and at the end
+        on_error - Called with an error message instead of on_complete when the run
+                   fails (sanctions data not loaded, matching or recording raised)
+        run_name - Name of the run among concurrent ones (batch file, shard), its metrics
+                   get a run label and their own file (see metrics_file_path)
         
         Returns:
         thread - The thread that is running the process
         """
-        def process_thread():
+        run_report = report if report is not None else RunReport()
+        # file loading happened before the run, it is part of the same report
+        run_report.merge(self.last_load_report)
+        self.last_report = run_report
+        engine = self.create_engine(engine)
+        
+        # live metrics for the UI and the metrics file
+        labels = {'engine': engine.name}
+        if run_name:
+            labels['run'] = run_name
+        metrics = RunMetrics(len(people_data), labels=labels)
+        self.last_metrics = metrics
+        last_published = [0.0]
+        
+        def publish_metrics(force=False):
+            if on_metrics and (force or time.monotonic() - last_published[0] >= AppConfig.METRICS_UI_INTERVAL):
+                last_published[0] = time.monotonic()
+                with run_report.stage('ui_updates'):
+                    on_metrics(metrics.values())
+
+        def screen():
             # get sanctions data 
-            person_names = self.sanctions_repository.process_sanctions_data(sanctions_filename)
-            if person_names is None:
-                if on_complete:
-                    on_complete(0, 0)
-                return
+            metrics.set_stage('sanctions')
+            publish_metrics(force=True)
+            run_snapshot = snapshot
+            if run_snapshot is None:
+                run_snapshot = self.sanctions_repository.load_snapshot(
+                    sanctions_filename, report=run_report
+                )
+            if run_snapshot is None:
+                return 0, 0
                 
             total_people = len(people_data)
             match_count = 0
             
-            # check each client against sanctions list
-            for idx, person in enumerate(people_data):
-                # Update progress bar
-                if on_progress:
-                    on_progress(idx, total_people)
-                
-                # find matches for this person
-                filtered_names = self.sanctions_repository.find_person_by_name(
-                    person_names, person.name, person.surname
-                )
-                
-                if not filtered_names.empty:
-                    person.count += 1
+            # chunks screened before an interruption are replayed from the checkpoint
+            checkpoint, resumed_count, resumed_matches = None, 0, {}
+            if self.checkpoint_repository is not None:
+                with run_report.stage('checkpoint'):
+                    run_snapshot, checkpoint, resumed_count, resumed_matches = self.open_checkpoint(
+                        people_data, run_snapshot, sanctions_filename, engine, resume, run_report
+                    )
+            run_report.increment('clients_resumed', resumed_count)
+            metrics.set_label('snapshot_version', run_snapshot.version)
+            if run_snapshot.missing_sources:
+                # screened without some lists, the result must say so
+                print(f"Warning: screening without the {', '.join(run_snapshot.missing_sources)} sanctions lists")
+                run_report.increment('sanctions_lists_missing', len(run_snapshot.missing_sources))
+                metrics.set_label('missing_lists', ",".join(run_snapshot.missing_sources))
+            
+            metrics.set_stage('prepare')
+            engine.prepare(run_snapshot, run_report)
+            history = None
+            if self.history_repository is not None:
+                history = self.history_repository.start_run(run_snapshot, engine.name, total_people)
+            
+            # over the memory budget the chunks, and with them the candidate sets, get smaller
+            budget = MemoryBudget.from_config()
+            chunk_size = AppConfig.MATCH_CHUNK_SIZE
+            
+            metrics.set_stage('screening')
+            try:
+                # clients are matched chunk by chunk by the engine,
+                # results are handled in client order
+                chunk_start = 0
+                while chunk_start < total_people:
+                    if budget is not None:
+                        chunk_size = budget.chunk_size(chunk_size, run_report)
+                    chunk = people_data[chunk_start:chunk_start + chunk_size]
+                    replayed = max(0, min(len(chunk), resumed_count - chunk_start))
+                    chunk_results = [resumed_matches.get(chunk_start + offset, []) for offset in range(replayed)]
+                    if replayed < len(chunk):
+                        chunk_results += engine.match_batch(chunk[replayed:])
                     
-                    # get IDs of all matching entities
-                    matching_ids = filtered_names['Entity_LogicalId'].unique()
+                    for offset, (person, ranked) in enumerate(zip(chunk, chunk_results)):
+                        # Update progress bar
+                        if on_progress:
+                            with run_report.stage('ui_updates'):
+                                on_progress(chunk_start + offset, total_people)
+                        run_report.increment('clients_screened')
+                        
+                        if not ranked:
+                            if history:
+                                with run_report.stage('history'):
+                                    history.record_person(person, False)
+                            continue
+                        
+                        with run_report.stage('alias_expansion'):
+                            self.apply_matches(person, ranked, run_snapshot)
+                        
+                        # add to results and update counter
+                        if on_match_found:
+                            with run_report.stage('ui_updates'):
+                                on_match_found(person)
+                        if result_writer:
+                            with run_report.stage('result_export'):
+                                result_writer.write_person(person)
+                        if history:
+                            with run_report.stage('history'):
+                                history.record_person(person, True)
+                        match_count += 1
+                        run_report.increment('matches')
                     
-                    # find ALL aliases for these IDs
-                    all_aliases = person_names[person_names['Entity_LogicalId'].isin(matching_ids)]
+                    if checkpoint and replayed < len(chunk):
+                        with run_report.stage('checkpoint'):
+                            checkpoint.write_chunk(chunk_start + len(chunk), [
+                                (chunk_start + offset, ranked)
+                                for offset, ranked in enumerate(chunk_results) if ranked and offset >= replayed
+                            ])
                     
-                    # store all alias names for matched entities
-                    person.matching_names = []
-                    for whole_name in all_aliases['NameAlias_WholeName'].tolist():
-                        if isinstance(whole_name, list):
-                            person.matching_names.extend(whole_name)
-                        else:
-                            person.matching_names.append(whole_name)
+                    # screened clients of a spilled list go back to disk with their matches
+                    if isinstance(people_data, SpilledPeople):
+                        with run_report.stage('spill'):
+                            people_data.store(chunk_start, chunk)
+                    rss = current_rss_mb()
+                    if rss is not None:
+                        run_report.observe('rss_mb', int(rss))
+                    chunk_start += len(chunk)
                     
-                    # add to results and update counter
-                    if person.count > 0:
-                        if on_match_found:
-                            on_match_found(person)
-                        match_count += 1
+                    # replayed chunks do not count for the throughput
+                    if replayed == len(chunk):
+                        metrics.skip(chunk_start)
+                    else:
+                        metrics.update(chunk_start, match_count)
+                    publish_metrics()
+                
+                peak = peak_rss_mb()
+                if peak is not None:
+                    run_report.increment('peak_rss_mb', int(peak))
+                
+                metrics.update(total_people, match_count)
+                metrics.set_stage('finishing')
+                
+                # a finished run needs no checkpoint
+                if checkpoint:
+                    checkpoint.close()
+                    self.checkpoint_repository.remove(clients_key(people_data))
+                    checkpoint = None
+                if history:
+                    with run_report.stage('history'):
+                        history.finish(match_count)
+                    history = None
+            finally:
+                engine.close()
+                if history:
+                    history.close()
+                if checkpoint:
+                    checkpoint.close()
             
             # show 100% complete when finished
             if on_progress:
                 on_progress(total_people, total_people)
-                
+
+            return match_count, total_people
+
+        def process_thread():
+            metrics_file = None
+            if AppConfig.METRICS_FILE_PATH:
+                metrics_file = MetricsFileWriter(metrics, metrics_file_path(run_name))
+                metrics_file.start()
+            error = None
+            match_count, total_people = 0, len(people_data)
+            try:
+                with profile_run(run_report, AppConfig.PROFILER, AppConfig.PROFILE_OUTPUT_DIR):
+                    match_count, total_people = screen()
+                # no total when the sanctions data could not be loaded
+                if people_data and not total_people:
+                    failed_sources = self.sanctions_repository.failed_sources
+                    error = (AppConfig.MSG_SOURCES_FAILED.format(", ".join(failed_sources)) if failed_sources
+                             else AppConfig.MSG_SANCTIONS_LOAD_ERROR)
+            except Exception as e:
+                # a crashed screening must never look like a clean one
+                error = f"Error screening clients: {e}"
+                print(error)
+            finally:
+                metrics.finish('failed' if error else 'done')
+                if metrics_file:
+                    metrics_file.stop()
+                publish_metrics(force=True)
+                if result_writer:
+                    result_writer.close()
+
+            if AppConfig.RUN_REPORT_PATH:
+                try:
+                    run_report.save(AppConfig.RUN_REPORT_PATH)
+                except Exception as e:
+                    print(f"Error saving run report: {e}")
+            if on_report:
+                on_report(run_report)
+
             # report final results
-            if on_complete:
+            if error:
+                if on_error:
+                    on_error(error)
+            elif on_complete:
                 on_complete(match_count, total_people)
 
         # run in background
@@ -0,0 +1,135 @@
+import os
+import threading
+from config import AppConfig
+from utils import RunReport
+
+
+class RefreshService:
+    """
+    Keeps a prepared sanctions snapshot current.
+
+    A background thread downloads the lists every interval seconds and
+    prepares the snapshot of the new files off the screening path. Only a
+    complete set of AppConfig.SANCTIONS_SOURCES with a new version replaces
+    the current snapshot, in one reference assignment: screening runs that
+    already took a snapshot keep it, the next run gets the new one. Files of
+    replaced and rejected downloads are deleted.
+    """
+
+    def __init__(self, download_service, sanctions_repository, interval=None):
+        """
+        Parameters:
+        download_service - DownloadService used to fetch the lists
+        sanctions_repository - Repository that prepares the snapshot
+        interval - Seconds between checks, None checks only once
+        """
+        self.download_service = download_service
+        self.sanctions_repository = sanctions_repository
+        self.interval = interval
+        self.last_report = None
+        # lists missing from the last refresh, the current snapshot was kept
+        self.failed_sources = []
+        # (dict source name -> path, SanctionsSnapshot), replaced as a whole
+        self._current = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def current(self):
+        """
+        Files and snapshot to screen against.
+
+        Returns:
+        (files, SanctionsSnapshot), (None, None) before the first refresh
+        """
+        return self._current or (None, None)
+
+    def refresh(self):
+        """
+        Download the lists and swap in their snapshot when the version changed
+        and every list of AppConfig.SANCTIONS_SOURCES was downloaded and parsed.
+        Otherwise the current snapshot is kept and failed_sources names the
+        missing lists.
+
+        Returns:
+        (changed, files, snapshot) - files and snapshot are the current ones, None if
+        nothing could be loaded yet
+        """
+        with self._lock:
+            files = self.download_service.download()
+            report = RunReport()
+            report.merge(self.download_service.last_report)
+            self.last_report = report
+            snapshot = self.sanctions_repository.load_snapshot(files, report=report) if files else None
+
+            current_files, current_snapshot = self.current()
+            self.failed_sources = sorted(set(
+                [name for name in AppConfig.SANCTIONS_SOURCES if name not in (files or {})]
+                + self.download_service.failed_sources
+                + (self.sanctions_repository.failed_sources if files else [])
+                + (snapshot.missing_sources if snapshot is not None else [])
+            ))
+            if snapshot is None or self.failed_sources:
+                # an incomplete refresh never replaces a complete snapshot
+                print(f"Sanctions refresh incomplete, keeping the current lists: {', '.join(self.failed_sources)}")
+                self._remove_files(files, current_files)
+                return False, current_files, current_snapshot
+
+            if current_snapshot is not None and snapshot.version == current_snapshot.version:
+                # same lists again, the new download is not needed
+                self._remove_files(files, current_files)
+                return False, current_files, current_snapshot
+
+            self._current = (files, snapshot)
+            # the replaced version is no longer screened against by new runs
+            self._remove_files(current_files, files)
+            return True, files, snapshot
+
+    @classmethod
+    def _remove_files(cls, files, kept_files):
+        """Delete the files of a download, except those also in kept_files"""
+        kept_paths = set((kept_files or {}).values())
+        for path in (files or {}).values():
+            if path not in kept_paths:
+                cls._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def start(self, on_refresh=None):
+        """
+        Refresh now and then every interval seconds in a background thread.
+
+        Parameters:
+        on_refresh - Called with (changed, files, snapshot) after every check
+
+        Returns:
+        thread - The scheduler thread
+        """
+        self._stop.clear()
+
+        def refresh_thread():
+            while True:
+                try:
+                    result = self.refresh()
+                except Exception as e:
+                    print(f"Error refreshing sanctions data: {e}")
+                    result = (False,) + self.current()
+                if on_refresh:
+                    on_refresh(*result)
+                if self.interval is None or self._stop.wait(self.interval):
+                    break
+
+        self._thread = threading.Thread(target=refresh_thread)
+        self._thread.daemon = True
+        self._thread.start()
+
+        return self._thread
+
+    def stop(self):
+        """Stop the scheduler after the running check"""
+        self._stop.set()
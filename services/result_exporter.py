@@ -0,0 +1,204 @@
+import os
+import csv
+import json
+import importlib.util
+from abc import ABC, abstractmethod
+
+from config import AppConfig
+
+
+def person_result_rows(person):
+    """
+    Flatten a matched person into one row per sanctions alias.
+
+    Parameters:
+    person - Person object with filled matches
+
+    Returns:
+    generator of dicts with keys from AppConfig.RESULT_EXPORT_FIELDS
+    """
+    for entity_id, whole_name, surname_score, name_score, score in person.matches:
+        yield {
+            'OIB': person.oib,
+            'IME': person.name,
+            'PREZIME': person.surname,
+            'ADRESA': person.address,
+            'Entity_LogicalId': entity_id,
+            'NameAlias_WholeName': whole_name,
+            'surname_score': surname_score,
+            'name_score': name_score,
+            'match_score': score,
+            'snapshot_version': person.snapshot_version,
+        }
+
+
+class ResultWriter(ABC):
+    """
+    Base class for streaming result writers.
+
+    Rows are written as soon as a person is passed to write_person, so the
+    full result set never has to be kept in memory.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.rows_written = 0
+
+    def write_person(self, person):
+        """
+        Write all result rows of one matched person.
+
+        Parameters:
+        person - Person object with filled matches
+        """
+        for row in person_result_rows(person):
+            self._write_row(row)
+            self.rows_written += 1
+
+    def write_people(self, people):
+        """Write every person from an iterable"""
+        for person in people:
+            self.write_person(person)
+
+    @abstractmethod
+    def _write_row(self, row):
+        """Write one result row (dict with the AppConfig.RESULT_EXPORT_FIELDS keys)"""
+
+    @abstractmethod
+    def close(self):
+        """Flush and close the output file"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class CSVResultWriter(ResultWriter):
+
+    def __init__(self, file_path):
+        super().__init__(file_path)
+        self._file = open(file_path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=AppConfig.RESULT_EXPORT_FIELDS)
+        self._writer.writeheader()
+
+    def _write_row(self, row):
+        self._writer.writerow(row)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class JSONLinesResultWriter(ResultWriter):
+
+    def __init__(self, file_path):
+        super().__init__(file_path)
+        self._file = open(file_path, 'w', encoding='utf-8')
+
+    def _write_row(self, row):
+        self._file.write(json.dumps(row, ensure_ascii=False, default=str))
+        self._file.write('\n')
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class ParquetResultWriter(ResultWriter):
+    """
+    Writes rows in row groups of AppConfig.RESULT_EXPORT_BATCH_SIZE,
+    only one row group is buffered at a time. Requires pyarrow.
+    """
+
+    def __init__(self, file_path):
+        super().__init__(file_path)
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([
+            ('OIB', pa.string()),
+            ('IME', pa.string()),
+            ('PREZIME', pa.string()),
+            ('ADRESA', pa.string()),
+            ('Entity_LogicalId', pa.string()),
+            ('NameAlias_WholeName', pa.string()),
+            ('surname_score', pa.float64()),
+            ('name_score', pa.float64()),
+            ('match_score', pa.float64()),
+            ('snapshot_version', pa.string()),
+        ])
+        self._writer = pq.ParquetWriter(file_path, self._schema)
+        self._buffer = {field: [] for field in AppConfig.RESULT_EXPORT_FIELDS}
+
+    def _write_row(self, row):
+        for field in AppConfig.RESULT_EXPORT_FIELDS:
+            value = row[field]
+            if field in ('surname_score', 'name_score', 'match_score'):
+                value = float(value) if value is not None else None
+            elif value is not None:
+                value = str(value)
+            self._buffer[field].append(value)
+
+        if len(self._buffer['OIB']) >= AppConfig.RESULT_EXPORT_BATCH_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer['OIB']:
+            return
+        table = self._pa.Table.from_pydict(self._buffer, schema=self._schema)
+        self._writer.write_table(table)
+        self._buffer = {field: [] for field in AppConfig.RESULT_EXPORT_FIELDS}
+
+    def close(self):
+        if self._writer is not None:
+            self._flush()
+            self._writer.close()
+            self._writer = None
+
+
+RESULT_WRITERS = {
+    '.csv': CSVResultWriter,
+    '.jsonl': JSONLinesResultWriter,
+    '.parquet': ParquetResultWriter,
+}
+
+
+def available_export_formats():
+    """
+    File extensions create_result_writer can write with the installed packages.
+
+    Returns:
+    list of extensions, .parquet only when pyarrow is installed
+    """
+    formats = list(RESULT_WRITERS)
+    if importlib.util.find_spec('pyarrow') is None:
+        formats.remove('.parquet')
+    return formats
+
+
+def create_result_writer(file_path):
+    """
+    Create a writer based on the file extension.
+
+    Parameters:
+    file_path - Output path (.csv, .jsonl or .parquet)
+
+    Returns:
+    ResultWriter, or None if the format is not supported
+    """
+    file_ext = os.path.splitext(file_path)[1].lower()
+    writer_class = RESULT_WRITERS.get(file_ext)
+
+    if writer_class is None:
+        print(f"Unsupported export format: {file_ext}")
+        return None
+
+    try:
+        return writer_class(file_path)
+    except ImportError:
+        print("Parquet export requires the pyarrow package")
+        return None
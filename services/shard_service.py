@@ -0,0 +1,409 @@
+import os
+import json
+import time
+import zlib
+import shutil
+import socket
+import threading
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from config import AppConfig
+from utils import RunReport
+from repositories.file_repository import FileRepository
+from repositories.sanctions_repository import SanctionsRepository, file_version
+from repositories.checkpoint_repository import CheckpointRepository
+from services.processing_service import ProcessingService
+from services.result_exporter import CSVResultWriter
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def shard_of(oib, shard_count):
+    """Shard of a client, the same on every machine and Python version"""
+    return zlib.crc32(str(oib).strip().encode('utf-8')) % shard_count
+
+
+def shard_name(index):
+    return f"shard_{index:04d}"
+
+
+def write_json(file_path, data):
+    """Write JSON through a temp file and rename, readers never see a partial file"""
+    temp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+    os.replace(temp_path, file_path)
+
+
+def read_json(file_path):
+    with open(file_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+class ShardService:
+    """
+    Screening of one client file split into shards that independent workers
+    (processes or machines) screen through a shared job directory.
+
+    plan writes the shard files, a copy of the sanctions lists and the
+    manifest; work claims shards with exclusive lock files and writes the
+    results of each shard with a done record; merge checks every shard
+    against the manifest and combines the results.
+    """
+
+    def __init__(self, job_dir):
+        """
+        Parameters:
+        job_dir - Job directory on a filesystem shared by all workers
+        """
+        self.job_dir = job_dir
+        self.manifest_path = os.path.join(job_dir, MANIFEST_NAME)
+
+    def path(self, name):
+        return os.path.join(self.job_dir, name)
+
+    def plan(self, client_file, sanctions_filename, shard_count):
+        """
+        Split a client file into shards by OIB and write the manifest.
+
+        Parameters:
+        client_file - CSV or Excel client file
+        sanctions_filename - EU sanctions CSV, or dict source name -> path of the lists
+        shard_count - Number of shards
+
+        Returns:
+        dict - manifest, None if the client file could not be read
+        """
+        df, error = FileRepository().load_client_table(client_file)
+        if df is None:
+            print(f"Error planning shards: {error}")
+            return None
+
+        os.makedirs(self.job_dir, exist_ok=True)
+
+        # workers screen against copies of the lists, so every shard uses the same version
+        files = sanctions_filename if isinstance(sanctions_filename, dict) else {'eu': sanctions_filename}
+        sanctions_dir = self.path('sanctions')
+        os.makedirs(sanctions_dir, exist_ok=True)
+        sanctions = {}
+        for name, path in files.items():
+            target = os.path.join(sanctions_dir, f"{name}{os.path.splitext(path)[1]}")
+            shutil.copyfile(path, target)
+            sanctions[name] = {'file': os.path.relpath(target, self.job_dir), 'version': file_version(target)}
+
+        shard_indexes = df['OIB'].map(lambda oib: shard_of(oib, shard_count))
+        shards = []
+        for index in range(shard_count):
+            shard_file = self.path(f"{shard_name(index)}.csv")
+            df[shard_indexes == index].to_csv(shard_file, index=False)
+            shards.append({'index': index, 'file': os.path.basename(shard_file),
+                           'clients': int((shard_indexes == index).sum()), 'checksum': file_version(shard_file)})
+
+        manifest = {
+            'client_file': os.path.abspath(client_file),
+            'client_file_version': file_version(client_file),
+            'clients': len(df),
+            'shard_count': shard_count,
+            'sanctions': sanctions,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'shards': shards,
+        }
+        write_json(self.manifest_path, manifest)
+        return manifest
+
+    def sanctions_files(self, manifest):
+        return {name: self.path(info['file']) for name, info in manifest['sanctions'].items()}
+
+    def lock_path(self, index):
+        return self.path(f"{shard_name(index)}.lock")
+
+    @staticmethod
+    def lock_owner():
+        """Hostname and pid of this worker, written at the start of its lock files"""
+        return f"{socket.gethostname()} {os.getpid()}"
+
+    @staticmethod
+    def read_lock_owner(lock_path):
+        """Owner written in a lock file, None when it is gone"""
+        try:
+            with open(lock_path, encoding='utf-8') as f:
+                return " ".join(f.read().split()[:2])
+        except OSError:
+            return None
+
+    def owns(self, index):
+        return self.read_lock_owner(self.lock_path(index)) == self.lock_owner()
+
+    def claim(self, index):
+        """
+        Claim a shard with an exclusive lock file. The owner keeps the lock fresh
+        (heartbeat), a lock not touched for AppConfig.SHARD_LOCK_TIMEOUT seconds
+        belongs to a lost worker and is taken over.
+
+        Returns:
+        bool - whether this worker owns the shard
+        """
+        name = shard_name(index)
+        if os.path.exists(self.path(f"{name}.done.json")):
+            return False
+
+        lock_path = self.lock_path(index)
+        try:
+            stale = time.time() - os.path.getmtime(lock_path) > AppConfig.SHARD_LOCK_TIMEOUT
+        except OSError:
+            stale = False
+        if stale and not self._take_over(lock_path):
+            return False
+
+        try:
+            handle = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(handle, 'w') as f:
+            f.write(f"{self.lock_owner()} {datetime.now().isoformat(timespec='seconds')}")
+        return True
+
+    def _take_over(self, lock_path):
+        """
+        Move a stale lock out of the way. The rename is atomic, so of several
+        workers seeing the same stale lock only one moves it; a lock that was
+        renewed in the meantime is put back.
+
+        Returns:
+        bool - whether the stale lock was removed
+        """
+        moved_path = f"{lock_path}.{socket.gethostname()}.{os.getpid()}.stale"
+        try:
+            os.rename(lock_path, moved_path)
+        except OSError:
+            # another worker took it over first
+            return False
+        try:
+            if time.time() - os.path.getmtime(moved_path) <= AppConfig.SHARD_LOCK_TIMEOUT:
+                # fresh lock of a worker that claimed the shard since it was checked
+                try:
+                    os.link(moved_path, lock_path)
+                except OSError:
+                    pass
+                return False
+            print(f"Taking over the stale lock of {self.read_lock_owner(moved_path)}: {lock_path}")
+            return True
+        finally:
+            try:
+                os.remove(moved_path)
+            except OSError:
+                pass
+
+    def release(self, index):
+        """Remove the lock of a shard, only when this worker still owns it"""
+        lock_path = self.lock_path(index)
+        if not self.owns(index):
+            print(f"Lock {lock_path} is no longer held by this worker, left in place")
+            return
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass
+
+    def heartbeat(self, index, stop):
+        """
+        Touch the lock of a shard every AppConfig.SHARD_LOCK_HEARTBEAT seconds
+        until stop is set, so a long shard is not taken over as stale.
+
+        Parameters:
+        index - Claimed shard
+        stop - threading.Event set when the shard is done
+        """
+        lock_path = self.lock_path(index)
+        while not stop.wait(AppConfig.SHARD_LOCK_HEARTBEAT):
+            if not self.owns(index):
+                print(f"Lock {lock_path} was taken over by {self.read_lock_owner(lock_path)}")
+                return
+            try:
+                os.utime(lock_path)
+            except OSError as e:
+                print(f"Error renewing lock {lock_path}: {e}")
+
+    def work(self, sanctions_repository=None, max_shards=None):
+        """
+        Screen unclaimed shards until none are left.
+
+        Parameters:
+        sanctions_repository - Optional SanctionsRepository, reused between shards
+        max_shards - Stop after this many shards, None for no limit
+
+        Returns:
+        list of screened shard indexes
+        """
+        manifest = read_json(self.manifest_path)
+        sanctions_repository = sanctions_repository or SanctionsRepository()
+        screened = []
+        for shard in manifest['shards']:
+            if max_shards is not None and len(screened) >= max_shards:
+                break
+            if not self.claim(shard['index']):
+                continue
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=self.heartbeat, args=(shard['index'], stop))
+            heartbeat.daemon = True
+            heartbeat.start()
+            try:
+                if self.screen_shard(manifest, shard, sanctions_repository):
+                    screened.append(shard['index'])
+            finally:
+                stop.set()
+                heartbeat.join()
+                self.release(shard['index'])
+        return screened
+
+    def screen_shard(self, manifest, shard, sanctions_repository):
+        """
+        Screen one claimed shard and write its results and done record.
+
+        Returns:
+        bool - whether the shard was screened
+        """
+        name = shard_name(shard['index'])
+        shard_file = self.path(shard['file'])
+        if file_version(shard_file) != shard['checksum']:
+            print(f"Shard file {shard_file} does not match the manifest")
+            return False
+
+        report = RunReport()
+        snapshot = sanctions_repository.load_snapshot(self.sanctions_files(manifest), report=report)
+        if snapshot is None:
+            return False
+
+        file_repository = FileRepository()
+        people, message = file_repository.load_people_from_file(shard_file, report=report)
+        people = people or []
+
+        # results are written under a temp name and renamed when complete
+        results_file = self.path(f"{name}_results.csv")
+        temp_file = f"{results_file}.{os.getpid()}.tmp"
+        result_writer = CSVResultWriter(temp_file)
+        match_count = []
+
+        # a shard taken over from a lost worker continues from its checkpoint
+        processing_service = ProcessingService(file_repository, sanctions_repository,
+                                               checkpoint_repository=CheckpointRepository(self.path('checkpoints')))
+        processing_service.process_data(
+            sanctions_filename=None,
+            people_data=people,
+            on_complete=lambda matches, total: match_count.append(matches),
+            result_writer=result_writer,
+            report=report,
+            snapshot=snapshot,
+            resume=True,
+            run_name=name
+        ).join()
+        if not match_count:
+            # the run failed, a retry screens the shard again
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+            return False
+        os.replace(temp_file, results_file)
+
+        write_json(self.path(f"{name}.done.json"), {
+            'index': shard['index'],
+            'clients': len(people),
+            'matches': match_count[0],
+            'rows': result_writer.rows_written,
+            'snapshot_version': snapshot.version,
+            'results_file': os.path.basename(results_file),
+            'results_checksum': file_version(results_file),
+            'worker': f"{socket.gethostname()}:{os.getpid()}",
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+        })
+        return True
+
+    def status(self):
+        """
+        Check every shard against the manifest.
+
+        Returns:
+        (done records by shard index, list of problems)
+        """
+        manifest = read_json(self.manifest_path)
+        done = {}
+        problems = []
+        versions = set()
+        for shard in manifest['shards']:
+            name = shard_name(shard['index'])
+            done_path = self.path(f"{name}.done.json")
+            if not os.path.exists(done_path):
+                problems.append(f"{name}: not screened")
+                continue
+            record = read_json(done_path)
+            results_file = self.path(record['results_file'])
+            if record['clients'] != shard['clients']:
+                problems.append(f"{name}: {record['clients']} of {shard['clients']} clients screened")
+            elif not os.path.exists(results_file) or file_version(results_file) != record['results_checksum']:
+                problems.append(f"{name}: results file missing or changed")
+            else:
+                done[shard['index']] = record
+                versions.add(record['snapshot_version'])
+        if len(versions) > 1:
+            problems.append(f"shards were screened against different list versions: {', '.join(sorted(versions))}")
+        return done, problems
+
+    def merge(self, output_path):
+        """
+        Combine the shard results into one CSV after checking completeness.
+
+        Parameters:
+        output_path - Merged results CSV
+
+        Returns:
+        dict - merge summary, None when shards are missing or invalid
+        """
+        done, problems = self.status()
+        if problems:
+            for problem in problems:
+                print(f"Cannot merge: {problem}")
+            return None
+
+        manifest = read_json(self.manifest_path)
+        temp_path = f"{output_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', newline='', encoding='utf-8') as output:
+            for position, index in enumerate(sorted(done)):
+                with open(self.path(done[index]['results_file']), encoding='utf-8') as f:
+                    header = f.readline()
+                    if position == 0:
+                        output.write(header)
+                    shutil.copyfileobj(f, output)
+        os.replace(temp_path, output_path)
+
+        summary = {
+            'output': os.path.abspath(output_path),
+            'clients': sum(record['clients'] for record in done.values()),
+            'matches': sum(record['matches'] for record in done.values()),
+            'rows': sum(record['rows'] for record in done.values()),
+            'snapshot_version': next(iter(done.values()))['snapshot_version'] if done else None,
+            'merged_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        manifest['merged'] = summary
+        write_json(self.manifest_path, manifest)
+        return summary
+
+
+def work_shards(job_dir):
+    """Worker process entry point, screens shards until none are left"""
+    return ShardService(job_dir).work()
+
+
+def run_local_workers(job_dir, processes):
+    """
+    Screen a planned job with worker processes on this machine.
+
+    Parameters:
+    job_dir - Planned job directory
+    processes - Number of worker processes
+
+    Returns:
+    list of shard indexes screened by each process
+    """
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(work_shards, [job_dir] * processes))
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import AppConfig
+
+
+@pytest.fixture(autouse=True)
+def isolated_config(tmp_path, monkeypatch):
+    """Runs write their history, checkpoints and snapshot store to the test's temp dir"""
+    monkeypatch.setattr(AppConfig, 'HISTORY_DB_PATH', '')
+    monkeypatch.setattr(AppConfig, 'CHECKPOINT_DIR', str(tmp_path / 'checkpoints'))
+    monkeypatch.setattr(AppConfig, 'SNAPSHOT_STORE_DIR', str(tmp_path / 'store'))
+    monkeypatch.setattr(AppConfig, 'METRICS_FILE_PATH', None)
@@ -0,0 +1,88 @@
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.generators import write_sanctions_csv, write_clients_csv
+from config import AppConfig
+from repositories.file_repository import FileRepository
+from repositories.sanctions_repository import SanctionsRepository
+from repositories.snapshot_store import save_snapshot_file
+from services.matcher_engines import IndexEngine
+
+WORKERS = 8
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """(sanctions file, clients) of a small generated corpus with planted matches"""
+    sanctions_file = str(tmp_path / 'sanctions.csv')
+    clients_file = str(tmp_path / 'clients.csv')
+    entities = write_sanctions_csv(sanctions_file, 300, seed=3)
+    write_clients_csv(clients_file, 300, entities=entities, planted_ratio=0.2, seed=3)
+    people, _ = FileRepository().load_people_from_file(clients_file)
+    return sanctions_file, people
+
+
+def snapshot_digest(snapshot, tmp_path):
+    """Digest of every alias column and index array of a snapshot"""
+    file_path = str(tmp_path / 'digest.idx')
+    save_snapshot_file(snapshot, file_path, SanctionsRepository.snapshot_params())
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def file_digest(file_path):
+    """Digest of the bytes of a file"""
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def run_serial_and_threaded(function, people):
+    """(serial results, thread pool results) of function over people"""
+    serial = [function(person) for person in people]
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        threaded = list(executor.map(function, people))
+    return serial, threaded
+
+
+@pytest.mark.parametrize('stored', [False, True], ids=['built', 'mapped'])
+def test_threaded_matching_equals_serial_and_leaves_snapshot_unchanged(corpus, tmp_path, monkeypatch, stored):
+    sanctions_file, people = corpus
+    repository = SanctionsRepository()
+    snapshot = repository.load_snapshot(sanctions_file)
+    if stored:
+        # a second repository maps the file the first one stored
+        repository = SanctionsRepository()
+        snapshot = repository.load_snapshot(sanctions_file)
+        assert snapshot.store_file is not None
+        store_before = file_digest(snapshot.store_file)
+    before = snapshot_digest(snapshot, tmp_path)
+
+    engine = IndexEngine(repository)
+    engine.prepare(snapshot)
+
+    def rank(person):
+        return repository.rank_matches(snapshot, person.name, person.surname)
+
+    def positions(person):
+        return repository.match_positions(snapshot, person.name, person.surname).tolist()
+
+    for function in (rank, positions, engine.match_client):
+        serial, threaded = run_serial_and_threaded(function, people)
+        assert threaded == serial
+    assert any(serial), "the corpus has planted matches"
+
+    # the engine with its own worker threads
+    serial = [engine.match_client(person) for person in people]
+    monkeypatch.setattr(AppConfig, 'MATCH_WORKERS', WORKERS)
+    threaded_engine = IndexEngine(repository)
+    threaded_engine.prepare(snapshot)
+    try:
+        assert threaded_engine.match_batch(people) == serial
+    finally:
+        threaded_engine.close()
+
+    assert snapshot_digest(snapshot, tmp_path) == before
+    if stored:
+        assert file_digest(snapshot.store_file) == store_before
@@ -0,0 +1,6 @@
+from benchmarks import match_quality
+
+
+def test_index_engine_agrees_with_reference_on_default_settings():
+    """The shipped settings must report every (client, entity) pair the reference rules match"""
+    assert match_quality.main(['--engine', 'index', '--strict', '--clients', '300', '--sanctions', '500']) == 0
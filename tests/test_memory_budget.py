@@ -0,0 +1,53 @@
+import os
+
+from benchmarks.generators import write_sanctions_csv, write_clients_csv
+from benchmarks.memory_budget import run_child
+from config import AppConfig
+from utils import memory
+from utils.memory import MemoryBudget
+
+
+def test_budgeted_run_spills_stays_under_budget_and_exports_same_results(tmp_path):
+    sanctions_file = str(tmp_path / 'sanctions.csv')
+    clients_file = str(tmp_path / 'clients.csv')
+    entities = write_sanctions_csv(sanctions_file, 500, seed=1)
+    write_clients_csv(clients_file, 20000, entities=entities, seed=1)
+    # the runs store their snapshot under the test's temp dir
+    env = dict(os.environ, HOME=str(tmp_path))
+
+    unbudgeted_file = str(tmp_path / 'results_unbudgeted.csv')
+    unbudgeted = run_child(clients_file, sanctions_file, unbudgeted_file, None, env=env)
+    assert unbudgeted['spilled_clients'] == 0
+
+    # just over the unbudgeted peak, so spilling starts (at MEMORY_SPILL_RATIO) during the run
+    budget_mb = int(unbudgeted['peak_rss_mb']) + 15
+    budgeted_file = str(tmp_path / 'results_budgeted.csv')
+    budgeted = run_child(clients_file, sanctions_file, budgeted_file, budget_mb, env=env)
+
+    assert budgeted['spilled_clients'] > 0
+    assert budgeted['spill_reads'] > 0
+    assert budgeted['chunk_size_reductions'] > 0
+    assert budgeted['peak_rss_mb'] < budget_mb
+    assert budgeted['matches'] == unbudgeted['matches'] > 0
+    with open(unbudgeted_file, 'rb') as a, open(budgeted_file, 'rb') as b:
+        assert a.read() == b.read()
+
+
+def test_chunk_size_halves_over_budget_and_grows_back(monkeypatch):
+    monkeypatch.setattr(AppConfig, 'MATCH_CHUNK_SIZE', 1000)
+    monkeypatch.setattr(AppConfig, 'MEMORY_MIN_CHUNK_SIZE', 100)
+    budget = MemoryBudget(100)
+
+    monkeypatch.setattr(memory, 'current_rss_mb', lambda: 90)
+    assert budget.chunk_size(1000) == 500
+    assert budget.chunk_size(150) == 100
+    assert budget.chunk_size(100) == 100
+
+    # between the grow and the spill ratio the size is kept
+    monkeypatch.setattr(memory, 'current_rss_mb', lambda: 60)
+    assert budget.chunk_size(250) == 250
+
+    monkeypatch.setattr(memory, 'current_rss_mb', lambda: 30)
+    assert budget.chunk_size(250) == 500
+    assert budget.chunk_size(500) == 1000
+    assert budget.chunk_size(1000) == 1000
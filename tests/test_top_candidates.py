@@ -0,0 +1,30 @@
+from benchmarks.generators import write_sanctions_csv, write_clients_csv
+from repositories.file_repository import FileRepository
+from repositories.sanctions_repository import SanctionsRepository
+from utils.name_indexes import TopCandidates
+
+
+def test_bound_ties_follow_the_push_tie_break():
+    top = TopCandidates(1)
+    top.push(5, 0.9, 0.9, 0.9)
+    # an alias at a lower position with the same score would still replace the kept one
+    assert not top.cannot_improve(0.9, lowest_position=3)
+    top.push(3, 0.9, 0.9, 0.9)
+    assert top.ranked()[0][0] == 3
+    assert top.cannot_improve(0.9, lowest_position=4)
+    assert top.cannot_improve(0.8, lowest_position=0)
+
+
+def test_pruned_top_k_equals_the_head_of_the_full_ranking(tmp_path):
+    sanctions_file = str(tmp_path / 'sanctions.csv')
+    clients_file = str(tmp_path / 'clients.csv')
+    entities = write_sanctions_csv(sanctions_file, 500, seed=11)
+    write_clients_csv(clients_file, 300, entities=entities, planted_ratio=0.3, seed=11)
+    people, _ = FileRepository().load_people_from_file(clients_file)
+    repository = SanctionsRepository()
+    snapshot = repository.load_snapshot(sanctions_file)
+
+    for person in people:
+        ranked = repository.rank_matches(snapshot, person.name, person.surname)
+        for k in (1, 3):
+            assert repository.rank_matches(snapshot, person.name, person.surname, top_k=k) == ranked[:k]
@@ -1,4 +1,7 @@
-from .helpers import is_latin
+from .helpers import is_latin, script_mask, normalize_name
 from .downloader import download_with_caching
+from .run_report import RunReport, profile_run
+from .transliteration import transliterate, transliterate_series
 
-__all__ = ['is_latin', 'download_with_caching']
\ No newline at end of file
+__all__ = ['is_latin', 'script_mask', 'normalize_name', 'download_with_caching', 'RunReport', 'profile_run',
+           'transliterate', 'transliterate_series']
\ No newline at end of file
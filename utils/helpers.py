@@ -1,10 +1,74 @@
 import re
+import unicodedata
+from functools import lru_cache
 
-def is_latin(text):
+# Unicode ranges of the scripts a sanctions name may be written in
+SCRIPT_RANGES = {
+    'basic_latin': ['A-Za-z0-9'],
+    'latin_1_supplement': ['À-Ö', 'Ø-ö', 'ø-ÿ'],
+    'latin_extended': ['Ā-ɏ', 'Ḁ-ỿ'],
+    'greek': ['Ͱ-Ͽ'],
+    'cyrillic': ['Ѐ-ӿ'],
+    'arabic': ['؀-ۿ'],
+}
+
+# punctuation that appears in Latin names
+NAME_PUNCTUATION = r"\s.,'\-\"()&;:!?’"
+
+DEFAULT_SCRIPTS = ('basic_latin', 'latin_1_supplement', 'latin_extended')
+
+
+@lru_cache(maxsize=None)
+def script_pattern(scripts=DEFAULT_SCRIPTS):
+    """
+    Compiled regex matching text written only in the given scripts.
+
+    Parameters:
+    scripts - Tuple of SCRIPT_RANGES keys
+
+    Returns:
+    compiled pattern, built once per scripts tuple
+    """
+    ranges = "".join(r for script in scripts for r in SCRIPT_RANGES[script])
+    return re.compile(f"[{ranges}{NAME_PUNCTUATION}]*")
+
+
+def is_latin(text, scripts=DEFAULT_SCRIPTS):
 
     if not isinstance(text, str):
         return False
-  
-    latin_pattern = re.compile(r'^[A-Za-z0-9\s.,\'\-"()&;:!?čšćž]*$')
 
-    return bool(latin_pattern.match(text))
\ No newline at end of file
+    return bool(script_pattern(scripts).fullmatch(text))
+
+
+def script_mask(series, scripts=DEFAULT_SCRIPTS):
+    """
+    Vectorized is_latin over a whole column.
+
+    Parameters:
+    series - pandas Series of names
+    scripts - Tuple of SCRIPT_RANGES keys that are retained
+
+    Returns:
+    boolean Series, False for missing values and names in other scripts
+    """
+    if series.dtype != object:
+        series = series.astype(object)
+    return series.str.fullmatch(script_pattern(tuple(scripts)), na=False).astype(bool)
+
+
+def normalize_name(text):
+    """
+    Normalize a name for comparison: strip diacritics, lower case, '-' to space.
+
+    Parameters:
+    text - Name, non-strings (NaN, None) give ""
+
+    Returns:
+    str - normalized name
+    """
+    if not isinstance(text, str):
+        return ""
+    text = unicodedata.normalize('NFKD', text)
+    text = text.encode('ascii', 'ignore').decode('utf-8')
+    return text.lower().replace('-', ' ').strip()
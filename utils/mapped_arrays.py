@@ -0,0 +1,363 @@
+import os
+import json
+import bisect
+import tempfile
+import numpy as np
+
+# file layout: MAGIC, 8 byte little endian header length, JSON header, arrays (64 byte aligned);
+# the digit is the layout version of the stored indexes, older files are rebuilt
+MAGIC = b'SANCIDX2'
+ALIGNMENT = 64
+
+
+class StringTable:
+    """
+    Read-only sequence of optional strings (or ints) as one UTF-8 buffer with
+    offsets, so it can live in a memory-mapped file. Items are decoded on access.
+    """
+
+    def __init__(self, offsets, data, missing, integers):
+        self.offsets = offsets
+        self.data = data
+        self.missing = missing
+        self.integers = integers
+
+    @classmethod
+    def from_values(cls, values):
+        """
+        Parameters:
+        values - Strings, ints or missing values (None, NaN)
+
+        Returns:
+        StringTable
+        """
+        encoded = []
+        missing = []
+        integers = []
+        for value in values:
+            is_int = isinstance(value, (int, np.integer)) and not isinstance(value, bool)
+            is_missing = not (is_int or isinstance(value, str))
+            encoded.append(b'' if is_missing else str(value).encode('utf-8'))
+            missing.append(is_missing)
+            integers.append(is_int)
+
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(item) for item in encoded], out=offsets[1:])
+        data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return cls(offsets, data, np.array(missing, dtype=bool), np.array(integers, dtype=bool))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1 or stop <= start:
+                return [self[i] for i in range(start, stop, step)]
+            # a range is copied out of the buffer at once and split in Python
+            offsets = (self.offsets[start:stop + 1] - self.offsets[start]).tolist()
+            data = self.data[self.offsets[start]:self.offsets[stop]].tobytes()
+            values = []
+            for begin, end, missing, integer in zip(offsets, offsets[1:], self.missing[start:stop].tolist(),
+                                                    self.integers[start:stop].tolist()):
+                if missing:
+                    values.append(None)
+                    continue
+                text = data[begin:end].decode('utf-8')
+                values.append(int(text) if integer else text)
+            return values
+        if self.missing[index]:
+            return None
+        text = self.data[self.offsets[index]:self.offsets[index + 1]].tobytes().decode('utf-8')
+        return int(text) if self.integers[index] else text
+
+    def get(self, index, default=None):
+        value = self[index]
+        return default if value is None else value
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def tolist(self):
+        return self[:]
+
+    def arrays(self, prefix):
+        return {f"{prefix}.offsets": self.offsets, f"{prefix}.data": self.data,
+                f"{prefix}.missing": self.missing, f"{prefix}.integers": self.integers}
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        return cls(arrays[f"{prefix}.offsets"], arrays[f"{prefix}.data"],
+                   arrays[f"{prefix}.missing"], arrays[f"{prefix}.integers"])
+
+
+class Postings:
+    """Lists of alias positions in CSR form, row i is indices[indptr[i]:indptr[i + 1]]"""
+
+    def __init__(self, indptr, indices):
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def from_lists(cls, lists):
+        indptr = np.zeros(len(lists) + 1, dtype=np.int64)
+        np.cumsum([len(row) for row in lists], out=indptr[1:])
+        indices = np.fromiter((value for row in lists for value in row), dtype=np.int64, count=int(indptr[-1]))
+        return cls(indptr, indices)
+
+    def __getitem__(self, row):
+        """Positions of a row as a list of ints"""
+        return self.indices[self.indptr[row]:self.indptr[row + 1]].tolist()
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def arrays(self, prefix):
+        return {f"{prefix}.indptr": self.indptr, f"{prefix}.indices": self.indices}
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        return cls(arrays[f"{prefix}.indptr"], arrays[f"{prefix}.indices"])
+
+
+def sorted_row(keys, key):
+    """Row of a key in a sorted key table (list or StringTable), None when it is missing"""
+    row = bisect.bisect_left(keys, key)
+    return row if row < len(keys) and keys[row] == key else None
+
+
+class KeyedPostings:
+    """
+    Read-only dict-like mapping of string keys to position lists. Keys are
+    stored sorted and looked up by bisect on the key table, so nothing is
+    copied out of a mapped file.
+    """
+
+    def __init__(self, keys, postings):
+        self.keys_table = keys
+        self.postings = postings
+
+    @classmethod
+    def from_dict(cls, mapping):
+        keys = sorted(mapping)
+        return cls(StringTable.from_values(keys), Postings.from_lists([sorted(mapping[key]) for key in keys]))
+
+    def __getitem__(self, key):
+        row = sorted_row(self.keys_table, key)
+        if row is None:
+            raise KeyError(key)
+        return self.postings[row]
+
+    def get(self, key, default=None):
+        row = sorted_row(self.keys_table, key)
+        return default if row is None else self.postings[row]
+
+    def __contains__(self, key):
+        return sorted_row(self.keys_table, key) is not None
+
+    def __iter__(self):
+        return iter(self.keys_table)
+
+    def __len__(self):
+        return len(self.keys_table)
+
+    def keys(self):
+        return self.keys_table
+
+    def arrays(self, prefix):
+        arrays = self.keys_table.arrays(f"{prefix}.keys")
+        arrays.update(self.postings.arrays(f"{prefix}.postings"))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        return cls(StringTable.from_arrays(arrays, f"{prefix}.keys"),
+                   Postings.from_arrays(arrays, f"{prefix}.postings"))
+
+
+class KeyedCounts:
+    """Read-only dict-like mapping of string keys to ints, keys stored sorted and looked up by bisect"""
+
+    def __init__(self, keys, counts):
+        self.keys_table = keys
+        self.counts = counts
+
+    @classmethod
+    def from_dict(cls, mapping):
+        keys = sorted(mapping)
+        return cls(StringTable.from_values(keys), np.array([mapping[key] for key in keys], dtype=np.int64))
+
+    def __getitem__(self, key):
+        row = sorted_row(self.keys_table, key)
+        if row is None:
+            raise KeyError(key)
+        return int(self.counts[row])
+
+    def get(self, key, default=None):
+        row = sorted_row(self.keys_table, key)
+        return default if row is None else int(self.counts[row])
+
+    def __contains__(self, key):
+        return sorted_row(self.keys_table, key) is not None
+
+    def __iter__(self):
+        return iter(self.keys_table)
+
+    def __len__(self):
+        return len(self.keys_table)
+
+    def items(self):
+        return zip(self.keys_table, self.counts.tolist())
+
+    def arrays(self, prefix):
+        arrays = self.keys_table.arrays(f"{prefix}.keys")
+        arrays[f"{prefix}.counts"] = self.counts
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        return cls(StringTable.from_arrays(arrays, f"{prefix}.keys"), arrays[f"{prefix}.counts"])
+
+
+class LengthBuckets:
+    """
+    Read-only strings grouped by length, for lookups that only need the
+    strings of some lengths. One StringTable sorted by length, starts[n] is
+    the row of the first string at least n characters long.
+    """
+
+    def __init__(self, strings, starts):
+        self.strings = strings
+        self.starts = starts
+
+    @classmethod
+    def from_values(cls, values):
+        values = sorted(values, key=lambda value: (len(value), value))
+        lengths = [len(value) for value in values]
+        starts = np.searchsorted(np.array(lengths, dtype=np.int64), np.arange((lengths[-1] if lengths else 0) + 2))
+        return cls(StringTable.from_values(values), starts.astype(np.int64))
+
+    def get(self, length, default=()):
+        """Strings of the given length, decoded from the table"""
+        if length < 0 or length + 1 >= len(self.starts):
+            return default
+        return self.strings[int(self.starts[length]):int(self.starts[length + 1])] or default
+
+    def arrays(self, prefix):
+        arrays = self.strings.arrays(f"{prefix}.strings")
+        arrays[f"{prefix}.starts"] = self.starts
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        return cls(StringTable.from_arrays(arrays, f"{prefix}.strings"), arrays[f"{prefix}.starts"])
+
+
+class JoinedStrings:
+    """
+    Read-only list of strings stored as one UTF-8 buffer with a separator.
+    For callers that need all of them as a list (rapidfuzz choices) on every
+    call: one decode and split is much faster than decoding a StringTable
+    item by item, and the list is dropped after the call.
+    """
+
+    # never part of a normalized name
+    SEPARATOR = '\x1f'
+
+    def __init__(self, data, count):
+        self.data = data
+        self.count = count
+
+    @classmethod
+    def from_values(cls, values):
+        values = list(values)
+        if any(cls.SEPARATOR in value for value in values):
+            raise ValueError("JoinedStrings values must not contain the separator")
+        data = np.frombuffer(cls.SEPARATOR.join(values).encode('utf-8'), dtype=np.uint8)
+        return cls(data, len(values))
+
+    def tolist(self):
+        if not self.count:
+            return []
+        return self.data.tobytes().decode('utf-8').split(self.SEPARATOR)
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __len__(self):
+        return self.count
+
+    def arrays(self, prefix):
+        return {f"{prefix}.data": self.data, f"{prefix}.count": np.array([self.count], dtype=np.int64)}
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        return cls(arrays[f"{prefix}.data"], int(arrays[f"{prefix}.count"][0]))
+
+
+def write_arrays(file_path, arrays, meta=None):
+    """
+    Write named numpy arrays into one memory-mappable file. The file is
+    written next to its final path and renamed, so readers never see a
+    partial file.
+
+    Parameters:
+    file_path - Target file
+    arrays - dict name -> numpy array
+    meta - JSON serializable metadata stored in the header
+    """
+    entries = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        entries[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+
+    header = json.dumps({'meta': meta or {}, 'arrays': entries}, default=str).encode('utf-8')
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    directory = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(directory, exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(8, 'little'))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(data_start + entries[name]['offset'])
+                f.write(np.ascontiguousarray(array).tobytes())
+        os.replace(temp_path, file_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_arrays(file_path):
+    """
+    Map a file written by write_arrays read-only. Arrays are views of the
+    page cache, processes mapping the same file share the memory.
+
+    Parameters:
+    file_path - File written by write_arrays
+
+    Returns:
+    (dict name -> read-only numpy array, meta)
+    """
+    with open(file_path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a sanctions index file of this version: {file_path}")
+        header_length = int.from_bytes(f.read(8), 'little')
+        header = json.loads(f.read(header_length).decode('utf-8'))
+    data_start = -(-(len(MAGIC) + 8 + header_length) // ALIGNMENT) * ALIGNMENT
+
+    mapped = np.memmap(file_path, dtype=np.uint8, mode='r')
+    arrays = {}
+    for name, entry in header['arrays'].items():
+        dtype = np.dtype(entry['dtype'])
+        count = int(np.prod(entry['shape'])) if entry['shape'] else 1
+        start = data_start + entry['offset']
+        arrays[name] = mapped[start:start + count * dtype.itemsize].view(dtype).reshape(entry['shape'])
+    return arrays, header['meta']
@@ -0,0 +1,82 @@
+import os
+import sys
+from config import AppConfig
+
+
+def peak_rss_mb():
+    """Peak resident set size of the process in MB, None where unavailable"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def current_rss_mb():
+    """Current resident set size of the process in MB, None where unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        return peak_rss_mb()
+
+
+class MemoryBudget:
+    """
+    Resident memory limit of a screening run. Client chunks are spilled to
+    disk and match chunks get smaller once the process is over the limit.
+    """
+
+    def __init__(self, limit_mb):
+        """
+        Parameters:
+        limit_mb - Resident set size limit in MB
+        """
+        self.limit_mb = limit_mb
+
+    @classmethod
+    def from_config(cls):
+        """Budget of AppConfig.MEMORY_BUDGET_MB, None without a budget"""
+        if not AppConfig.MEMORY_BUDGET_MB:
+            return None
+        return cls(AppConfig.MEMORY_BUDGET_MB)
+
+    def exceeded(self):
+        """Whether the process is past AppConfig.MEMORY_SPILL_RATIO of the limit"""
+        rss = current_rss_mb()
+        return rss is not None and rss >= self.limit_mb * AppConfig.MEMORY_SPILL_RATIO
+
+    def chunk_size(self, chunk_size, report=None, max_chunk_size=None):
+        """
+        Match chunk size to use next. Halved down to AppConfig.MEMORY_MIN_CHUNK_SIZE
+        while over the budget, doubled back up to max_chunk_size once the process
+        is under AppConfig.MEMORY_GROW_RATIO of the limit.
+
+        Parameters:
+        chunk_size - Chunk size used so far
+        report - Optional RunReport for the chunk size counters
+        max_chunk_size - Largest chunk size, AppConfig.MATCH_CHUNK_SIZE by default
+
+        Returns:
+        int - Chunk size of the next chunk
+        """
+        max_chunk_size = max_chunk_size or AppConfig.MATCH_CHUNK_SIZE
+        rss = current_rss_mb()
+        if rss is None:
+            return chunk_size
+        if chunk_size > AppConfig.MEMORY_MIN_CHUNK_SIZE and rss >= self.limit_mb * AppConfig.MEMORY_SPILL_RATIO:
+            if report is not None:
+                report.increment('chunk_size_reductions')
+            return max(AppConfig.MEMORY_MIN_CHUNK_SIZE, chunk_size // 2)
+        if chunk_size < max_chunk_size and rss < self.limit_mb * AppConfig.MEMORY_GROW_RATIO:
+            if report is not None:
+                report.increment('chunk_size_increases')
+            return min(max_chunk_size, chunk_size * 2)
+        return chunk_size
@@ -0,0 +1,750 @@
+import bisect
+import heapq
+import threading
+import numpy as np
+from rapidfuzz import fuzz, process
+from .helpers import normalize_name
+from .mapped_arrays import StringTable, Postings, KeyedPostings, KeyedCounts, LengthBuckets, JoinedStrings
+
+
+def long_tokens(text, min_token_length):
+    """Tokens of a normalized name that are long enough to count as a token match"""
+    return [token for token in text.split() if len(token) >= min_token_length]
+
+
+class ExactNameIndex:
+    """
+    Hash index of normalized sanctions names for exact lookups.
+
+    Two kinds of keys, mirroring the rules of find_person_by_name so an exact
+    hit is always a match there as well:
+    - first and last name for aliases that have both parts
+    - sorted tokens of WholeName for aliases missing the first or last name
+      (the WholeName fallback), so reordered names hit too
+
+    Keys are strings and values lists of alias row labels, so a stored index
+    (KeyedPostings) is used the same way.
+    """
+
+    # between first and last name in a key, never part of a normalized name
+    KEY_SEPARATOR = '\x1f'
+
+    def __init__(self, min_token_length=3):
+        self.min_token_length = min_token_length
+        self.first_last = {}
+        self.whole_tokens = {}
+
+    @classmethod
+    def build(cls, aliases_df, min_token_length=3):
+        """
+        Build the index from prepared sanctions aliases.
+
+        Parameters:
+        aliases_df - DataFrame from SanctionsRepository.process_sanctions_data
+        min_token_length - Shortest token that counts in the WholeName fallback
+
+        Returns:
+        ExactNameIndex
+        """
+        index = cls(min_token_length)
+        empty = [None] * len(aliases_df)
+        first_names = aliases_df['NameAlias_FirstName'].tolist() if 'NameAlias_FirstName' in aliases_df else empty
+        last_names = aliases_df['NameAlias_LastName'].tolist() if 'NameAlias_LastName' in aliases_df else empty
+        whole_names = aliases_df['NameAlias_WholeName'].tolist()
+
+        for label, first_name, last_name, whole_name in zip(aliases_df.index, first_names, last_names, whole_names):
+            has_first = isinstance(first_name, str)
+            has_last = isinstance(last_name, str)
+
+            if has_first and has_last:
+                normalized_first = normalize_name(first_name)
+                normalized_last = normalize_name(last_name)
+                if normalized_first and normalized_last:
+                    key = normalized_first + cls.KEY_SEPARATOR + normalized_last
+                    index.first_last.setdefault(key, []).append(label)
+            else:
+                key = index.whole_key(normalize_name(whole_name))
+                if key:
+                    index.whole_tokens.setdefault(key, []).append(label)
+
+        return index
+
+    def whole_key(self, normalized_text):
+        """
+        Sorted-token key, None when the name has fewer than two long tokens
+        (the WholeName fallback needs two matching tokens).
+        """
+        tokens = normalized_text.split()
+        if len(long_tokens(normalized_text, self.min_token_length)) < 2:
+            return None
+        return " ".join(sorted(tokens))
+
+    def lookup(self, person_name, person_surname):
+        """
+        Find aliases that match the client exactly after normalization.
+
+        Parameters:
+        person_name - First name of the client
+        person_surname - Surname of the client
+
+        Returns:
+        list of alias row labels, empty when there is no exact hit
+        """
+        normalized_name = normalize_name(person_name)
+        normalized_surname = normalize_name(person_surname)
+
+        hits = list(self.first_last.get(normalized_name + self.KEY_SEPARATOR + normalized_surname, ()))
+
+        key = self.whole_key(f"{normalized_name} {normalized_surname}")
+        if key:
+            hits.extend(self.whole_tokens.get(key, ()))
+
+        return hits
+
+    def to_arrays(self, prefix):
+        """Arrays for utils.mapped_arrays.write_arrays"""
+        arrays = KeyedPostings.from_dict(self.first_last).arrays(f"{prefix}.first_last")
+        arrays.update(KeyedPostings.from_dict(self.whole_tokens).arrays(f"{prefix}.whole_tokens"))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix, min_token_length=3):
+        """Index over stored (memory-mapped) arrays written by to_arrays"""
+        index = cls(min_token_length)
+        index.first_last = KeyedPostings.from_arrays(arrays, f"{prefix}.first_last")
+        index.whole_tokens = KeyedPostings.from_arrays(arrays, f"{prefix}.whole_tokens")
+        return index
+
+    def __len__(self):
+        return len(self.first_last) + len(self.whole_tokens)
+
+
+class WholeNameTokenIndex:
+    """
+    Token similarity index for the WholeName fallback of find_person_by_name.
+
+    Holds the unique normalized WholeName tokens of the aliases that use the
+    fallback (missing first or last name) with the aliases each token occurs in.
+    Tokens are bucketed by length: fuzz.ratio(a, b) > threshold is only possible
+    when len(b) is within a bounded range of len(a), so a lookup only scores
+    the buckets in that range, in C via rapidfuzz.process.extract.
+    """
+
+    def __init__(self, similarity=0.85, min_token_length=3, cache_size=20000):
+        self.similarity = similarity
+        self.min_token_length = min_token_length
+        self.cache_size = cache_size
+        self.postings = {}
+        self.tokens_by_length = {}
+        # True for aliases with first and last name, scored by the component rules
+        self.component_mask = None
+        # totals over every caller; per-call counts go to the stats dict of match
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache = {}
+        # the memo and the totals are shared by the threads matching on one snapshot
+        self._cache_lock = threading.Lock()
+
+    @classmethod
+    def build(cls, aliases_df, similarity=0.85, min_token_length=3):
+        """
+        Build the index from prepared sanctions aliases.
+
+        Parameters:
+        aliases_df - DataFrame from SanctionsRepository.process_sanctions_data
+        similarity - Token similarity bound (fuzz.ratio / 100 must be greater)
+        min_token_length - Shorter tokens are ignored, as in find_person_by_name
+
+        Returns:
+        WholeNameTokenIndex
+        """
+        index = cls(similarity, min_token_length)
+        empty = [None] * len(aliases_df)
+        first_names = aliases_df['NameAlias_FirstName'].tolist() if 'NameAlias_FirstName' in aliases_df else empty
+        last_names = aliases_df['NameAlias_LastName'].tolist() if 'NameAlias_LastName' in aliases_df else empty
+        whole_names = aliases_df['NameAlias_WholeName'].tolist()
+        component_mask = []
+
+        for label, first_name, last_name, whole_name in zip(aliases_df.index, first_names, last_names, whole_names):
+            has_components = isinstance(first_name, str) and isinstance(last_name, str)
+            component_mask.append(has_components)
+            if has_components:
+                continue
+            for token in long_tokens(normalize_name(whole_name), min_token_length):
+                index.postings.setdefault(token, set()).add(label)
+
+        index.component_mask = np.array(component_mask, dtype=bool)
+
+        for token in index.postings:
+            index.tokens_by_length.setdefault(len(token), []).append(token)
+
+        return index
+
+    def similar_tokens(self, token):
+        """
+        All indexed tokens equal or similar to a query token.
+
+        Parameters:
+        token - Normalized client token
+
+        Returns:
+        list of indexed tokens
+        """
+        length = len(token)
+        # ratio = 1 - indel / (len_a + len_b) and indel >= |len_a - len_b|,
+        # so ratio > s needs len_a * s / (2 - s) < len_b < len_a * (2 - s) / s
+        factor = (2 - self.similarity) / self.similarity
+        shortest = int(length / factor)
+        longest = int(length * factor) + 1
+
+        candidates = []
+        for candidate_length in range(max(shortest, self.min_token_length), longest + 1):
+            candidates.extend(self.tokens_by_length.get(candidate_length, ()))
+
+        cutoff = self.similarity * 100
+        return [
+            match for match, score, _ in process.extract(
+                token, candidates, scorer=fuzz.ratio, score_cutoff=cutoff, limit=None
+            )
+            if match == token or score / 100.0 > self.similarity
+        ]
+
+    def token_labels(self, token, stats=None):
+        """
+        Aliases containing a token equal or similar to the query token,
+        memoized since client names repeat a lot. Thread-safe: the memo is
+        guarded by a lock, the lookup itself runs outside of it.
+
+        Parameters:
+        token - Normalized client token
+        stats - Optional dict, receives 'token_cache_hits' and 'token_cache_misses'
+
+        Returns:
+        frozenset of alias row labels
+        """
+        with self._cache_lock:
+            cached = self._cache.get(token)
+            if cached is not None:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+        counter = 'token_cache_hits' if cached is not None else 'token_cache_misses'
+        if stats is not None:
+            stats[counter] = stats.get(counter, 0) + 1
+        if cached is not None:
+            return cached
+
+        labels = set()
+        for similar_token in self.similar_tokens(token):
+            labels.update(self.postings[similar_token])
+        labels = frozenset(labels)
+
+        with self._cache_lock:
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[token] = labels
+        return labels
+
+    def match(self, normalized_name, normalized_surname, stats=None,
+              common_min_aliases=None, common_cap=None):
+        """
+        Aliases matched by the WholeName fallback rule: at least two client
+        tokens each equal or similar to a token of the alias.
+
+        Such an alias is in at least two of the per-token alias sets, so the
+        result is the union of pairwise intersections. Set intersection walks
+        the smaller set, so a very common token (Mohammad, Ali) is never
+        scanned unless it is paired with another common token.
+
+        Parameters:
+        normalized_name - Normalized first name of the client
+        normalized_surname - Normalized surname of the client
+        stats - Optional dict, receives 'candidates', 'candidates_capped' and the
+                token cache counters of this call
+        common_min_aliases - Token sets at least this large count as common
+        common_cap - Keep at most this many aliases matched only by a pair of
+                     common tokens, None keeps all (verdicts unchanged). The kept
+                     aliases are the best ranked: most client tokens matched,
+                     then most tokens matched exactly, then the lower position
+
+        Returns:
+        set of alias row labels
+        """
+        tokens = [token for token in f"{normalized_name} {normalized_surname}".split()
+                  if len(token) >= self.min_token_length]
+        label_sets = sorted((self.token_labels(token, stats) for token in tokens), key=len)
+
+        exact_sets = []
+
+        def rank(label):
+            if not exact_sets:
+                exact_sets.extend(set(self.postings.get(token, ())) for token in tokens)
+            matched_tokens = sum(1 for labels in label_sets if label in labels)
+            exact_tokens = sum(1 for labels in exact_sets if label in labels)
+            return -matched_tokens, -exact_tokens, label
+
+        matched = set()
+        candidates = 0
+        capped = 0
+        for i, smaller in enumerate(label_sets[:-1]):
+            for larger in label_sets[i + 1:]:
+                candidates += len(smaller)
+                both_common = common_min_aliases is not None and len(smaller) >= common_min_aliases
+                if both_common and common_cap is not None:
+                    common_hits = smaller & larger
+                    capped += max(0, len(common_hits) - common_cap)
+                    matched.update(heapq.nsmallest(common_cap, common_hits, key=rank))
+                else:
+                    matched |= smaller & larger
+
+        if stats is not None:
+            stats['candidates'] = stats.get('candidates', 0) + candidates
+            stats['candidates_capped'] = stats.get('candidates_capped', 0) + capped
+        return matched
+
+    def alias_matches(self, normalized_whole_name, client_tokens):
+        """
+        WholeName rule for a single alias, for engines that bring their own candidates.
+
+        Parameters:
+        normalized_whole_name - Normalized WholeName of the alias
+        client_tokens - Long tokens of the normalized client name and surname
+
+        Returns:
+        bool
+        """
+        whole_tokens = long_tokens(normalized_whole_name, self.min_token_length)
+        matching_token_count = 0
+        for client_token in client_tokens:
+            if any(client_token == whole_token or fuzz.ratio(client_token, whole_token) / 100.0 > self.similarity
+                   for whole_token in whole_tokens):
+                matching_token_count += 1
+                if matching_token_count > 1:
+                    return True
+        return False
+
+    def to_arrays(self, prefix):
+        """Arrays for utils.mapped_arrays.write_arrays"""
+        arrays = KeyedPostings.from_dict(self.postings).arrays(f"{prefix}.postings")
+        arrays.update(LengthBuckets.from_values(self.postings).arrays(f"{prefix}.tokens_by_length"))
+        arrays[f"{prefix}.component_mask"] = self.component_mask
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix, similarity=0.85, min_token_length=3):
+        """
+        Index over stored (memory-mapped) arrays written by to_arrays. Postings
+        and length buckets are read from the mapped arrays on lookup.
+        """
+        index = cls(similarity, min_token_length)
+        index.postings = KeyedPostings.from_arrays(arrays, f"{prefix}.postings")
+        index.tokens_by_length = LengthBuckets.from_arrays(arrays, f"{prefix}.tokens_by_length")
+        index.component_mask = arrays[f"{prefix}.component_mask"]
+        return index
+
+    def __len__(self):
+        return len(self.postings)
+
+
+class FirstNamePrefixIndex:
+    """
+    Sorted array of normalized FirstName values for the prefix rule of
+    find_person_by_name (Ana -> Analita, Dmitrijevich -> Dmitrij).
+
+    First names extending a token are one bisect range; first names that are
+    a prefix of a token are found by looking up the token's prefixes.
+    """
+
+    def __init__(self, min_token_length=3):
+        self.min_token_length = min_token_length
+        self.sorted_names = []
+        self.postings = {}
+
+    @classmethod
+    def build(cls, aliases_df, min_token_length=3):
+        """
+        Build the index from prepared sanctions aliases.
+
+        Parameters:
+        aliases_df - DataFrame from SanctionsRepository.process_sanctions_data
+        min_token_length - Shortest token or first name the prefix rule applies to
+
+        Returns:
+        FirstNamePrefixIndex
+        """
+        index = cls(min_token_length)
+        if 'NameAlias_FirstName' not in aliases_df:
+            return index
+
+        for label, first_name in zip(aliases_df.index, aliases_df['NameAlias_FirstName'].tolist()):
+            normalized = normalize_name(first_name)
+            if normalized:
+                index.postings.setdefault(normalized, []).append(label)
+
+        index.sorted_names = sorted(index.postings)
+        return index
+
+    def extending(self, token):
+        """First names that start with the token"""
+        if len(token) < self.min_token_length:
+            return []
+        start = bisect.bisect_left(self.sorted_names, token)
+        end = bisect.bisect_left(self.sorted_names, token + '\uffff', lo=start)
+        return self.sorted_names[start:end]
+
+    def prefixes_of(self, token):
+        """First names (at least min_token_length long) that the token starts with"""
+        return [
+            token[:length] for length in range(self.min_token_length, len(token) + 1)
+            if token[:length] in self.postings
+        ]
+
+    def match(self, name_tokens):
+        """
+        Aliases whose first name satisfies the prefix rule for any client token.
+
+        Parameters:
+        name_tokens - Normalized first name tokens of the client
+
+        Returns:
+        set of alias row labels
+        """
+        labels = set()
+        for token in name_tokens:
+            for first_name in self.extending(token):
+                labels.update(self.postings[first_name])
+            for first_name in self.prefixes_of(token):
+                labels.update(self.postings[first_name])
+        return labels
+
+    def to_arrays(self, prefix):
+        """Arrays for utils.mapped_arrays.write_arrays"""
+        return KeyedPostings.from_dict(self.postings).arrays(f"{prefix}.postings")
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix, min_token_length=3):
+        """Index over stored (memory-mapped) arrays written by to_arrays"""
+        index = cls(min_token_length)
+        index.postings = KeyedPostings.from_arrays(arrays, f"{prefix}.postings")
+        # keys are stored sorted, bisect works on the table directly
+        index.sorted_names = index.postings.keys_table
+        return index
+
+    def __len__(self):
+        return len(self.sorted_names)
+
+
+class ComponentNameIndex:
+    """
+    Normalized name parts of aliases that have both first and last name,
+    for the surname/name rules of find_person_by_name without a DataFrame.
+
+    Unique last names are scored in one rapidfuzz.process.extract call per
+    client, only aliases passing the surname threshold get their name scored.
+    Read-only after build, safe to use from several threads.
+    """
+
+    def __init__(self, surname_threshold=0.8, name_threshold=0.7):
+        self.surname_threshold = surname_threshold
+        self.name_threshold = name_threshold
+        self.last_names = []
+        self.last_name_positions = []
+        self.alias_full_names = {}
+        self.alias_last_names = {}
+
+    @classmethod
+    def build(cls, aliases_df, surname_threshold=0.8, name_threshold=0.7):
+        """
+        Build the index from prepared sanctions aliases (positional index).
+
+        Parameters:
+        aliases_df - DataFrame from SanctionsRepository.process_sanctions_data
+        surname_threshold - Minimal token_set_ratio / 100 for the surname
+        name_threshold - Minimal token_set_ratio / 100 for the name
+
+        Returns:
+        ComponentNameIndex
+        """
+        index = cls(surname_threshold, name_threshold)
+        empty = [None] * len(aliases_df)
+        first_names = aliases_df['NameAlias_FirstName'].tolist() if 'NameAlias_FirstName' in aliases_df else empty
+        last_names = aliases_df['NameAlias_LastName'].tolist() if 'NameAlias_LastName' in aliases_df else empty
+        middle_names = aliases_df['NameAlias_MiddleName'].tolist() if 'NameAlias_MiddleName' in aliases_df else empty
+
+        positions_by_last_name = {}
+        for position, (first_name, last_name, middle_name) in enumerate(zip(first_names, last_names, middle_names)):
+            if not (isinstance(first_name, str) and isinstance(last_name, str)):
+                continue
+            normalized_last = normalize_name(last_name)
+            if not normalized_last:
+                continue
+            positions_by_last_name.setdefault(normalized_last, []).append(position)
+            index.alias_last_names[position] = normalized_last
+
+            alias_full_name = normalize_name(first_name) + " "
+            if isinstance(middle_name, str):
+                alias_full_name += normalize_name(middle_name)
+            index.alias_full_names[position] = alias_full_name.strip()
+
+        index.last_names = list(positions_by_last_name)
+        index.last_name_positions = [positions_by_last_name[name] for name in index.last_names]
+        return index
+
+    def match(self, normalized_name, normalized_surname, prefix_positions, stats=None, max_candidates=None):
+        """
+        Aliases passing both the surname and the name rule.
+
+        Parameters:
+        normalized_name - Normalized first name of the client
+        normalized_surname - Normalized surname of the client
+        prefix_positions - Aliases passing the first name prefix rule
+        stats - Optional dict, receives 'candidates', 'candidates_capped' and 'rapidfuzz_calls'
+        max_candidates - Keep only this many surname candidates (best surname
+                         score first), None keeps all (verdicts unchanged)
+
+        Returns:
+        list of alias positions
+        """
+        return [
+            position for position, _, _ in self.scored_matches(
+                normalized_name, normalized_surname, prefix_positions, stats, max_candidates
+            )
+        ]
+
+    def to_arrays(self, prefix, alias_count):
+        """Arrays for utils.mapped_arrays.write_arrays"""
+        arrays = JoinedStrings.from_values(self.last_names).arrays(f"{prefix}.last_names")
+        arrays.update(Postings.from_lists(self.last_name_positions).arrays(f"{prefix}.last_name_positions"))
+        arrays.update(StringTable.from_values(
+            [self.alias_full_names.get(position) for position in range(alias_count)]
+        ).arrays(f"{prefix}.alias_full_names"))
+        arrays.update(StringTable.from_values(
+            [self.alias_last_names.get(position) for position in range(alias_count)]
+        ).arrays(f"{prefix}.alias_last_names"))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix, surname_threshold=0.8, name_threshold=0.7):
+        """
+        Index over stored (memory-mapped) arrays written by to_arrays. The
+        unique last names stay in the mapped file, every client decodes them
+        into a list for rapidfuzz that is dropped after the call.
+        """
+        index = cls(surname_threshold, name_threshold)
+        index.last_names = JoinedStrings.from_arrays(arrays, f"{prefix}.last_names")
+        index.last_name_positions = Postings.from_arrays(arrays, f"{prefix}.last_name_positions")
+        index.alias_full_names = StringTable.from_arrays(arrays, f"{prefix}.alias_full_names")
+        index.alias_last_names = StringTable.from_arrays(arrays, f"{prefix}.alias_last_names")
+        return index
+
+    def alias_scores(self, position, normalized_name, normalized_surname, prefix_positions):
+        """
+        Surname and name rule for a single alias, for engines that bring their own candidates.
+
+        Returns:
+        (surname_score, name_score), None when the alias does not match
+        """
+        last_name = self.alias_last_names.get(position)
+        if last_name is None or not normalized_surname:
+            return None
+        surname_score = fuzz.token_set_ratio(normalized_surname, last_name) / 100.0
+        if surname_score < self.surname_threshold:
+            return None
+        if position in prefix_positions:
+            return surname_score, 1.0
+        if not normalized_name or not self.alias_full_names[position]:
+            return None
+        name_score = fuzz.token_set_ratio(normalized_name, self.alias_full_names[position]) / 100.0
+        if name_score < self.name_threshold:
+            return None
+        return surname_score, name_score
+
+    def scored_matches(self, normalized_name, normalized_surname, prefix_positions, stats=None,
+                       max_candidates=None, top=None):
+        """
+        Aliases passing both rules, with their surname and name scores.
+
+        Surname candidates are scored best surname first. With a full top
+        (TopCandidates), a candidate can reach at most (surname_score + 1) / 2,
+        so once that bound, with the lowest position of the block as the
+        tie-break, cannot beat the weakest kept candidate the rest is skipped
+        without scoring names. Later blocks have a lower surname score.
+
+        Parameters:
+        normalized_name - Normalized first name of the client
+        normalized_surname - Normalized surname of the client
+        prefix_positions - Aliases passing the first name prefix rule
+        stats - Optional dict, receives 'candidates', 'candidates_capped',
+                'candidates_pruned' and 'rapidfuzz_calls'
+        max_candidates - Keep only this many surname candidates, None keeps all
+        top - Optional TopCandidates receiving the matches, enables the bound
+
+        Returns:
+        list of (position, surname_score, name_score)
+        """
+        last_names = self.last_names if isinstance(self.last_names, list) else self.last_names.tolist()
+        surname_hits = process.extract(
+            normalized_surname, last_names, scorer=fuzz.token_set_ratio,
+            score_cutoff=self.surname_threshold * 100, limit=None
+        )
+
+        # extract returns the best surname scores first
+        candidates = []
+        for _, score, last_name_index in surname_hits:
+            if score / 100.0 >= self.surname_threshold:
+                candidates.extend((position, score / 100.0) for position in self.last_name_positions[last_name_index])
+
+        capped = 0
+        if max_candidates is not None and len(candidates) > max_candidates:
+            capped = len(candidates) - max_candidates
+            candidates = candidates[:max_candidates]
+
+        # without a bound all candidates are name scored in one call,
+        # otherwise one call per surname score
+        if top is None:
+            blocks = [candidates] if candidates else []
+        else:
+            blocks = []
+            for candidate in candidates:
+                if blocks and blocks[-1][0][1] == candidate[1]:
+                    blocks[-1].append(candidate)
+                else:
+                    blocks.append([candidate])
+
+        matches = []
+        scored = 0
+        name_calls = 0
+        for block in blocks:
+            surname_score = block[0][1]
+            if top is not None and top.cannot_improve((surname_score + 1.0) / 2,
+                                                      min(position for position, _ in block)):
+                break
+            scored += len(block)
+
+            block_matches = [
+                (position, surname_score, 1.0) for position, surname_score in block
+                if position in prefix_positions
+            ]
+            remaining = [
+                (position, surname_score) for position, surname_score in block
+                if position not in prefix_positions and self.alias_full_names[position]
+            ]
+
+            if remaining:
+                name_hits = process.extract(
+                    normalized_name, [self.alias_full_names[position] for position, _ in remaining],
+                    scorer=fuzz.token_set_ratio, score_cutoff=self.name_threshold * 100, limit=None
+                )
+                block_matches.extend(
+                    remaining[candidate_index] + (score / 100.0,) for _, score, candidate_index in name_hits
+                    if score / 100.0 >= self.name_threshold
+                )
+                name_calls += len(remaining)
+
+            if top is not None:
+                for position, surname_score, name_score in block_matches:
+                    top.push(position, surname_score, name_score, (surname_score + name_score) / 2)
+            matches.extend(block_matches)
+
+        if stats is not None:
+            stats['candidates'] = stats.get('candidates', 0) + scored
+            stats['candidates_capped'] = stats.get('candidates_capped', 0) + capped
+            stats['candidates_pruned'] = stats.get('candidates_pruned', 0) + len(candidates) - scored
+            stats['rapidfuzz_calls'] = stats.get('rapidfuzz_calls', 0) + len(last_names) + name_calls
+        return matches
+
+
+class TopCandidates:
+    """
+    The k best scored aliases of one client, kept in a bounded min-heap.
+    With k None every pushed alias is kept.
+    """
+
+    def __init__(self, k=None):
+        self.k = k
+        self._heap = []
+
+    def push(self, position, surname_score, name_score, score):
+        """Offer one scored alias, ties keep the lower position"""
+        entry = (score, -position, surname_score, name_score)
+        if self.k is None or len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def cannot_improve(self, upper_bound, lowest_position=0):
+        """
+        True when no alias scoring at most upper_bound, at lowest_position or
+        later, could still be kept. Compares (score, -position) as push does,
+        so an alias tying the weakest kept score with a lower position is not pruned.
+        """
+        return (self.k is not None and len(self._heap) >= self.k
+                and (upper_bound, -lowest_position) < self._heap[0][:2])
+
+    def ranked(self):
+        """
+        Returns:
+        list of (position, surname_score, name_score, score), best first
+        """
+        return [
+            (-negative_position, surname_score, name_score, score)
+            for score, negative_position, surname_score, name_score in sorted(self._heap, reverse=True)
+        ]
+
+    def __len__(self):
+        return len(self._heap)
+
+
+class TokenFrequencyStats:
+    """
+    How many aliases each normalized name token occurs in (WholeName and
+    LastName tokens), computed once per sanctions snapshot.
+    """
+
+    def __init__(self):
+        self.frequencies = {}
+
+    @classmethod
+    def build(cls, aliases_df):
+        """
+        Count token frequencies over prepared sanctions aliases.
+
+        Parameters:
+        aliases_df - DataFrame from SanctionsRepository.process_sanctions_data
+
+        Returns:
+        TokenFrequencyStats
+        """
+        stats = cls()
+        empty = [None] * len(aliases_df)
+        last_names = aliases_df['NameAlias_LastName'].tolist() if 'NameAlias_LastName' in aliases_df else empty
+
+        for whole_name, last_name in zip(aliases_df['NameAlias_WholeName'].tolist(), last_names):
+            tokens = set(normalize_name(whole_name).split()) | set(normalize_name(last_name).split())
+            for token in tokens:
+                stats.frequencies[token] = stats.frequencies.get(token, 0) + 1
+
+        return stats
+
+    def frequency(self, token):
+        return self.frequencies.get(token, 0)
+
+    def is_common(self, text, min_aliases):
+        """True when every token of a normalized name occurs in at least min_aliases aliases"""
+        tokens = text.split()
+        return bool(tokens) and all(self.frequency(token) >= min_aliases for token in tokens)
+
+    def to_arrays(self, prefix):
+        """Arrays for utils.mapped_arrays.write_arrays"""
+        return KeyedCounts.from_dict(self.frequencies).arrays(prefix)
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        """Stats over stored (memory-mapped) arrays written by to_arrays, looked up by bisect"""
+        stats = cls()
+        stats.frequencies = KeyedCounts.from_arrays(arrays, prefix)
+        return stats
+
+    def most_common(self, count=20):
+        """(token, frequency) pairs of the most frequent tokens"""
+        return sorted(self.frequencies.items(), key=lambda item: -item[1])[:count]
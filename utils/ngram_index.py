@@ -0,0 +1,158 @@
+import numpy as np
+
+
+class NgramVectorIndex:
+    """
+    TF-IDF weighted character n-gram vectors of normalized alias names.
+
+    Every alias is an L2 normalized sparse vector over the n-grams of its
+    name, so the cosine similarity of a client and all aliases is one sparse
+    matrix product. Candidates of a whole batch of clients come from a single
+    product with scipy.sparse when it is installed, otherwise the same
+    product is accumulated with numpy from the n-gram postings.
+    Read-only after build, safe to use from several threads.
+    """
+
+    def __init__(self, n=3):
+        self.n = n
+        self.vocabulary = {}
+        self.idf = None
+        self.size = 0
+        # n-gram major postings: aliases of n-gram g are indices[indptr[g]:indptr[g + 1]]
+        self.indptr = None
+        self.indices = None
+        self.data = None
+        self._alias_matrix = None
+
+    def ngrams(self, text):
+        """Character n-grams of a normalized name, padded with spaces"""
+        padded = f" {text} "
+        return [padded[i:i + self.n] for i in range(len(padded) - self.n + 1)]
+
+    @classmethod
+    def build(cls, texts, n=3):
+        """
+        Build the index.
+
+        Parameters:
+        texts - Normalized alias names, list position is the alias position
+        n - n-gram length
+
+        Returns:
+        NgramVectorIndex
+        """
+        index = cls(n)
+        index.size = len(texts)
+
+        rows, columns, counts = [], [], []
+        for position, text in enumerate(texts):
+            grams = {}
+            for gram in index.ngrams(text) if text else ():
+                grams[gram] = grams.get(gram, 0) + 1
+            for gram, count in grams.items():
+                rows.append(position)
+                columns.append(index.vocabulary.setdefault(gram, len(index.vocabulary)))
+                counts.append(count)
+
+        rows = np.array(rows, dtype=np.int64)
+        columns = np.array(columns, dtype=np.int64)
+        weights = np.array(counts, dtype=np.float64)
+
+        # smoothed idf as in scikit-learn: ln((1 + N) / (1 + df)) + 1
+        document_frequency = np.bincount(columns, minlength=len(index.vocabulary))
+        index.idf = np.log((1 + index.size) / (1 + document_frequency)) + 1
+        weights *= index.idf[columns]
+        norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=index.size))
+        weights /= norms[rows]
+
+        order = np.argsort(columns, kind='stable')
+        index.indices = rows[order]
+        index.data = weights[order].astype(np.float32)
+        index.indptr = np.concatenate(([0], np.cumsum(document_frequency))).astype(np.int64)
+
+        try:
+            from scipy import sparse
+            index._alias_matrix = sparse.csr_matrix(
+                (index.data, index.indices, index.indptr),
+                shape=(len(index.vocabulary), index.size)
+            ).T.tocsr()
+        except ImportError:
+            index._alias_matrix = None
+        return index
+
+    def vectorize(self, text):
+        """
+        Sparse TF-IDF vector of a normalized client name. N-grams that no
+        alias has are dropped, they cannot add to any similarity.
+
+        Returns:
+        (n-gram ids, weights) arrays
+        """
+        grams = {}
+        for gram in self.ngrams(text) if text else ():
+            gram_id = self.vocabulary.get(gram)
+            if gram_id is not None:
+                grams[gram_id] = grams.get(gram_id, 0) + 1
+        if not grams:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        ids = np.fromiter(grams.keys(), dtype=np.int64, count=len(grams))
+        weights = np.fromiter(grams.values(), dtype=np.float64, count=len(grams)) * self.idf[ids]
+        return ids, weights / np.sqrt(np.dot(weights, weights))
+
+    def query(self, texts, top_n=50, min_similarity=0.3):
+        """
+        Most similar aliases of a batch of client names.
+
+        Parameters:
+        texts - Normalized client names
+        top_n - Keep at most this many aliases per client
+        min_similarity - Minimal cosine similarity
+
+        Returns:
+        list of position arrays, most similar first
+        """
+        vectors = [self.vectorize(text) for text in texts]
+
+        if self._alias_matrix is not None:
+            from scipy import sparse
+            client_matrix = sparse.csr_matrix(
+                (np.concatenate([weights for _, weights in vectors] or [np.empty(0)]),
+                 np.concatenate([ids for ids, _ in vectors] or [np.empty(0, dtype=np.int64)]),
+                 np.concatenate(([0], np.cumsum([len(ids) for ids, _ in vectors])))),
+                shape=(len(texts), len(self.vocabulary))
+            )
+            similarities = (client_matrix @ self._alias_matrix.T).tocsr()
+            rows = (
+                (similarities.indices[similarities.indptr[row]:similarities.indptr[row + 1]],
+                 similarities.data[similarities.indptr[row]:similarities.indptr[row + 1]])
+                for row in range(len(texts))
+            )
+        else:
+            rows = (self._similarities(ids, weights) for ids, weights in vectors)
+
+        results = []
+        for positions, scores in rows:
+            keep = scores >= min_similarity
+            positions, scores = positions[keep], scores[keep]
+            if len(scores) > top_n:
+                best = np.argpartition(-scores, top_n - 1)[:top_n]
+                positions, scores = positions[best], scores[best]
+            results.append(positions[np.argsort(-scores, kind='stable')])
+        return results
+
+    def _similarities(self, ids, weights):
+        """One row of the product from the postings: (alias positions, cosine similarities)"""
+        if not len(ids):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        starts, ends = self.indptr[ids], self.indptr[ids + 1]
+        positions = np.concatenate([self.indices[start:end] for start, end in zip(starts, ends)])
+        contributions = np.concatenate([
+            self.data[start:end] * weight for start, end, weight in zip(starts, ends, weights)
+        ])
+        totals = np.bincount(positions, weights=contributions, minlength=self.size)
+        hit = np.flatnonzero(totals)
+        return hit, totals[hit]
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,202 @@
+import os
+import re
+import time
+import threading
+from collections import deque
+from config import AppConfig
+from utils.memory import current_rss_mb, peak_rss_mb
+
+# Prometheus metric name, type and help of every numeric field of RunMetrics.values()
+PROMETHEUS_METRICS = [
+    ('clients_total', 'gauge', 'Clients in the screening run'),
+    ('clients_done', 'gauge', 'Clients screened so far, resumed clients included'),
+    ('matches', 'gauge', 'Matched clients so far'),
+    ('clients_per_second', 'gauge', 'Screening throughput over the last AppConfig.METRICS_RATE_WINDOW seconds'),
+    ('eta_seconds', 'gauge', 'Estimated seconds until the run completes'),
+    ('elapsed_seconds', 'gauge', 'Seconds since the run started'),
+    ('rss_bytes', 'gauge', 'Resident memory of the process'),
+    ('peak_rss_bytes', 'gauge', 'Peak resident memory of the process'),
+    ('running', 'gauge', '1 while the run is in progress'),
+    ('last_update_timestamp_seconds', 'gauge', 'Unix time of the last update'),
+]
+
+PROMETHEUS_PREFIX = 'sanctions_screening_'
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def metrics_file_path(run_name=None):
+    """
+    Metrics file of a run. A single run writes AppConfig.METRICS_FILE_PATH;
+    runs named among concurrent ones (batch files, shards) write their own
+    file next to it with the run name and pid, e.g. metrics_clients_1234.prom,
+    so they do not overwrite each other.
+    """
+    if not run_name:
+        return AppConfig.METRICS_FILE_PATH
+    root, extension = os.path.splitext(AppConfig.METRICS_FILE_PATH)
+    safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', run_name)
+    return f"{root}_{safe_name}_{os.getpid()}{extension}"
+
+
+class RunMetrics:
+    """
+    Live progress of one screening run: clients done, throughput over a
+    sliding window, ETA, matches, current stage and memory. Updated by
+    ProcessingService, read by the UI and MetricsFileWriter from other threads.
+    """
+
+    def __init__(self, clients_total=0, labels=None):
+        """
+        Parameters:
+        clients_total - Clients in the run
+        labels - Optional dict of Prometheus labels (engine, snapshot version...)
+        """
+        self.clients_total = clients_total
+        self.labels = dict(labels or {})
+        self.clients_done = 0
+        self.matches = 0
+        self.stage = 'starting'
+        self.running = True
+        self.started = time.monotonic()
+        self.updated_at = time.time()
+        # (monotonic time, clients done) samples of the last METRICS_RATE_WINDOW seconds
+        self._samples = deque([(self.started, 0)])
+        self._lock = threading.Lock()
+
+    def set_stage(self, stage):
+        with self._lock:
+            self.stage = stage
+            self.updated_at = time.time()
+
+    def set_label(self, name, value):
+        with self._lock:
+            self.labels[name] = value
+
+    def update(self, clients_done, matches):
+        """Record progress, clients_done counts every client of the run screened so far"""
+        now = time.monotonic()
+        with self._lock:
+            self.clients_done = clients_done
+            self.matches = matches
+            self.updated_at = time.time()
+            self._samples.append((now, clients_done))
+            while len(self._samples) > 2 and now - self._samples[1][0] > AppConfig.METRICS_RATE_WINDOW:
+                self._samples.popleft()
+
+    def skip(self, clients_done):
+        """Clients counted as done without screening (resumed), kept out of the throughput"""
+        with self._lock:
+            self.clients_done = clients_done
+            self._samples = deque([(time.monotonic(), clients_done)])
+
+    def finish(self, stage='done'):
+        with self._lock:
+            self.stage = stage
+            self.running = False
+            self.updated_at = time.time()
+
+    def values(self):
+        """
+        Current metrics.
+
+        Returns:
+        dict - the PROMETHEUS_METRICS fields plus 'stage' and 'labels'
+        """
+        now = time.monotonic()
+        with self._lock:
+            (first_time, first_done), (last_time, last_done) = self._samples[0], self._samples[-1]
+            rate = (last_done - first_done) / (last_time - first_time) if last_time > first_time else 0.0
+            remaining = max(0, self.clients_total - self.clients_done)
+            values = {
+                'clients_total': self.clients_total,
+                'clients_done': self.clients_done,
+                'matches': self.matches,
+                'clients_per_second': rate,
+                'eta_seconds': remaining / rate if rate > 0 and self.running else (0.0 if not remaining else None),
+                'elapsed_seconds': now - self.started,
+                'running': 1 if self.running else 0,
+                'last_update_timestamp_seconds': self.updated_at,
+                'stage': self.stage,
+                'labels': dict(self.labels),
+            }
+        rss, peak = current_rss_mb(), peak_rss_mb()
+        if rss is not None and peak is not None:
+            # the kernel updates the peak lazily, it may trail the current value
+            peak = max(peak, rss)
+        values['rss_bytes'] = int(rss * 1024 * 1024) if rss is not None else None
+        values['peak_rss_bytes'] = int(peak * 1024 * 1024) if peak is not None else None
+        return values
+
+    def to_prometheus(self):
+        """Current metrics in the Prometheus text exposition format"""
+        values = self.values()
+        labels = ",".join(f'{name}="{escape_label(value)}"' for name, value in sorted(values['labels'].items()))
+        lines = []
+        for name, metric_type, description in PROMETHEUS_METRICS:
+            if values[name] is None:
+                continue
+            lines.append(f"# HELP {PROMETHEUS_PREFIX}{name} {description}")
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}{name} {metric_type}")
+            lines.append(f"{PROMETHEUS_PREFIX}{name}{{{labels}}} {values[name]}")
+        stage_labels = ",".join(filter(None, [labels, f'stage="{escape_label(values["stage"])}"']))
+        lines.append(f"# HELP {PROMETHEUS_PREFIX}stage Current stage of the run")
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}stage gauge")
+        lines.append(f"{PROMETHEUS_PREFIX}stage{{{stage_labels}}} 1")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsFileWriter:
+    """
+    Writes the metrics of a run to a file in the Prometheus text format every
+    interval seconds from a background thread, e.g. for the node exporter
+    textfile collector. The file is replaced atomically, scrapers never read
+    a partial file.
+    """
+
+    def __init__(self, metrics, file_path, interval=None):
+        """
+        Parameters:
+        metrics - RunMetrics of the run
+        file_path - Metrics file (*.prom for the textfile collector)
+        interval - Seconds between writes, AppConfig.METRICS_FILE_INTERVAL by default
+        """
+        self.metrics = metrics
+        self.file_path = file_path
+        self.interval = interval or AppConfig.METRICS_FILE_INTERVAL
+        self._stop = threading.Event()
+        self._thread = None
+
+    def write(self):
+        temp_path = f"{self.file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(self.metrics.to_prometheus())
+            os.replace(temp_path, self.file_path)
+        except OSError as e:
+            print(f"Error writing metrics file: {e}")
+
+    def start(self):
+        """Write now and then every interval seconds until stop"""
+        self._stop.clear()
+
+        def write_thread():
+            while True:
+                self.write()
+                if self._stop.wait(self.interval):
+                    break
+
+        self._thread = threading.Thread(target=write_thread)
+        self._thread.daemon = True
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Stop the writer thread and write the final metrics"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.write()
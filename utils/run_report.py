@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class RunReport:
+    """
+    Per-stage timers and counters of one screening run.
+
+    Stage times are wall-clock seconds summed over every entry into the stage,
+    counters are plain integers (rows scanned, rapidfuzz calls, cache hits...).
+    Safe to update from several threads.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self.timings = {}
+        self.counters = {}
+        self.distributions = {}
+        self.profile_path = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time a block of code.
+
+        Parameters:
+        name - Stage name, e.g. 'sanctions_parse'
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name, value):
+        """
+        Record one value of a per-item distribution (e.g. candidates per client).
+        Keeps count, total, max and a power-of-two histogram, not the values.
+        """
+        bucket = 1
+        while bucket < value:
+            bucket *= 2
+        with self._lock:
+            distribution = self.distributions.setdefault(
+                name, {'count': 0, 'total': 0, 'max': 0, 'histogram': {}}
+            )
+            distribution['count'] += 1
+            distribution['total'] += value
+            distribution['max'] = max(distribution['max'], value)
+            distribution['histogram'][bucket] = distribution['histogram'].get(bucket, 0) + 1
+
+    def merge(self, other):
+        """Add timings and counters of another report (e.g. file load) to this one"""
+        if other is None:
+            return
+        for name, seconds in other.timings.items():
+            self.add_time(name, seconds)
+        for name, amount in other.counters.items():
+            self.increment(name, amount)
+        with self._lock:
+            for name, other_distribution in other.distributions.items():
+                distribution = self.distributions.setdefault(
+                    name, {'count': 0, 'total': 0, 'max': 0, 'histogram': {}}
+                )
+                distribution['count'] += other_distribution['count']
+                distribution['total'] += other_distribution['total']
+                distribution['max'] = max(distribution['max'], other_distribution['max'])
+                for bucket, amount in other_distribution['histogram'].items():
+                    distribution['histogram'][bucket] = distribution['histogram'].get(bucket, 0) + amount
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'started_at': self.started_at.isoformat(timespec='seconds'),
+                'timings': dict(self.timings),
+                'counters': dict(self.counters),
+                'distributions': {
+                    name: dict(distribution, histogram=dict(distribution['histogram']))
+                    for name, distribution in self.distributions.items()
+                },
+                'profile_path': self.profile_path,
+            }
+
+    def save(self, file_path):
+        """Write the report as JSON"""
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+    def format(self):
+        """Human readable report, stages sorted by time"""
+        data = self.as_dict()
+        lines = [f"Screening run report ({data['started_at']})"]
+
+        total = sum(data['timings'].values())
+        for name, seconds in sorted(data['timings'].items(), key=lambda item: -item[1]):
+            share = seconds / total * 100 if total else 0
+            lines.append(f"  {name:<24} {seconds:10.3f} s  {share:5.1f}%")
+
+        for name, amount in sorted(data['counters'].items()):
+            lines.append(f"  {name:<24} {amount:>10}")
+
+        # hit ratio for every *_hits / *_misses counter pair
+        for name, hits in sorted(data['counters'].items()):
+            if not name.endswith('_hits'):
+                continue
+            misses = data['counters'].get(name[:-len('_hits')] + '_misses')
+            if misses is not None and hits + misses:
+                lines.append(f"  {name[:-len('_hits')] + '_hit_ratio':<24} {hits / (hits + misses):10.1%}")
+
+        for name, distribution in sorted(data['distributions'].items()):
+            mean = distribution['total'] / distribution['count'] if distribution['count'] else 0
+            # smallest power of two holding 99% of the values
+            p99, seen = 0, 0
+            for bucket in sorted(distribution['histogram']):
+                seen += distribution['histogram'][bucket]
+                p99 = bucket
+                if seen >= 0.99 * distribution['count']:
+                    break
+            lines.append(f"  {name:<24} mean {mean:.1f}  p99 <= {p99}  max {distribution['max']}")
+
+        if data['profile_path']:
+            lines.append(f"  profile: {data['profile_path']}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def profile_run(report, profiler=None, output_dir=None):
+    """
+    Optionally capture a profile of the code inside the block.
+
+    Parameters:
+    report - RunReport, receives the path of the written profile
+    profiler - None, 'cprofile' or 'pyinstrument'
+    output_dir - Directory for the profile file, temp dir by default
+    """
+    if not profiler:
+        yield
+        return
+
+    output_dir = output_dir or tempfile.gettempdir()
+    stamp = report.started_at.strftime('%Y%m%d_%H%M%S')
+
+    if profiler == 'cprofile':
+        import cProfile
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            report.profile_path = os.path.join(output_dir, f"screening_{stamp}.prof")
+            profile.dump_stats(report.profile_path)
+
+    elif profiler == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("pyinstrument is not installed, running without profiler")
+            yield
+            return
+        profile = Profiler()
+        profile.start()
+        try:
+            yield
+        finally:
+            profile.stop()
+            report.profile_path = os.path.join(output_dir, f"screening_{stamp}.html")
+            with open(report.profile_path, 'w', encoding='utf-8') as f:
+                f.write(profile.output_html())
+
+    else:
+        print(f"Unknown profiler: {profiler}")
+        yield
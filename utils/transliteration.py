@@ -0,0 +1,104 @@
+import re
+
+# Lower case letters to Latin, close to the BGN/PCGN spellings used in the
+# Latin aliases of sanctions lists. Upper case letters are derived.
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e', 'ж': 'zh', 'з': 'z',
+    'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r',
+    'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh',
+    'щ': 'shch', 'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+    # Ukrainian and Belarusian
+    'є': 'ye', 'і': 'i', 'ї': 'yi', 'ґ': 'g', 'ў': 'u',
+    # Serbian and Macedonian
+    'ђ': 'dj', 'ј': 'j', 'љ': 'lj', 'њ': 'nj', 'ћ': 'c', 'џ': 'dz', 'ѓ': 'gj', 'ќ': 'kj', 'ѕ': 'dz',
+}
+
+GREEK_TO_LATIN = {
+    'α': 'a', 'β': 'v', 'γ': 'g', 'δ': 'd', 'ε': 'e', 'ζ': 'z', 'η': 'i', 'θ': 'th', 'ι': 'i',
+    'κ': 'k', 'λ': 'l', 'μ': 'm', 'ν': 'n', 'ξ': 'x', 'ο': 'o', 'π': 'p', 'ρ': 'r', 'σ': 's',
+    'ς': 's', 'τ': 't', 'υ': 'y', 'φ': 'f', 'χ': 'ch', 'ψ': 'ps', 'ω': 'o',
+    'ά': 'a', 'έ': 'e', 'ή': 'i', 'ί': 'i', 'ό': 'o', 'ύ': 'y', 'ώ': 'o',
+    'ϊ': 'i', 'ϋ': 'y', 'ΐ': 'i', 'ΰ': 'y',
+}
+
+# Arabic script has no upper case and usually no short vowels, so the result
+# is a consonant skeleton (محمد -> mhmd) plus vowels where marks are written.
+ARABIC_TO_LATIN = {
+    'ا': 'a', 'أ': 'a', 'إ': 'i', 'آ': 'a', 'ٱ': 'a', 'ب': 'b', 'ت': 't', 'ث': 'th', 'ج': 'j',
+    'ح': 'h', 'خ': 'kh', 'د': 'd', 'ذ': 'dh', 'ر': 'r', 'ز': 'z', 'س': 's', 'ش': 'sh', 'ص': 's',
+    'ض': 'd', 'ط': 't', 'ظ': 'z', 'ع': '', 'غ': 'gh', 'ف': 'f', 'ق': 'q', 'ك': 'k', 'ل': 'l',
+    'م': 'm', 'ن': 'n', 'ه': 'h', 'و': 'w', 'ي': 'y', 'ى': 'a', 'ة': 'a', 'ء': '', 'ئ': '',
+    'ؤ': '', 'ـ': '',
+    # short vowel marks, shadda and sukun
+    'َ': 'a', 'ُ': 'u', 'ِ': 'i', 'ً': 'an', 'ٌ': 'un', 'ٍ': 'in', 'ّ': '', 'ْ': '',
+    # Persian and Urdu letters
+    'پ': 'p', 'چ': 'ch', 'ژ': 'zh', 'گ': 'g', 'ک': 'k', 'ی': 'y', 'ہ': 'h', 'ۀ': 'a',
+}
+
+TRANSLITERATION_TABLES = {
+    'cyrillic': CYRILLIC_TO_LATIN,
+    'greek': GREEK_TO_LATIN,
+    'arabic': ARABIC_TO_LATIN,
+}
+
+# Greek digraphs that are not letter by letter
+GREEK_DIGRAPHS = re.compile('ου|Ου|ΟΥ')
+GREEK_DIGRAPH_LATIN = {'ου': 'ou', 'Ου': 'Ou', 'ΟΥ': 'OU'}
+
+
+def translation_table(scripts):
+    """
+    str.translate table for the given scripts.
+
+    Parameters:
+    scripts - Keys of TRANSLITERATION_TABLES, others are ignored
+
+    Returns:
+    dict - code point -> Latin string
+    """
+    table = {}
+    for script in scripts:
+        for letter, latin in TRANSLITERATION_TABLES.get(script, {}).items():
+            table[ord(letter)] = latin
+            upper = letter.upper()
+            if upper != letter and len(upper) == 1:
+                table.setdefault(ord(upper), latin.capitalize())
+    return table
+
+
+def transliterate(text, scripts=tuple(TRANSLITERATION_TABLES)):
+    """
+    Latin spelling of a name written in Cyrillic, Greek or Arabic script.
+    Characters of other scripts are kept as they are.
+
+    Parameters:
+    text - Name, non-strings are returned unchanged
+    scripts - Scripts to transliterate
+
+    Returns:
+    str - transliterated name
+    """
+    if not isinstance(text, str):
+        return text
+    if 'greek' in scripts:
+        text = GREEK_DIGRAPHS.sub(lambda match: GREEK_DIGRAPH_LATIN[match.group()], text)
+    return text.translate(translation_table(tuple(scripts)))
+
+
+def transliterate_series(series, scripts=tuple(TRANSLITERATION_TABLES)):
+    """
+    transliterate over a whole column, the table is built once.
+
+    Parameters:
+    series - pandas Series of names
+    scripts - Scripts to transliterate
+
+    Returns:
+    Series of transliterated names, missing values stay missing
+    """
+    table = translation_table(tuple(scripts))
+    if series.dtype != object:
+        series = series.astype(object)
+    if 'greek' in scripts:
+        series = series.str.replace(GREEK_DIGRAPHS, lambda match: GREEK_DIGRAPH_LATIN[match.group()], regex=True)
+    return series.str.translate(table)
@@ -0,0 +1,109 @@
+import time
+import threading
+from collections import OrderedDict
+from config import AppConfig
+from utils.helpers import normalize_name
+
+
+class VerdictCache:
+    """
+    Bounded LRU cache of screening verdicts with a time to live.
+
+    Keys are the normalized (name, surname) of a client with the snapshot
+    version and engine settings, values the ranked matches the engine
+    returned. Entries of an older snapshot are dropped as soon as a newer
+    version is prepared. Safe to share between threads.
+    """
+
+    def __init__(self, max_size=None, ttl=None):
+        """
+        Parameters:
+        max_size - Number of verdicts kept, AppConfig.VERDICT_CACHE_SIZE by default
+        ttl - Seconds a verdict stays valid, AppConfig.VERDICT_CACHE_TTL by default (None keeps them)
+        """
+        self.max_size = max_size or AppConfig.VERDICT_CACHE_SIZE
+        self.ttl = ttl if ttl is not None else AppConfig.VERDICT_CACHE_TTL
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls):
+        """Cache of AppConfig.VERDICT_CACHE_SIZE verdicts, None when disabled"""
+        if not AppConfig.VERDICT_CACHE_SIZE:
+            return None
+        return cls()
+
+    @staticmethod
+    def key(person, version, settings=()):
+        """Cache key of a client: normalized name and surname, snapshot version and settings"""
+        return normalize_name(person.name), normalize_name(person.surname), version, settings
+
+    def use_version(self, version):
+        """
+        Drop every verdict when a different snapshot version is prepared.
+
+        Returns:
+        bool - whether the cache was invalidated
+        """
+        with self._lock:
+            if version == self.version:
+                return False
+            invalidated = bool(self._entries)
+            self._entries.clear()
+            self.version = version
+            if invalidated:
+                self.invalidations += 1
+            return invalidated
+
+    def get(self, key):
+        """Cached ranked matches, None on a miss or an expired verdict"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, ranked):
+        """
+        Store the ranked matches of a key, evicting the least recently used verdicts.
+
+        Returns:
+        int - number of evicted verdicts
+        """
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (time.monotonic(), tuple(ranked))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                evicted += 1
+            self.evictions += evicted
+        return evicted
+
+    def stats(self):
+        """Counters since the cache was created"""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+    def __len__(self):
+        return len(self._entries)